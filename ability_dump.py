@@ -1,7 +1,9 @@
 import json
 from decimal import Decimal
 
-with open("BattlePoint.json", "r", encoding="utf-8") as fp:
+from battlepoint.calculator import BATTLE_POINT_PATH
+
+with open(BATTLE_POINT_PATH, "r", encoding="utf-8") as fp:
     battle_point = json.load(fp)
 
 
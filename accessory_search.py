@@ -0,0 +1,374 @@
+"""
+경매장 매물 중에서 골드 예산 안에 전투력이 가장 높은 장신구(목걸이 1, 귀걸이 2, 반지 2) 조합 탐색
+
+매물 파일은 아래와 같은 json 배열입니다.
+[
+    {
+        "name": "도래한 결전의 귀걸이",
+        "type": "귀걸이",
+        "grinding_effects": ["공격력 +1.55%", "무기 공격력 +195", "추가 피해 +0.60%"],
+        "price": 152000
+    }
+]
+
+$ python accessory_search.py character_이름.json listings.json --budget 500000
+"""
+
+import argparse
+import json
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Literal
+
+from battlepoint.calculator import (
+    CARE_BATTLE_POINT_TYPES,
+    EQUIPMENT_TYPE_ACCESSORY,
+    BattlePointCalculator,
+    BattlePointType,
+    Factor,
+    FactorChain,
+)
+from battlepoint.character import CharacterInformation, EquipmentType
+from battlepoint.snapshot import load_character
+
+ACCESSORY_BATTLE_POINT_TYPES = {
+    BattlePointType.ACCESSORY_GRINDING_ATTACK,
+    BattlePointType.ACCESSORY_GRINDING_DEFENSE,
+    BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK,
+}
+
+# 부위별로 장착하는 개수
+ACCESSORY_SLOTS = {
+    EquipmentType.목걸이: 1,
+    EquipmentType.귀걸이: 2,
+    EquipmentType.반지: 2,
+}
+
+# 프론티어가 이보다 크면 증가율 격자로 줄임 (다음 부위와 합칠 때 조합 수가 곱해지므로)
+MAX_FRONTIER = 1000
+THIN_STEP = 1e-4
+
+
+@dataclass
+class Listing:
+    name: str
+    equipment_type: EquipmentType
+    grinding_effects: list[str]
+    price: int
+
+    # 아래는 precompute에서 채움
+    # 계산 단계(BattlePointType)별 계수, calc와 같은 순서로 적용됨
+    factors: dict[BattlePointType, list[Factor]] = field(
+        default_factory=dict, repr=False
+    )
+    log_gain: tuple[float, float] = (0.0, 0.0)  # (공격 점수, 케어 점수) 증가율의 log
+
+
+@dataclass
+class AccessorySet:
+    price: int
+    listings: list[Listing]
+    score: int = 0  # 매단계 내림까지 반영한 실제 전투력
+
+
+@dataclass
+class _Node:
+    # 파레토 프론티어의 한 점, 같은 부위 여러 개나 여러 부위를 합친 조합
+    price: int
+    log_gain: tuple[float, float]
+    listings: tuple[Listing, ...]
+
+
+def load_listings(fname: str) -> list[Listing]:
+    with open(fname, "r", encoding="utf-8") as fp:
+        data = json.load(fp)
+
+    return [
+        Listing(
+            name=item["name"],
+            equipment_type=EquipmentType(item["type"]),
+            grinding_effects=list(item["grinding_effects"]),
+            price=int(item["price"]),
+        )
+        for item in data
+        if item["type"] in ACCESSORY_SLOTS
+    ]
+
+
+def precompute(
+    calculator: BattlePointCalculator,
+    listings: list[Listing],
+    score_type: Literal["attack", "defense"],
+):
+    """매물마다 연마 효과의 계수를 한 번만 구해둡니다. calc의 연마 효과 부분과 같은 방식"""
+    d = calculator.dict_battle_point[score_type]
+    tables = [
+        (BattlePointType.ACCESSORY_GRINDING_ATTACK, calculator.find_by_regex, 8),
+        (BattlePointType.ACCESSORY_GRINDING_DEFENSE, calculator.find_by_regex, 8),
+        (
+            BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK,
+            calculator.find_by_str,
+            4,
+        ),
+    ]
+
+    for listing in listings:
+        log_attack, log_care = 0.0, 0.0
+        for battle_point_type, find, base in tables:
+            table = d.get(battle_point_type, {})
+            factors = []
+            for effect in listing.grinding_effects:
+                coeff = find(effect, table)
+                if not coeff:
+                    continue
+                factors.append(
+                    Factor(
+                        battle_point_type,
+                        int(coeff),
+                        base,
+                        f"{listing.name} - {effect}",
+                    )
+                )
+                gain = math.log1p(int(coeff) / pow(10, base))
+                if battle_point_type in CARE_BATTLE_POINT_TYPES:
+                    log_care += gain
+                else:
+                    log_attack += gain
+            listing.factors[battle_point_type] = factors
+        listing.log_gain = (log_attack, log_care)
+
+
+def _dominates(a: _Node, b: _Node) -> bool:
+    return (
+        a.price <= b.price
+        and a.log_gain[0] >= b.log_gain[0]
+        and a.log_gain[1] >= b.log_gain[1]
+    )
+
+
+def _skyline(nodes: list[_Node]) -> list[_Node]:
+    """
+    pareto(keep=1), 가격순으로 훑으면서 지금까지 남긴 점들의 (공격, 케어) 계단과만 비교
+    계단은 공격 증가율 오름차순이고 케어 증가율은 내림차순이므로 이진 탐색 한 번으로 지배 여부를 앎
+    """
+    nodes = sorted(nodes, key=lambda n: (n.price, -n.log_gain[0], -n.log_gain[1]))
+    attacks: list[float] = []
+    cares: list[float] = []
+    result: list[_Node] = []
+    for node in nodes:
+        attack, care = node.log_gain
+        # 공격 증가율이 attack 이상인 점들 중 케어 증가율이 가장 큰 점
+        i = bisect_left(attacks, attack)
+        if i < len(attacks) and cares[i] >= care:
+            continue
+        result.append(node)
+
+        # 새 점보다 두 증가율이 모두 작거나 같은 계단 점은 뺌
+        lo = i
+        while lo > 0 and cares[lo - 1] <= care:
+            lo -= 1
+        hi = i
+        if hi < len(attacks) and attacks[hi] == attack:
+            hi += 1
+        attacks[lo:hi] = [attack]
+        cares[lo:hi] = [care]
+    return result
+
+
+def pareto(nodes: list[_Node], keep: int = 1) -> list[_Node]:
+    """
+    가격은 낮고 증가율은 높은 점들만 남깁니다.
+    keep개 이상의 다른 점에게 지배당하는 점만 버리므로, 같은 부위를 keep개 고를 때도 안전합니다.
+    """
+    if keep == 1:
+        return _skyline(nodes)
+
+    nodes = sorted(nodes, key=lambda n: (n.price, -n.log_gain[0], -n.log_gain[1]))
+    result: list[_Node] = []
+    for node in nodes:
+        dominated = 0
+        for kept in result:
+            if _dominates(kept, node):
+                dominated += 1
+                if dominated >= keep:
+                    break
+        if dominated < keep:
+            result.append(node)
+    return result
+
+
+def _thin(nodes: list[_Node], max_size: int) -> list[_Node]:
+    """
+    프론티어가 max_size보다 크면 (공격, 케어) 증가율의 log를 격자로 나눠 칸마다 가장 싼 점만 남김
+    칸 크기는 1e-4(0.01%)부터 두 배씩 키우므로 버린 점과의 증가율 차이는 칸 크기 이하
+    """
+    step = THIN_STEP
+    while len(nodes) > max_size:
+        cells: dict[tuple[int, int], _Node] = {}
+        for node in nodes:
+            key = (int(node.log_gain[0] / step), int(node.log_gain[1] / step))
+            if key not in cells or node.price < cells[key].price:
+                cells[key] = node
+        nodes = _skyline(list(cells.values()))
+        step *= 2
+    return nodes
+
+
+def _combine(a: list[_Node], b: list[_Node], budget: int | None) -> list[_Node]:
+    """두 프론티어의 모든 조합을 만들고 다시 파레토 프론티어만 남김"""
+    result = []
+    for x in a:
+        for y in b:
+            price = x.price + y.price
+            if budget is not None and price > budget:
+                continue
+            result.append(
+                _Node(
+                    price,
+                    (x.log_gain[0] + y.log_gain[0], x.log_gain[1] + y.log_gain[1]),
+                    x.listings + y.listings,
+                )
+            )
+    return pareto(result)
+
+
+def _choose(nodes: list[_Node], count: int, budget: int | None) -> list[_Node]:
+    """같은 부위에서 서로 다른 매물 count개를 고르는 조합의 프론티어"""
+    candidates = pareto(
+        [n for n in nodes if budget is None or n.price <= budget], keep=count
+    )
+    # (조합, 마지막으로 고른 후보의 인덱스)
+    frontier: list[tuple[_Node, int]] = [(_Node(0, (0.0, 0.0), ()), -1)]
+    for _ in range(count):
+        expanded = []
+        for partial, last in frontier:
+            # 같은 조합이 순서만 바뀌어 중복되지 않도록 인덱스가 증가하는 방향으로만 추가
+            for idx in range(last + 1, len(candidates)):
+                node = candidates[idx]
+                price = partial.price + node.price
+                if budget is not None and price > budget:
+                    continue
+                combined = _Node(
+                    price,
+                    (
+                        partial.log_gain[0] + node.log_gain[0],
+                        partial.log_gain[1] + node.log_gain[1],
+                    ),
+                    partial.listings + node.listings,
+                )
+                expanded.append((combined, idx))
+        frontier = expanded
+    return pareto([node for node, _ in frontier])
+
+
+class AccessorySearch:
+    def __init__(self, calculator: BattlePointCalculator, listings: list[Listing]):
+        self.calculator = calculator
+        self.listings = listings
+        self._precomputed: str | None = None
+
+    def _exact_score(self, chain: FactorChain, listings: tuple[Listing, ...]) -> int:
+        # calc처럼 연마 효과 단계별로 장신구 순서대로 적용
+        factors = [
+            f
+            for battle_point_type in (
+                BattlePointType.ACCESSORY_GRINDING_ATTACK,
+                BattlePointType.ACCESSORY_GRINDING_DEFENSE,
+                BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK,
+            )
+            for listing in listings
+            for f in listing.factors[battle_point_type]
+        ]
+        return chain.replace(ACCESSORY_BATTLE_POINT_TYPES, factors).score()
+
+    def search(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"] = "attack",
+        budget: int | None = None,
+    ) -> tuple[AccessorySet | None, list[AccessorySet]]:
+        """
+        (예산 안에서 가장 좋은 조합, 가격-전투력 파레토 프론티어)를 반환합니다.
+        프론티어는 매단계 내림을 무시한 증가율로 고르고, 점수는 FactorChain으로 정확히 계산합니다.
+        부위별 프론티어가 MAX_FRONTIER보다 크면 합치기 전에 증가율 격자로 줄이므로,
+        그때는 칸 크기만큼 덜 좋은 조합이 나올 수 있습니다.
+        """
+        if self._precomputed != score_type:
+            precompute(self.calculator, self.listings, score_type)
+            self._precomputed = score_type
+
+        chain = self.calculator.calc_factors(char, score_type)
+        chain = chain.replace(ACCESSORY_BATTLE_POINT_TYPES, [])
+
+        frontier = [_Node(0, (0.0, 0.0), ())]
+        for equipment_type, count in ACCESSORY_SLOTS.items():
+            nodes = [
+                _Node(listing.price, listing.log_gain, (listing,))
+                for listing in self.listings
+                if listing.equipment_type == equipment_type
+            ]
+            # 합칠 때 조합 수가 두 프론티어 크기의 곱이므로 합치기 전에만 줄임
+            frontier = _combine(
+                _thin(frontier, MAX_FRONTIER),
+                _thin(_choose(nodes, count, budget), MAX_FRONTIER),
+                budget,
+            )
+
+        result = []
+        for node in frontier:
+            result.append(
+                AccessorySet(
+                    price=node.price,
+                    listings=list(node.listings),
+                    score=self._exact_score(chain, node.listings),
+                )
+            )
+        result.sort(key=lambda s: s.price)
+
+        # 내림 때문에 프론티어 순서와 실제 점수가 미세하게 다를 수 있어서 실제 점수로 다시 거름
+        exact_frontier = []
+        for s in result:
+            if not exact_frontier or s.score > exact_frontier[-1].score:
+                exact_frontier.append(s)
+
+        best = max(exact_frontier, key=lambda s: s.score, default=None)
+        return best, exact_frontier
+
+
+def current_accessories(char: CharacterInformation) -> list[str]:
+    return [
+        e.name for e in char.equipments if e.equipment_type in EQUIPMENT_TYPE_ACCESSORY
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장신구 조합 탐색")
+    parser.add_argument("character", help="OPENAPI 응답 json 파일")
+    parser.add_argument("listings", help="매물 json 파일")
+    parser.add_argument("--budget", type=int, help="골드 예산")
+    parser.add_argument("--score-type", choices=["attack", "defense"])
+    args = parser.parse_args()
+
+    calculator = BattlePointCalculator()
+    char = load_character(args.character)
+    score_type = args.score_type or ("defense" if char.is_supporter else "attack")
+
+    listings = load_listings(args.listings)
+    best, frontier = AccessorySearch(calculator, listings).search(
+        char, score_type, args.budget
+    )
+
+    print(f"현재 전투력: {calculator.calc(char, score_type) / 100:,.2f}")
+    print(f"현재 장신구: {', '.join(current_accessories(char))}")
+    if best is None:
+        print("예산 안에서 가능한 조합이 없습니다.")
+    else:
+        print(f"최적 조합: {best.score / 100:,.2f} ({best.price:,}골드)")
+        for listing in best.listings:
+            effects = ", ".join(listing.grinding_effects)
+            print(f"  {listing.name} {listing.price:,}골드 - {effects}")
+
+    print("가격별 최고 전투력")
+    for s in frontier:
+        print(f"  {s.price:>12,}골드 {s.score / 100:,.2f}")
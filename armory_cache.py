@@ -0,0 +1,265 @@
+"""
+armory 응답 로컬 캐시
+
+응답 바이트를 내용 해시로 압축 저장하고(같은 응답은 한 번만 저장), 캐릭터별로
+마지막으로 받은 시각, 마지막으로 바뀐 시각, TTL, 마지막으로 계산한 응답의 해시를 기록합니다.
+- TTL 안에서는 다시 받지 않음
+- 다시 받았는데 내용이 같으면 unchanged로 표시해서 파싱/계산을 건너뜀
+- 캐릭터는 (이름, filters)별로 따로 기록
+  전체 응답과 필요한 항목만 받은 응답은 내용이 다르므로, 같은 캐시를 두 방식으로 번갈아 쓰면
+  매번 바뀐 것으로 보이지 않도록 함
+
+$ python armory_cache.py          # 캐시 상태 출력
+$ python armory_cache.py --gc     # 어떤 캐릭터도 참조하지 않는 응답 삭제
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import requests
+
+from battlepoint.api import fetch_armory
+from battlepoint.snapshot import content_hash
+
+ARMORY_CACHE_DIR = ".armory_cache"
+DEFAULT_TTL = 60 * 60  # 초
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    content_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS characters (
+    name TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    changed_at REAL NOT NULL,
+    ttl REAL NOT NULL,
+    processed_hash TEXT,
+    filters TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (name, filters)
+);
+"""
+
+# filters 컬럼이 없던 캐시, 기존 기록은 모두 filters 없이 받은 것으로 봄
+# characters를 characters_old로 바꾸고 SCHEMA로 새로 만든 뒤 실행
+MIGRATE_FILTERS = """
+INSERT INTO characters
+    SELECT name, content_hash, fetched_at, changed_at, ttl, processed_hash, ''
+    FROM characters_old;
+DROP TABLE characters_old;
+"""
+
+ENTRY_COLUMNS = (
+    "name, content_hash, fetched_at, changed_at, ttl, processed_hash, filters"
+)
+
+
+@dataclass
+class CacheEntry:
+    name: str
+    content_hash: str
+    fetched_at: float  # 마지막으로 받은 시각
+    changed_at: float  # 내용이 마지막으로 바뀐 시각
+    ttl: float
+    processed_hash: str | None  # 마지막으로 파싱/계산까지 끝낸 응답의 해시
+    filters: str = ""  # 받을 때 사용한 filters, 없으면 ""
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.fetched_at < self.ttl
+
+    @property
+    def pending(self) -> bool:
+        """받은 응답이 아직 계산되지 않았는지"""
+        return self.content_hash != self.processed_hash
+
+
+@dataclass
+class FetchResult:
+    name: str
+    status: Literal["fresh", "unchanged", "changed", "missing"]
+    entry: CacheEntry | None = None
+
+
+class ArmoryCache:
+    def __init__(
+        self, directory: str | Path = ARMORY_CACHE_DIR, ttl: float = DEFAULT_TTL
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        # roster처럼 여러 스레드에서 받는 경우를 위해 연결 하나를 lock으로 보호
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            self.directory / "armory.db", check_same_thread=False
+        )
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(characters)")]
+        if "filters" not in columns:
+            self.conn.executescript(
+                "ALTER TABLE characters RENAME TO characters_old;"
+                + SCHEMA
+                + MIGRATE_FILTERS
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, name: str, filters: str | None = None) -> CacheEntry | None:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM characters WHERE name = ? AND filters = ?",
+                (name, filters or ""),
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def entries(self) -> list[CacheEntry]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM characters ORDER BY name, filters"
+            ).fetchall()
+        return [CacheEntry(*row) for row in rows]
+
+    def pending(self) -> list[CacheEntry]:
+        """응답이 바뀌어서 다시 계산해야 하는 캐릭터들"""
+        return [e for e in self.entries() if e.pending]
+
+    def read(self, digest: str) -> bytes:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM objects WHERE content_hash = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return zlib.decompress(row[0])
+
+    def put(
+        self,
+        name: str,
+        raw: bytes,
+        now: float | None = None,
+        ttl: float | None = None,
+        filters: str | None = None,
+    ) -> tuple[CacheEntry, bool]:
+        """응답을 저장하고 (entry, 같은 filters로 받은 이전 응답과 내용이 다른지)를 반환"""
+        now = time.time() if now is None else now
+        digest = content_hash(raw)
+        previous = self.get(name, filters)
+        changed = previous is None or previous.content_hash != digest
+
+        entry = CacheEntry(
+            name=name,
+            content_hash=digest,
+            fetched_at=now,
+            changed_at=now if changed else previous.changed_at,
+            ttl=ttl if ttl is not None else previous.ttl if previous else self.ttl,
+            processed_hash=previous.processed_hash if previous else None,
+            filters=filters or "",
+        )
+        with self._lock, self.conn:
+            if changed:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO objects VALUES (?, ?, ?)",
+                    (digest, len(raw), zlib.compress(raw, 6)),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO characters VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.name,
+                    entry.content_hash,
+                    entry.fetched_at,
+                    entry.changed_at,
+                    entry.ttl,
+                    entry.processed_hash,
+                    entry.filters,
+                ),
+            )
+        return entry, changed
+
+    def mark_processed(self, name: str, digest: str, filters: str | None = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE characters SET processed_hash = ? WHERE name = ? AND filters = ?",
+                (digest, name, filters or ""),
+            )
+
+    def gc(self) -> int:
+        """어떤 캐릭터도 참조하지 않는 응답을 지우고 지운 개수를 반환"""
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM objects WHERE content_hash NOT IN "
+                "(SELECT content_hash FROM characters)"
+            )
+        return cur.rowcount
+
+    def stats(self) -> tuple[int, int, int, int]:
+        """(캐릭터 수, 저장된 응답 수, 원본 크기 합, 압축 크기 합)"""
+        with self._lock:
+            characters = self.conn.execute(
+                "SELECT COUNT(DISTINCT name) FROM characters"
+            ).fetchone()
+            objects = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+                "COALESCE(SUM(LENGTH(data)), 0) FROM objects"
+            ).fetchone()
+        return characters[0], *objects
+
+
+def fetch_cached(
+    cache: ArmoryCache,
+    session: requests.Session,
+    charname: str,
+    api_base: str,
+    *,
+    now: float | None = None,
+    ttl: float | None = None,
+    force: bool = False,
+    filters: str | None = None,
+) -> FetchResult:
+    """
+    TTL 안이면 요청하지 않고, 받은 응답이 이전과 같으면 unchanged로 표시
+    ttl이 주어지면 캐릭터에 저장된 TTL 대신 사용하고 새 TTL로 저장
+    filters로 계산에 필요한 항목만 받으면 스킬, 수집품 등이 바뀌어도 unchanged가 됨
+    """
+    now = time.time() if now is None else now
+    entry = cache.get(charname, filters)
+    if entry is not None and not force:
+        if now - entry.fetched_at < (entry.ttl if ttl is None else ttl):
+            return FetchResult(charname, "fresh", entry)
+
+    raw = fetch_armory(session, charname, api_base, filters)
+    if raw.strip() == b"null":
+        return FetchResult(charname, "missing", entry)
+
+    entry, changed = cache.put(charname, raw, now, ttl, filters)
+    return FetchResult(charname, "changed" if changed else "unchanged", entry)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="armory 캐시 상태")
+    parser.add_argument("--cache", default=ARMORY_CACHE_DIR)
+    parser.add_argument("--gc", action="store_true", help="참조되지 않는 응답 삭제")
+    args = parser.parse_args()
+
+    cache = ArmoryCache(args.cache)
+    if args.gc:
+        print(f"{cache.gc()}개 응답 삭제")
+
+    characters, objects, size, compressed = cache.stats()
+    print(
+        f"캐릭터 {characters}개, 응답 {objects}개, "
+        f"{size / 1024:,.0f}KB -> {compressed / 1024:,.0f}KB"
+    )
+    now = time.time()
+    for e in cache.entries():
+        state = "계산 필요" if e.pending else "계산 완료"
+        fresh = "TTL 안" if e.is_fresh(now) else "만료"
+        filters = f" filters={e.filters}" if e.filters else ""
+        print(f"{e.name:<12} {e.content_hash[:8]} {fresh} {state}{filters}")
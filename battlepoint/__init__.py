@@ -0,0 +1,60 @@
+"""
+로스트아크 전투력 계산
+
+from battlepoint import BattlePointCalculator, load_character
+
+calculator = BattlePointCalculator()
+calculator.calc(load_character("character_이름.json"), "attack")
+
+짧게 실행되는 작업에서 import 시간이 줄어들도록 하위 모듈은 처음 사용할 때 import 합니다.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+__all__ = [
+    "BattlePointCalculator",
+    "BattlePointType",
+    "CharacterInformation",
+    "Factor",
+    "FactorChain",
+    "final_score",
+    "load_character",
+    "load_raw",
+]
+
+# 이름 -> 정의된 하위 모듈
+_LAZY_ATTRS = {
+    "BattlePointCalculator": "calculator",
+    "BattlePointType": "calculator",
+    "Factor": "calculator",
+    "FactorChain": "calculator",
+    "final_score": "calculator",
+    "CharacterInformation": "character",
+    "load_character": "snapshot",
+    "load_raw": "snapshot",
+}
+
+if TYPE_CHECKING:
+    from battlepoint.calculator import (
+        BattlePointCalculator,
+        BattlePointType,
+        Factor,
+        FactorChain,
+        final_score,
+    )
+    from battlepoint.character import CharacterInformation
+    from battlepoint.snapshot import load_character, load_raw
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,3 @@
+from battlepoint.cli import main
+
+raise SystemExit(main())
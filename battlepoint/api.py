@@ -0,0 +1,51 @@
+"""
+LOSTARK OPENAPI 요청
+"""
+
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from battlepoint import json_backend
+
+API_BASE = "https://developer-lostark.game.onstove.com"
+
+
+def create_session(jwt: str | None, pool_size: int) -> requests.Session:
+    """모든 요청이 하나의 커넥션 풀을 공유하도록 세션을 만듭니다."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if jwt:
+        session.headers["authorization"] = f"Bearer {jwt}"
+    return session
+
+
+def fetch_siblings(
+    session: requests.Session, charname: str, api_base: str = API_BASE
+) -> list[dict]:
+    """GET /characters/{characterName}/siblings"""
+    res = session.get(f"{api_base}/characters/{quote(charname)}/siblings")
+    res.raise_for_status()
+    return json_backend.loads(res.content) or []
+
+
+def fetch_armory(
+    session: requests.Session,
+    charname: str,
+    api_base: str = API_BASE,
+    filters: str | None = None,
+) -> bytes:
+    """
+    GET /armories/characters/{characterName}, 응답 바이트를 그대로 반환
+    filters가 있으면 해당 항목만 요청 (ex. projection.CHARACTER_FILTERS)
+    """
+    url = f"{api_base}/armories/characters/{quote(charname)}"
+    if filters:
+        # requests의 params는 +를 %2B로 바꾸므로 직접 붙임
+        url += f"?filters={quote(filters, safe='+')}"
+    res = session.get(url)
+    res.raise_for_status()
+    return res.content
@@ -0,0 +1,671 @@
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, Literal, NamedTuple
+
+from battlepoint import json_backend
+from battlepoint.character import CharacterInformation, EquipmentType
+
+# 패키지와 함께 배포되는 계수 파일, 현재 폴더와 관계없이 같은 파일을 읽음
+PACKAGE_DIR = Path(__file__).resolve().parent
+BATTLE_POINT_PATH = PACKAGE_DIR / "BattlePoint.json"
+ARKPASSIVE_PATH = PACKAGE_DIR / "ArkPassive.json"
+
+EQUIPMENT_TYPE_ARMOR = {
+    EquipmentType.투구,
+    EquipmentType.상의,
+    EquipmentType.어깨,
+    EquipmentType.하의,
+    EquipmentType.장갑,
+}
+EQUIPMENT_TYPE_ACCESSORY = {
+    EquipmentType.목걸이,
+    EquipmentType.귀걸이,
+    EquipmentType.반지,
+}
+
+
+def init_recursive_battle_point_dict(json_file_path: str | Path = BATTLE_POINT_PATH):
+    """
+    BattlePoint.json을 읽습니다.
+    """
+    with open(json_file_path, "rb") as fp:
+        result = json_backend.loads(fp.read())
+
+    return result
+
+
+class BattlePointType(str, Enum):
+    BASE_ATTACK_POINT = "base_attack_point"
+    BASE_HEALTH_POINT = "base_health_point"
+    LEVEL = "level"
+    WEAPON_QUALITY = "weapon_quality"
+    ARKPASSIVE_EVOLUTION = "arkpassive_evolution"
+    ARKPASSIVE_ENLIGHTMENT = "arkpassive_enlightment"
+    ARKPASSIVE_LEAP = "arkpassive_leap"
+    KARMA_EVOLUTIONRANK = "karma_evolutionrank"
+    KARMA_LEAPLEVEL = "karma_leaplevel"
+    ABILITY_ATTACK = "ability_attack"
+    ABILITY_DEFENSE = "ability_defense"
+    ELIXIR_SET = "elixir_set"
+    ELIXIR_GRADE_ATTACK = "elixir_grade_attack"
+    ELIXIR_GRADE_DEFENSE = "elixir_grade_defense"
+    ACCESSORY_GRINDING_ATTACK = "accessory_grinding_attack"
+    ACCESSORY_GRINDING_DEFENSE = "accessory_grinding_defense"
+    ACCESSORY_GRINDING_ADDONTYPE_ATTACK = "accessory_grinding_addontype_attack"
+    ACCESSORY_GRINDING_ADDONTYPE_DEFENSE = "accessory_grinding_addontype_defense"
+    BRACELET_STATTYPE = "bracelet_stattype"
+    BRACELET_ADDONTYPE_ATTACK = "bracelet_addontype_attack"
+    BRACELET_ADDONTYPE_DEFENSE = "bracelet_addontype_defense"
+    GEM = "gem"
+    ESTHER_WEAPON = "esther_weapon"
+    TRANSCENDENCE_ARMOR = "transcendence_armor"
+    TRANSCENDENCE_ADDITIONAL = "transcendence_additional"
+    BATTLESTAT = "battlestat"
+    CARD_SET = "card_set"
+    PET_SPECIALTY = "pet_specialty"
+
+
+# 계산 순서, calc에서 계수를 적용하는 순서는 BattlePointType 정의 순서와 같음
+BATTLE_POINT_TYPE_ORDER = {t: i for i, t in enumerate(BattlePointType)}
+
+# 서폿 케어 점수(result2)에 적용되는 계수
+CARE_BATTLE_POINT_TYPES = {
+    BattlePointType.ABILITY_DEFENSE,
+    BattlePointType.ELIXIR_GRADE_DEFENSE,
+    BattlePointType.ACCESSORY_GRINDING_DEFENSE,
+    BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_DEFENSE,
+    BattlePointType.BRACELET_ADDONTYPE_DEFENSE,
+}
+
+
+class Factor(NamedTuple):
+    """calc에서 apply로 적용된 계수 하나"""
+
+    battle_point_type: BattlePointType
+    coeff: int
+    base: int = 4
+    message: str = ""
+
+
+@dataclass
+class FactorChain:
+    """
+    calc가 적용한 계수들을 순서대로 기록한 것
+    일부 계수만 바꿔서 다시 계산해도 calc와 같은 값(매 단계 내림 포함)이 나옵니다.
+    """
+
+    score_type: Literal["attack", "defense"]
+    base_attack_point: int  # 공격 점수 시작 값 (result)
+    base_health_point: int  # 케어 점수 시작 값 (result2)
+    factors: list[Factor] = field(default_factory=list)
+
+    def replay(self) -> tuple[int, int]:
+        """계수를 모두 적용한 (공격 점수, 케어 점수)"""
+        result, result2 = self.base_attack_point, self.base_health_point
+        for battle_point_type, coeff, base, _ in self.factors:
+            if battle_point_type in CARE_BATTLE_POINT_TYPES:
+                result2 += result2 * coeff // pow(10, base)
+            else:
+                result += result * coeff // pow(10, base)
+        return result, result2
+
+    def score(self) -> int:
+        """calc의 반환 값과 같은 최종 전투력"""
+        return final_score(self.score_type, *self.replay())
+
+    def stage_gains(self) -> dict[BattlePointType, float]:
+        """
+        BattlePointType 단계별 (단계 직후 값 / 단계 직전 값), 매 단계 내림 포함
+        케어 점수 계수는 케어 점수 기준, 적용된 계수가 없는 단계는 1.0
+        """
+        gains = dict.fromkeys(BattlePointType, 1.0)
+        result, result2 = self.base_attack_point, self.base_health_point
+        for battle_point_type, coeff, base, _ in self.factors:
+            if battle_point_type in CARE_BATTLE_POINT_TYPES:
+                before = result2
+                result2 += result2 * coeff // pow(10, base)
+                after = result2
+            else:
+                before = result
+                result += result * coeff // pow(10, base)
+                after = result
+            if before:
+                gains[battle_point_type] *= after / before
+        return gains
+
+    def replace(
+        self,
+        battle_point_types: set[BattlePointType],
+        factors: list[Factor],
+    ) -> "FactorChain":
+        """
+        battle_point_types에 해당하는 계수를 모두 빼고 factors를 계산 순서에 맞는 위치에 넣은
+        새 FactorChain을 반환합니다.
+        """
+        order = min(BATTLE_POINT_TYPE_ORDER[t] for t in battle_point_types)
+        kept = [
+            f for f in self.factors if f.battle_point_type not in battle_point_types
+        ]
+        idx = 0
+        while (
+            idx < len(kept)
+            and BATTLE_POINT_TYPE_ORDER[kept[idx].battle_point_type] < order
+        ):
+            idx += 1
+
+        return FactorChain(
+            score_type=self.score_type,
+            base_attack_point=self.base_attack_point,
+            base_health_point=self.base_health_point,
+            factors=kept[:idx] + list(factors) + kept[idx:],
+        )
+
+    def split(
+        self, battle_point_types: set[BattlePointType]
+    ) -> tuple[list[Factor], list[Factor]]:
+        """battle_point_types 단계 이전, 이후의 계수 목록 (해당 단계는 제외)"""
+        order = min(BATTLE_POINT_TYPE_ORDER[t] for t in battle_point_types)
+        prefix, suffix = [], []
+        for f in self.factors:
+            if f.battle_point_type in battle_point_types:
+                continue
+            if BATTLE_POINT_TYPE_ORDER[f.battle_point_type] < order:
+                prefix.append(f)
+            else:
+                suffix.append(f)
+        return prefix, suffix
+
+
+def final_score(
+    score_type: Literal["attack", "defense"], result: int, result2: int
+) -> int:
+    if score_type == "attack":
+        return round(result / Decimal(10000))
+    return round(result / Decimal(10000) + result2 / Decimal(100))
+
+
+class BattlePointCalculator:
+    def __init__(
+        self,
+        battle_point_path: str | Path = BATTLE_POINT_PATH,
+        arkpassive_path: str | Path = ARKPASSIVE_PATH,
+        *,
+        dict_battle_point: dict | None = None,
+        dict_arkpassive_point: dict | None = None,
+    ):
+        """
+        계수 파일은 처음 계산할 때 읽습니다.
+        dict_battle_point, dict_arkpassive_point가 주어지면 파일을 읽지 않고 그대로 사용
+        """
+        self.battle_point_path = battle_point_path
+        self.arkpassive_path = arkpassive_path
+        self._dict_battle_point = dict_battle_point
+        self._dict_arkpassive_point = dict_arkpassive_point
+        self.verbose = False  # not thread-safe
+        self.trace: list[Factor] | None = None  # not thread-safe
+
+    @property
+    def dict_battle_point(self) -> dict:
+        if self._dict_battle_point is None:
+            self._dict_battle_point = init_recursive_battle_point_dict(
+                self.battle_point_path
+            )
+        return self._dict_battle_point
+
+    @dict_battle_point.setter
+    def dict_battle_point(self, value: dict):
+        self._dict_battle_point = value
+
+    @property
+    def dict_arkpassive_point(self) -> dict:
+        if self._dict_arkpassive_point is None:
+            with open(self.arkpassive_path, "rb") as fp:
+                self._dict_arkpassive_point = json_backend.loads(fp.read())
+        return self._dict_arkpassive_point
+
+    @dict_arkpassive_point.setter
+    def dict_arkpassive_point(self, value: dict):
+        self._dict_arkpassive_point = value
+
+    def apply(
+        self,
+        result: int,
+        coeff_in: int | None,
+        battle_point_type: BattlePointType,
+        additional_message: str = "",
+        *,
+        base: int = 4,
+    ):
+        if coeff_in is None or coeff_in == 0:
+            return result
+
+        result += result * coeff_in // pow(10, base)
+
+        if self.trace is not None:
+            self.trace.append(
+                Factor(battle_point_type, int(coeff_in), base, additional_message)
+            )
+
+        if self.verbose:
+            increase = ((coeff_in + pow(10, base)) / pow(10, base) - 1) * 100
+            print(f"{battle_point_type} {additional_message} +{increase:.{base - 2}f}%")
+
+        return result
+
+    def calc(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"] = "attack",
+    ) -> int:
+        d: dict[BattlePointType, Any] = self.dict_battle_point[score_type]
+
+        # BASE_ATTACK_POINT
+        # 공격 점수 (서폿의 경우 버프 점수)
+        result = d[BattlePointType.BASE_ATTACK_POINT] * char.base_attack_point
+        if self.verbose:
+            print("공격 점수", result / Decimal(1000000))
+
+        # BASE_HEALTH_POINT
+        # 서폿 점수 계산할 때만 사용됨, 케어 점수
+        result2 = 0
+        if score_type == "defense":
+            result2 = d[BattlePointType.BASE_HEALTH_POINT] * char.base_health_point
+            if self.verbose:
+                print("케어 점수", result2 / Decimal(10000))
+
+        # LEVEL
+        try:
+            coeff = d[BattlePointType.LEVEL][str(char.character_level)]
+        except KeyError:
+            coeff = 0
+        result = self.apply(result, coeff, BattlePointType.LEVEL)
+
+        # WEAPON_QUALITY
+        try:
+            coeff = d[BattlePointType.WEAPON_QUALITY][str(char.weapon_quality)]
+        except KeyError:
+            coeff = 0
+        result = self.apply(result, coeff, BattlePointType.WEAPON_QUALITY)
+
+        # ARKPASSIVE_EVOLUTION
+        total_points = 0
+        for node in char.arkpassive_nodes["진화"]:
+            if node.tier == 1:  # 스탯에 투자한 포인트는 제외
+                continue
+
+            total_points += self.dict_arkpassive_point["진화"][node.name] * node.level
+
+        if total_points > char.arkpassive_available_points["진화"]:
+            raise ValueError("가진 포인트보다 많이 찍힌 상태입니다.")
+
+        coeff = d[BattlePointType.ARKPASSIVE_EVOLUTION] * total_points
+        result = self.apply(result, coeff, BattlePointType.ARKPASSIVE_EVOLUTION)
+
+        # ARKPASSIVE_ENLIGHTMENT
+        total_points = 0
+        for node in char.arkpassive_nodes["깨달음"]:
+            total_points += (
+                self.dict_arkpassive_point["깨달음"][char.character_class_name][
+                    node.name
+                ]
+                * node.level
+            )
+
+        if total_points > char.arkpassive_available_points["깨달음"]:
+            raise ValueError("가진 포인트보다 많이 찍힌 상태입니다.")
+
+        coeff = d[BattlePointType.ARKPASSIVE_ENLIGHTMENT] * total_points
+        result = self.apply(result, coeff, BattlePointType.ARKPASSIVE_ENLIGHTMENT)
+
+        # ARKPASSIVE_LEAP
+        total_points = 0
+        for node in char.arkpassive_nodes["도약"]:
+            total_points += (
+                self.dict_arkpassive_point["도약"][char.character_class_name][node.name]
+                * node.level
+            )
+
+        if total_points > char.arkpassive_available_points["도약"]:
+            raise ValueError("가진 포인트보다 많이 찍힌 상태입니다.")
+
+        coeff = d[BattlePointType.ARKPASSIVE_LEAP] * total_points
+        result = self.apply(result, coeff, BattlePointType.ARKPASSIVE_LEAP)
+
+        # KARMA_EVOLUTIONRANK
+        coeff = d[BattlePointType.KARMA_EVOLUTIONRANK] * char.karma["진화"][0]
+        result = self.apply(result, coeff, BattlePointType.KARMA_EVOLUTIONRANK)
+
+        # KARMA_LEAPLEVEL:
+        coeff = d.get(BattlePointType.KARMA_LEAPLEVEL, 0) * char.karma["도약"][1]
+        result = self.apply(result, coeff, BattlePointType.KARMA_LEAPLEVEL)
+
+        # ABILITY_ATTACK:
+        for engraving in char.engravings:
+            name, level = engraving.name, engraving.total_level
+            try:
+                coeff = d[BattlePointType.ABILITY_ATTACK][name][str(level)]
+            except KeyError:
+                coeff = None
+
+            result = self.apply(result, coeff, BattlePointType.ABILITY_ATTACK, name)
+
+        # ABILITY_DEFENSE:
+        for engraving in char.engravings:
+            name, level = engraving.name, engraving.total_level
+            try:
+                coeff = d[BattlePointType.ABILITY_DEFENSE][name][str(level)]
+            except KeyError:
+                coeff = None
+
+            result2 = self.apply(result2, coeff, BattlePointType.ABILITY_DEFENSE, name)
+
+        # ELIXIR_SET:
+        try:
+            coeff = d[BattlePointType.ELIXIR_SET][char.elixir_set]
+        except KeyError:
+            coeff = 0
+
+        result = self.apply(result, coeff, BattlePointType.ELIXIR_SET, char.elixir_set)
+
+        # ELIXIR_GRADE_ATTACK
+
+        for equipment in char.equipments:
+            if equipment.equipment_type not in EQUIPMENT_TYPE_ARMOR:
+                continue
+            for effect in equipment.elixir_effects:
+                coeff = self.find_by_str(effect, d[BattlePointType.ELIXIR_GRADE_ATTACK])
+                result = self.apply(
+                    result,
+                    coeff,
+                    BattlePointType.ELIXIR_GRADE_ATTACK,
+                    f"{equipment.name} - {effect}",
+                )
+
+        # ELIXIR_GRADE_DEFENSE
+
+        for equipment in char.equipments:
+            if equipment.equipment_type not in EQUIPMENT_TYPE_ARMOR:
+                continue
+            for effect in equipment.elixir_effects:
+                coeff = self.find_by_str(
+                    effect, d.get(BattlePointType.ELIXIR_GRADE_DEFENSE, {})
+                )
+                result2 = self.apply(
+                    result2,
+                    coeff,
+                    BattlePointType.ELIXIR_GRADE_DEFENSE,
+                    f"{equipment.name} - {effect}",
+                )
+
+        # ACCESSORY_GRINDING_ATTACK
+
+        for equipment in char.equipments:
+            if equipment.equipment_type not in EQUIPMENT_TYPE_ACCESSORY:
+                continue
+
+            for effect in equipment.grinding_effects:
+                coeff = self.find_by_regex(
+                    effect,
+                    d[BattlePointType.ACCESSORY_GRINDING_ATTACK],
+                )
+
+                if coeff:
+                    result = self.apply(
+                        result,
+                        coeff,
+                        BattlePointType.ACCESSORY_GRINDING_ATTACK,
+                        f"{equipment.name} - {effect}",
+                        base=8,
+                    )
+
+        # ACCESSORY_GRINDING_DEFENSE
+
+        for equipment in char.equipments:
+            if equipment.equipment_type not in EQUIPMENT_TYPE_ACCESSORY:
+                continue
+
+            for effect in equipment.grinding_effects:
+                coeff = self.find_by_regex(
+                    effect,
+                    d.get(BattlePointType.ACCESSORY_GRINDING_DEFENSE, {}),
+                )
+
+                if coeff:
+                    result2 = self.apply(
+                        result2,
+                        coeff,
+                        BattlePointType.ACCESSORY_GRINDING_DEFENSE,
+                        f"{equipment.name} - {effect}",
+                        base=8,
+                    )
+
+        # ACCESSORY_GRINDING_ADDONTYPE_ATTACK
+
+        for equipment in char.equipments:
+            if equipment.equipment_type not in EQUIPMENT_TYPE_ACCESSORY:
+                continue
+
+            for effect in equipment.grinding_effects:
+                coeff = self.find_by_str(
+                    effect,
+                    d[BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK],
+                )
+
+                if coeff:
+                    result = self.apply(
+                        result,
+                        coeff,
+                        BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK,
+                        f"{equipment.name} - {effect}",
+                    )
+
+        # BRACELET_STATTYPE
+
+        for equipment in char.equipments:
+            if equipment.equipment_type != EquipmentType.팔찌:
+                continue
+
+            for effect in equipment.bracelet_effects:
+                coeff = self.find_by_regex(
+                    effect,
+                    d[BattlePointType.BRACELET_STATTYPE],
+                )
+                if coeff:
+                    result = self.apply(
+                        result,
+                        coeff,
+                        BattlePointType.BRACELET_STATTYPE,
+                        f"{equipment.name} - {effect}",
+                        base=8,
+                    )
+
+        # BRACELET_ADDONTYPE_ATTACK
+
+        for equipment in char.equipments:
+            if equipment.equipment_type != EquipmentType.팔찌:
+                continue
+
+            for effect in equipment.bracelet_effects:
+                coeff = self.find_by_str(
+                    effect,
+                    d[BattlePointType.BRACELET_ADDONTYPE_ATTACK],
+                )
+                if coeff:
+                    result = self.apply(
+                        result,
+                        coeff,
+                        BattlePointType.BRACELET_ADDONTYPE_ATTACK,
+                        f"{equipment.name} - {effect}",
+                    )
+
+        # BRACELET_ADDONTYPE_DEFENSE
+
+        for equipment in char.equipments:
+            if equipment.equipment_type != EquipmentType.팔찌:
+                continue
+
+            for effect in equipment.bracelet_effects:
+                coeff = self.find_by_str(
+                    effect,
+                    d.get(BattlePointType.BRACELET_ADDONTYPE_DEFENSE, {}),
+                )
+                if coeff:
+                    result2 = self.apply(
+                        result2,
+                        coeff,
+                        BattlePointType.BRACELET_ADDONTYPE_DEFENSE,
+                        f"{equipment.name} - {effect}",
+                    )
+
+        # GEM
+        for gem in char.gems:
+            coeff = d[BattlePointType.GEM][str(gem.tier)][str(gem.level)]
+            result = self.apply(
+                result, coeff, BattlePointType.GEM, f"{gem.name} {gem.level}"
+            )
+
+        # transcendence_armor
+        total_transcendence_grade = 0
+        for equipment in char.equipments:
+            if equipment.transcendence_level:
+                total_transcendence_grade += equipment.transcendence_grade
+
+        coeff = d[BattlePointType.TRANSCENDENCE_ARMOR] * total_transcendence_grade
+        result = self.apply(result, coeff, BattlePointType.TRANSCENDENCE_ARMOR)
+
+        # transcendence_additional
+        target_equipment_type = d[BattlePointType.TRANSCENDENCE_ADDITIONAL].keys()
+
+        for equipment in char.equipments:
+            coeff = 0
+            if equipment.transcendence_grade is None:
+                continue
+
+            et = equipment.equipment_type
+            if et in target_equipment_type:
+                for target_grade, target_coeff in d[
+                    BattlePointType.TRANSCENDENCE_ADDITIONAL
+                ][et].items():
+                    if (
+                        equipment.transcendence_grade >= int(target_grade)
+                        and target_coeff > coeff
+                    ):
+                        coeff = target_coeff
+
+            result = self.apply(
+                result,
+                coeff,
+                BattlePointType.TRANSCENDENCE_ADDITIONAL,
+                f"{equipment.name} {equipment.transcendence_grade}",
+            )
+
+        # battle_stat
+        coeff = 0
+        for stat_type, value in char.battle_stat.items():
+            if stat_type in d[BattlePointType.BATTLESTAT]:
+                coeff += value * d[BattlePointType.BATTLESTAT][stat_type]
+
+        result = self.apply(
+            result,
+            coeff,
+            BattlePointType.BATTLESTAT,
+        )
+
+        # card_set
+        for card_set in char.card_sets:
+            try:
+                coeff = d[BattlePointType.CARD_SET][card_set]
+            except KeyError:
+                coeff = 0
+
+            result = self.apply(result, coeff, BattlePointType.CARD_SET, card_set)
+
+        # pet_specialty
+        try:
+            coeff = d[BattlePointType.PET_SPECIALTY]["추가 피해 1% 증가"]
+        except KeyError:
+            coeff = 0
+        result = self.apply(
+            result, coeff, BattlePointType.PET_SPECIALTY, "추가 피해 1% 증가"
+        )
+
+        real_combat_power = Decimal(char.combat_power.replace(",", ""))
+
+        if self.verbose:
+            print("실제 전투력:", real_combat_power)
+
+        if score_type == "attack":
+            if self.verbose:
+                print("계산 전투력:", result / Decimal(1000000))
+            final_result = result / Decimal(10000)
+        if score_type == "defense":
+            if self.verbose:
+                print("계산 버프 전투력:", result / Decimal(1000000))
+                print("계산 케어 전투력:", result2 / Decimal(10000))
+                print(
+                    "계산 전투력:", result / Decimal(1000000) + result2 / Decimal(10000)
+                )
+            final_result = result / Decimal(10000) + result2 / Decimal(100)
+
+        return round(final_result)
+
+    def calc_factors(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"] = "attack",
+    ) -> FactorChain:
+        """calc를 실행하면서 적용된 계수들을 FactorChain으로 기록합니다."""
+        d: dict[BattlePointType, Any] = self.dict_battle_point[score_type]
+        chain = FactorChain(
+            score_type=score_type,
+            base_attack_point=d[BattlePointType.BASE_ATTACK_POINT]
+            * char.base_attack_point,
+            base_health_point=d[BattlePointType.BASE_HEALTH_POINT]
+            * char.base_health_point
+            if score_type == "defense"
+            else 0,
+        )
+
+        self.trace = chain.factors
+        try:
+            self.calc(char, score_type)
+        finally:
+            self.trace = None
+
+        return chain
+
+    def try_get_coeff(self, str_in: str) -> int:
+        coeff = self.find_by_regex(
+            str_in,
+            self.dict_battle_point["attack"][BattlePointType.ACCESSORY_GRINDING_ATTACK],
+        )
+        if coeff:
+            return coeff
+
+        coeff = self.find_by_str(
+            str_in,
+            self.dict_battle_point["attack"][
+                BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK
+            ],
+        )
+        return coeff
+
+    def find_by_regex(self, str_in: str, dict_in: dict) -> int:
+        coeff = 0
+        for regex in dict_in:
+            matches = re.match(regex, str_in)
+            if not matches:
+                continue
+            value = Decimal(matches.group(1))
+            if str_in.endswith("%"):
+                value = int(value * 100)
+
+            coeff = dict_in[regex] * value
+
+        return coeff
+
+    def find_by_str(self, str_in: str, dict_in: dict) -> int:
+        return dict_in.get(str_in, 0)
@@ -1,9 +1,11 @@
-import json
 import re
+import sys
 from dataclasses import dataclass, field
-from enum import Enum, StrEnum
+from enum import IntEnum, StrEnum
 from typing import Any, Literal, TypeAlias
 
+from battlepoint import json_backend
+
 # HTML 태그 지우는 용도
 REGEX_TAG = re.compile(r"<[^>]+>")
 REGEX_IMAGE_TAG = re.compile(r"(?=<img[^>]*><\/img>)")
@@ -35,7 +37,7 @@ KARMA_NOT_OPEN = "미개방"
 REGEX_ARKPASSIVE_NODE = re.compile(r"(\d)티어 ([가-힣A-Z \.\?\!]+) Lv\.(\d+)$")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ArkPassiveNode:
     name: str  # 이름
     level: int  # 레벨 (1-5)
@@ -63,16 +65,27 @@ class EquipmentType(StrEnum):
         return obj
 
 
-class Grade(str, Enum):
-    유물 = "유물"
-    전설 = "전설"
+class Grade(IntEnum):
+    """OPENAPI의 등급, 값은 등급 순서"""
+
+    일반 = 0
+    고급 = 1
+    희귀 = 2
+    영웅 = 3
+    전설 = 4
+    유물 = 5
+    고대 = 6
+    에스더 = 7
 
+    def __str__(self) -> str:
+        return self.name
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Engraving:
     name: str
     ability_stone_level: int
-    grade: Grade
+    grade: Grade | str  # Grade에 없는 등급은 문자열 그대로
     level: int
 
     @property
@@ -89,6 +102,14 @@ class Engraving:
         return total_level
 
 
+# 서폿 각인에 해당하는 직업별 깨달음 노드, 이 노드를 찍었으면 서폿으로 판단
+SUPPORTER_ARKPASSIVE_NODE = {
+    "바드": "절실한 구원",
+    "홀리나이트": "축복의 오라",
+    "도화가": "만개",
+    "발키리": "해방자",
+}
+
 BattleStatType: TypeAlias = Literal["치명", "특화", "제압", "신속", "인내", "숙련"]
 VALID_BATTLE_STAT_TYPE = {"치명", "특화", "제압", "신속", "인내", "숙련"}
 
@@ -109,11 +130,33 @@ def split_equipment_effects(str_in: str, regex_split=REGEX_IMAGE_TAG) -> list[st
     ps. 연마 효과는 이미지가 보이진 않아도 greendot이라는 이미지로 분리 중
     """
     result = re.split(regex_split, str_in)
-    result = [clean(i) for i in result if i]
+    result = [sys.intern(clean(i)) for i in result if i]
     return result
 
 
-@dataclass
+def to_grade(str_in: str) -> Grade | str:
+    """
+    OPENAPI의 등급 문자열을 Grade로 변환합니다.
+    Grade에 없는 등급은 intern된 문자열 그대로 반환합니다.
+    """
+    try:
+        return Grade[str_in]
+    except KeyError:
+        return sys.intern(str_in)
+
+
+def to_equipment_type(str_in: str) -> EquipmentType | str:
+    """
+    OPENAPI의 장비 종류 문자열을 EquipmentType으로 변환합니다.
+    어빌리티 스톤처럼 EquipmentType에 없는 종류는 intern된 문자열 그대로 반환합니다.
+    """
+    try:
+        return EquipmentType(str_in)
+    except ValueError:
+        return sys.intern(str_in)
+
+
+@dataclass(slots=True)
 class Equipment:
     raw_data: dict | None = field(default=None, repr=False)
     name: str = ""
@@ -130,12 +173,12 @@ class Equipment:
 
     def __post_init__(self):
         if self.raw_data:
-            self.name = self.raw_data["Name"]
-            self.equipment_type = self.raw_data["Type"]
+            self.name = sys.intern(self.raw_data["Name"])
+            self.equipment_type = to_equipment_type(self.raw_data["Type"])
             self._parse_tooltip(self.raw_data["Tooltip"])
 
     def _parse_tooltip(self, str_tooltip: str):
-        tooltip: dict = json.loads(str_tooltip)
+        tooltip: dict = json_backend.loads(str_tooltip)
 
         for e in tooltip.values():
             if not e:  # null 제외
@@ -185,18 +228,21 @@ class Equipment:
                     for e2 in v["Element_000"]["contentStr"].values():
                         desc = clean(e2["contentStr"])
                         if matches := REGEX_ELIXIR_OPTION.match(desc):
-                            self.elixir_effects.append(matches.group(1))
+                            self.elixir_effects.append(sys.intern(matches.group(1)))
                         else:
                             raise RuntimeError("엘릭서 연성 효과 추출 실패", desc)
 
                 elif top_str.startswith("연성 추가 효과"):
                     if matches := REGEX_ELIXIR_SET.match(top_str):
-                        self.elixir_set = matches.group(1), int(matches.group(2))
+                        self.elixir_set = (
+                            sys.intern(matches.group(1)),
+                            int(matches.group(2)),
+                        )
                     else:
                         raise RuntimeError("엘릭서 연성 추가 효과 파싱 실패", top_str)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Gem:
     name: str
     tier: int
@@ -215,9 +261,32 @@ class CharacterInformation:
     karma: dict[Literal["진화", "깨달음", "도약"], tuple[int, int]]  # 랭크, 레벨
     battle_stat: dict[BattleStatType, int]
     equipments: list[Equipment]
-
-    def __init__(self, data: dict):
-        self._data = data
+    combat_power: str  # 실제 전투력 (ex. 2,541.23)
+    arkpassive_available_points: dict[Literal["진화", "깨달음", "도약"], int]
+
+    __slots__ = (
+        "_data",
+        "base_attack_point",
+        "base_health_point",
+        "character_level",
+        "character_class_name",
+        "engravings",
+        "card_sets",
+        "gems",
+        "arkpassive_nodes",
+        "karma",
+        "battle_stat",
+        "equipments",
+        "combat_power",
+        "arkpassive_available_points",
+    )
+
+    def __init__(self, data: dict, *, keep_raw: bool = True):
+        """
+        keep_raw가 False면 필요한 값을 모두 추출한 뒤 OPENAPI 응답(_data)과
+        장비의 raw_data(툴팁 문자열 포함)를 버려서 메모리를 아낍니다.
+        """
+        self._data = data if keep_raw else None
 
         #################
         # ArmoryProfile #
@@ -250,7 +319,14 @@ class CharacterInformation:
         """
         캐릭터의 직업
         """
-        self.character_class_name = data["ArmoryProfile"]["CharacterClassName"]
+        self.character_class_name = sys.intern(
+            data["ArmoryProfile"]["CharacterClassName"]
+        )
+
+        """
+        실제 전투력
+        """
+        self.combat_power = data["ArmoryProfile"]["CombatPower"]
 
         ###################
         # ArmoryEquipment #
@@ -262,6 +338,8 @@ class CharacterInformation:
 
         for equipment in data["ArmoryEquipment"]:
             obj_equipment = Equipment(raw_data=equipment)
+            if not keep_raw:
+                obj_equipment.raw_data = None
             self.equipments.append(obj_equipment)
 
         ###################
@@ -275,12 +353,12 @@ class CharacterInformation:
             for item in data["ArmoryEngraving"]["ArkPassiveEffects"]:
                 self.engravings.append(
                     Engraving(
-                        name=item["Name"],
+                        name=sys.intern(item["Name"]),
                         ability_stone_level=item["AbilityStoneLevel"]
                         if item["AbilityStoneLevel"] is not None
                         else 0,
                         level=item["Level"],
-                        grade=item["Grade"],
+                        grade=to_grade(item["Grade"]),
                     )
                 )
 
@@ -293,10 +371,10 @@ class CharacterInformation:
         ex) 세구빛 30각인 경우 30각 효과만 가져옴
         """
         self.card_sets: list[str] = []
-        armory_card = self._data["ArmoryCard"]
+        armory_card = data["ArmoryCard"]
         if armory_card is not None:
             for effect in armory_card["Effects"]:
-                self.card_sets.append(effect["Items"][-1]["Name"])
+                self.card_sets.append(sys.intern(effect["Items"][-1]["Name"]))
 
         #############
         # ArmoryGem #
@@ -310,8 +388,8 @@ class CharacterInformation:
             for gem in gem_list:
                 fullname = clean(gem["Name"])
                 if matches := REGEX_GEM.match(fullname):
-                    level = matches.group(1)
-                    name = matches.group(2)
+                    level = int(matches.group(1))
+                    name = sys.intern(matches.group(2))
                 else:
                     raise RuntimeError("보석 이름 파싱 실패")
 
@@ -342,7 +420,7 @@ class CharacterInformation:
             if matches := REGEX_ARKPASSIVE_NODE.search(desc):
                 tier, name, level = (
                     int(matches.group(1)),
-                    str(matches.group(2)),
+                    sys.intern(matches.group(2)),
                     int(matches.group(3)),
                 )
             else:
@@ -353,7 +431,7 @@ class CharacterInformation:
                     tier=tier,
                     level=level,
                     name=name,
-                    desc=desc,
+                    desc=sys.intern(desc),
                 )
             )
 
@@ -380,6 +458,18 @@ class CharacterInformation:
                 raise RuntimeError("카르마 파싱 실패")
             self.karma[karma_type] = rank, level
 
+        """
+        아크 패시브 종류별로 사용 가능한 포인트
+        {
+            진화: 140,
+        }
+        """
+        available_points = {}
+        if obj_arkpassive := data["ArkPassive"]:
+            for obj_point in obj_arkpassive["Points"]:
+                available_points[obj_point["Name"]] = obj_point["Value"]
+        self.arkpassive_available_points = available_points
+
     @property
     def weapon_quality(self) -> int | None:
         """무기 품질"""
@@ -387,6 +477,14 @@ class CharacterInformation:
             if equipment.equipment_type == EquipmentType.무기:
                 return equipment.quality
 
+    @property
+    def is_supporter(self) -> bool:
+        """서폿 각인에 해당하는 깨달음 노드를 찍었는지"""
+        node_name = SUPPORTER_ARKPASSIVE_NODE.get(self.character_class_name)
+        if node_name is None:
+            return False
+        return any(node.name == node_name for node in self.arkpassive_nodes["깨달음"])
+
     @property
     def elixir_set(self) -> str | None:
         """
@@ -400,14 +498,3 @@ class CharacterInformation:
                     return
                 return f"{es[0]} {es[1]}단계"
         return
-
-    @property
-    def arkpassive_available_points(
-        self,
-    ) -> dict[Literal["진화", "깨달음", "도약"], int]:
-        result = {}
-        if obj_arkpassive := self._data["ArkPassive"]:
-            for obj_point in obj_arkpassive["Points"]:
-                result[obj_point["Name"]] = obj_point["Value"]
-
-        return result
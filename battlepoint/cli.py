@@ -0,0 +1,339 @@
+"""
+$ python -m battlepoint score character_이름.json
+$ python -m battlepoint batch "character*.json" --out scores.ndjson --workers 4
+$ python -m battlepoint fetch 이름1 이름2 --jwt jwt.txt
+$ python -m battlepoint pack "character*.json" --out corpus.pack
+$ python -m battlepoint batch corpus.pack --out scores.ndjson
+$ python -m battlepoint unpack corpus.pack --out-dir characters
+
+하위 명령에 필요한 모듈은 그 명령을 실행할 때 import 합니다. (requests, 프로세스 풀 등)
+"""
+
+import argparse
+import sys
+
+
+def _score_type(char, score_type: str | None) -> str:
+    return score_type or ("defense" if char.is_supporter else "attack")
+
+
+def _charname(fname: str) -> str:
+    """character_이름.json, corpus.pack#이름 -> 이름"""
+    from battlepoint.pack import source_name
+
+    return source_name(fname)
+
+
+def cmd_score(args: argparse.Namespace) -> int:
+    from battlepoint.calculator import BattlePointCalculator
+    from battlepoint.snapshot import load_character
+
+    calculator = BattlePointCalculator()
+    calculator.verbose = args.verbose
+    for fname in args.files:
+        char = load_character(fname)
+        score = calculator.calc(char, _score_type(char, args.score_type))
+        print(f"{fname} {score / 100:,.2f}")
+    return 0
+
+
+# batch --max-error-rate를 확인하기 시작하는 처리 수
+MIN_RECORDS_FOR_ERROR_RATE = 100
+
+# batch --workers에서 프로세스마다 하나씩 만드는 calculator
+_calculator = None
+
+
+def _score_file(fname: str, score_type: str | None):
+    """
+    (계산 결과 dict, None), 실패하면 (quarantine.ErrorRecord, 원본 응답)
+    격리할 원본 응답은 작업자가 이미 읽은 것을 돌려줌 (읽기에 실패했으면 None)
+    """
+    global _calculator
+    from battlepoint.calculator import BattlePointCalculator
+    from battlepoint.pack import read_input, split_source
+    from battlepoint.quarantine import RECORD_ERRORS, ErrorRecord
+    from battlepoint.snapshot import SNAPSHOT_DIR, load_raw
+
+    if _calculator is None:
+        _calculator = BattlePointCalculator()
+    try:
+        raw = read_input(fname)
+    except RECORD_ERRORS as e:
+        return ErrorRecord.from_exception(_charname(fname), "read", e), None
+    try:
+        # json 파일만 스냅샷을 남김, pack 안의 캐릭터마다 파일을 만들지 않음
+        snapshot_dir = SNAPSHOT_DIR if split_source(fname) is None else None
+        char = load_raw(raw, snapshot_dir)
+    except RECORD_ERRORS as e:
+        return ErrorRecord.from_exception(_charname(fname), "parse", e), raw
+    try:
+        st = _score_type(char, score_type)
+        score = _calculator.calc(char, st)
+    except RECORD_ERRORS as e:
+        return ErrorRecord.from_exception(_charname(fname), "calc", e), raw
+    return {
+        "name": _charname(fname),
+        "class_name": char.character_class_name,
+        "score_type": st,
+        "score": score,
+        "combat_power": char.combat_power,
+    }, None
+
+
+def _score_files(fnames: list[str], score_type: str | None) -> list:
+    return [_score_file(fname, score_type) for fname in fnames]
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    import json
+
+    from battlepoint.pack import expand
+    from battlepoint.quarantine import ErrorCounters, ErrorRecord, Quarantine
+
+    fnames = expand(args.pattern)
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        from battlepoint.parallel import imap_batched
+
+        executor = ProcessPoolExecutor(args.workers)
+        records = imap_batched(
+            executor, _score_files, fnames, args.score_type, workers=args.workers
+        )
+    else:
+        executor = None
+        records = (_score_file(fname, args.score_type) for fname in fnames)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    quarantine = Quarantine(args.quarantine) if args.quarantine else None
+    counters = ErrorCounters()
+    try:
+        for record, raw in records:
+            if isinstance(record, ErrorRecord):
+                counters.fail(record.category)
+                if quarantine is not None:
+                    quarantine.put(record, raw)
+                record = record.to_dict()
+            else:
+                counters.ok()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            # 계수 파일이 맞지 않는 등 모든 캐릭터가 실패하는 경우는 끝까지 가지 않음
+            if (
+                args.max_error_rate is not None
+                and counters.total >= MIN_RECORDS_FOR_ERROR_RATE
+                and counters.error_rate > args.max_error_rate
+            ):
+                print(
+                    f"실패율이 {args.max_error_rate:.0%}를 넘어서 중단합니다.",
+                    file=sys.stderr,
+                )
+                break
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if quarantine is not None:
+            quarantine.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    print(counters.report(), file=sys.stderr)
+    return 1 if counters.failed else 0
+
+
+def cmd_fetch(args: argparse.Namespace) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+    from pathlib import Path
+
+    import requests
+
+    from battlepoint.api import API_BASE, create_session, fetch_armory
+    from battlepoint.pack import PackWriter
+    from battlepoint.projection import CHARACTER_FILTERS
+
+    charnames = list(args.charnames)
+    if args.charnames_file:
+        with open(args.charnames_file, "r", encoding="utf-8") as fp:
+            charnames += [line.strip() for line in fp if line.strip()]
+    try:
+        with open(args.jwt, "r") as fp:
+            jwt = fp.read().strip()
+    except FileNotFoundError:
+        jwt = None
+
+    api_base = args.api_base or API_BASE
+    filters = CHARACTER_FILTERS if args.needed_only else None
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    pack = PackWriter(args.pack) if args.pack else None
+
+    def fetch(charname: str) -> tuple[str, bytes | None]:
+        try:
+            raw = fetch_armory(session, charname, api_base, filters)
+        except requests.RequestException as e:
+            return f"실패: {e}", None
+        if raw.strip() == b"null":
+            return "캐릭터 정보 없음", None
+        if pack is None:
+            (out_dir / f"character_{charname}.json").write_bytes(raw)
+        return "저장", raw
+
+    failed = 0
+    try:
+        with (
+            create_session(jwt, args.concurrency) as session,
+            ThreadPoolExecutor(args.concurrency) as executor,
+        ):
+            for charname, (status, raw) in zip(
+                charnames, executor.map(fetch, charnames)
+            ):
+                failed += status != "저장"
+                if pack is not None and raw is not None:
+                    # PackWriter는 스레드 하나에서만 씀
+                    pack.append(charname, raw)
+                print(charname, status)
+    finally:
+        if pack is not None:
+            pack.close()
+    return 1 if failed else 0
+
+
+def cmd_pack(args: argparse.Namespace) -> int:
+    import glob
+    import os
+
+    from battlepoint.pack import PackWriter, name_key
+
+    with PackWriter(args.out, level=args.level) as writer:
+        # 같은 파일(이름, 수정 시각)을 다시 넣지 않음
+        packed = {(entry.key, entry.fetched_at) for entry in writer.entries}
+        raw_size = 0
+        for fname in sorted(glob.glob(args.pattern)):
+            name = _charname(fname)
+            fetched_at = os.stat(fname).st_mtime
+            if (name_key(name), fetched_at) in packed:
+                continue
+            with open(fname, "rb") as fp:
+                raw = fp.read()
+            writer.append(name, raw, fetched_at)
+            raw_size += len(raw)
+    size = os.path.getsize(args.out)
+    print(
+        f"{writer.appended}개 추가 ({raw_size / 1024**2:,.1f}MB), "
+        f"{args.out} {len(writer.entries)}개 {size / 1024**2:,.1f}MB"
+    )
+    return 0
+
+
+def cmd_unpack(args: argparse.Namespace) -> int:
+    from datetime import datetime
+    from pathlib import Path
+
+    from battlepoint.pack import Pack
+
+    at = datetime.fromisoformat(args.at).timestamp() if args.at else None
+    out_dir = Path(args.out_dir)
+    with Pack(args.pack) as pack:
+        if args.list:
+            for name, entry in pack.entries():
+                when = datetime.fromtimestamp(entry.fetched_at).isoformat(
+                    " ", "seconds"
+                )
+                print(
+                    f"{name:<12} {when} {entry.raw_size:>9,} -> {entry.stored_size:>9,}"
+                )
+            return 0
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if args.all:
+            targets = [
+                (f"character_{name}_{entry.fetched_at:.0f}.json", entry)
+                for name, entry in pack.entries()
+            ]
+        elif at is not None:
+            targets = []
+            for name in pack.latest():
+                try:
+                    targets.append((f"character_{name}.json", pack.find(name, at)))
+                except KeyError:
+                    continue
+        else:
+            targets = [
+                (f"character_{name}.json", entry)
+                for name, entry in pack.latest().items()
+            ]
+        for fname, entry in targets:
+            (out_dir / fname).write_bytes(pack.read_entry(entry))
+    print(f"{len(targets)}개 파일 저장")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="battlepoint", description="전투력 계산")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("score", help="파일마다 전투력 출력")
+    p.add_argument("files", nargs="+", help="OPENAPI 응답 json 파일")
+    p.add_argument("--score-type", choices=["attack", "defense"])
+    p.add_argument("--verbose", action="store_true", help="계수마다 증가량 출력")
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser("batch", help="여러 파일을 계산해서 ndjson으로 출력")
+    p.add_argument(
+        "pattern",
+        nargs="?",
+        default="character*.json",
+        help="json 파일 glob 또는 pack 파일 (캐릭터별 마지막 응답)",
+    )
+    p.add_argument("--out", help="ndjson 파일, 없으면 stdout")
+    p.add_argument("--workers", type=int, default=1, help="프로세스 수")
+    p.add_argument("--score-type", choices=["attack", "defense"])
+    p.add_argument(
+        "--quarantine", help="실패한 응답과 실패 기록(errors.ndjson)을 저장할 폴더"
+    )
+    p.add_argument(
+        "--max-error-rate",
+        type=float,
+        help=f"처음 {MIN_RECORDS_FOR_ERROR_RATE}개 이후 실패율이 이 값(0~1)을 넘으면 중단",
+    )
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("fetch", help="armory를 받아서 character_{이름}.json으로 저장")
+    p.add_argument("charnames", nargs="*")
+    p.add_argument("--charnames-file", help="한 줄에 하나씩 캐릭터 이름")
+    p.add_argument("--jwt", default="jwt.txt", help="JWT가 저장된 파일")
+    p.add_argument("--api-base", help="없으면 OPENAPI 주소")
+    p.add_argument("--out-dir", default=".")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument(
+        "--needed-only",
+        action="store_true",
+        help="계산에 필요한 항목만 요청 (스킬, 아바타, 수집품 등 제외)",
+    )
+    p.add_argument("--pack", help="json 파일 대신 이 pack 파일 끝에 추가")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("pack", help="json 파일들을 pack 파일 하나로 모음")
+    p.add_argument("pattern", nargs="?", default="character*.json")
+    p.add_argument("--out", required=True, help="pack 파일, 있으면 끝에 추가")
+    p.add_argument(
+        "--level", type=int, default=6, help="zlib 압축 수준, 0이면 압축 안 함"
+    )
+    p.set_defaults(func=cmd_pack)
+
+    p = sub.add_parser("unpack", help="pack 파일을 character_{이름}.json들로 풀기")
+    p.add_argument("pack")
+    p.add_argument("--out-dir", default=".")
+    p.add_argument("--all", action="store_true", help="받은 시각별로 모두 저장")
+    p.add_argument("--at", help="이 시각(ISO) 이전의 마지막 응답")
+    p.add_argument("--list", action="store_true", help="저장하지 않고 목록만 출력")
+    p.set_defaults(func=cmd_unpack)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,70 @@
+import json
+from typing import Any, Callable
+
+# bytes(또는 str)을 받아서 파이썬 객체로 바꿔주는 함수
+JsonDecoder = Callable[[bytes | str], Any]
+
+
+def _orjson() -> JsonDecoder:
+    import orjson
+
+    return orjson.loads
+
+
+def _msgspec() -> JsonDecoder:
+    import msgspec
+
+    return msgspec.json.decode
+
+
+def _stdlib() -> JsonDecoder:
+    return json.loads
+
+
+# 빠른 순서대로 나열, 설치되어 있지 않으면 다음 것을 사용
+BACKENDS: dict[str, Callable[[], JsonDecoder]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _stdlib,
+}
+
+
+def get_decoder(name: str | None = None) -> JsonDecoder:
+    """
+    이름에 해당하는 json 디코더를 반환합니다.
+    이름이 없으면 설치된 것 중 가장 빠른 디코더를 반환합니다.
+    """
+    if name is not None:
+        if name not in BACKENDS:
+            raise ValueError(f"지원하지 않는 json 백엔드입니다: {name}")
+        return BACKENDS[name]()
+
+    for factory in BACKENDS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+
+    raise RuntimeError("사용 가능한 json 백엔드가 없습니다.")
+
+
+def set_decoder(name: str | None = None) -> None:
+    """모듈 전체에서 사용할 json 디코더를 바꿉니다. (not thread-safe)"""
+    global loads, backend_name
+    loads = get_decoder(name)
+    backend_name = name or _find_name(loads)
+
+
+def _find_name(decoder: JsonDecoder) -> str:
+    for name, factory in BACKENDS.items():
+        try:
+            if factory() is decoder:
+                return name
+        except ImportError:
+            continue
+    return "unknown"
+
+
+# json_backend.loads(...)로 호출해야 set_decoder로 바꾼 디코더가 반영됨
+loads: JsonDecoder = get_decoder()
+backend_name: str = _find_name(loads)
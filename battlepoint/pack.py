@@ -0,0 +1,436 @@
+"""
+armory 응답 여러 개를 파일 하나에 모은 pack 파일
+
+character_*.json이 수십만 개가 되면 파싱 전에 디렉토리를 훑고 파일을 여는 데 시간이 대부분 듭니다.
+pack 파일은 압축한 응답을 끝에 이어 쓰기만 하고, 옆의 .idx 파일에 (이름, 받은 시각) 순서로
+정렬한 위치를 저장합니다. 읽을 때는 둘 다 mmap으로 열어서 인덱스를 이진 탐색하고
+해당 레코드만 압축을 풉니다. 같은 캐릭터를 여러 번 넣으면 받은 시각별로 모두 남습니다.
+
+corpus.pack
+    헤더      b"LBPK" 버전(1) 빈칸(3)
+    레코드    _RECORD(이름 길이, 플래그, 받은 시각, 저장 크기, 원본 크기, crc32) + 이름 + 응답
+corpus.pack.idx
+    헤더      _INDEX_HEADER(b"LBPI", 버전, 인덱스에 포함된 pack 크기, 항목 수)
+    항목      _ENTRY(이름 해시, 받은 시각, 레코드 위치, 저장 크기, 원본 크기), 정렬됨
+
+- 쓰는 프로그램은 하나만 있다고 가정, 중간에 끊겨서 반쯤 쓰인 마지막 레코드는 다음에 열 때 잘라냄
+- .idx가 없거나 pack이 더 커졌으면 레코드 헤더만 훑어서 다시 만듦 (응답은 읽지 않음)
+- level=0이면 압축하지 않고 저장하며 read_view로 복사 없이 mmap의 memoryview를 받을 수 있음
+
+다른 도구에서는 "corpus.pack" 패턴을 캐릭터별 마지막 응답 목록으로,
+"corpus.pack#이름"을 파일 이름처럼 사용합니다. (expand, read_input)
+"""
+
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple, Self
+
+PACK_MAGIC = b"LBPK"
+INDEX_MAGIC = b"LBPI"
+PACK_VERSION = 1
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+DEFAULT_LEVEL = 6
+
+FLAG_ZLIB = 1
+
+_PACK_HEADER = struct.Struct("<4sB3x")
+_RECORD = struct.Struct("<HBxdIII")
+_INDEX_HEADER = struct.Struct("<4sB3xQQ")
+_ENTRY = struct.Struct("<QdQII")
+_KEY = struct.Struct("<Q")
+_NAME_HINT = 64  # read_entry에서 레코드 헤더와 같이 읽는 이름 길이
+
+
+def name_key(name: str) -> int:
+    """인덱스 정렬 기준, 충돌하면 레코드의 이름으로 구분"""
+    return int.from_bytes(
+        hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class PackEntry(NamedTuple):
+    key: int
+    fetched_at: float
+    offset: int
+    stored_size: int
+    raw_size: int
+
+
+def _scan(buf, start: int, end: int) -> tuple[list[PackEntry], int]:
+    """
+    start부터 레코드 헤더만 읽어서 인덱스 항목을 만듦
+    (항목들, 마지막으로 온전한 레코드의 끝 위치)
+    """
+    entries = []
+    pos = start
+    while pos + _RECORD.size <= end:
+        name_size, _, fetched_at, stored_size, raw_size, _ = _RECORD.unpack_from(
+            buf, pos
+        )
+        record_end = pos + _RECORD.size + name_size + stored_size
+        if record_end > end:
+            break
+        name_start = pos + _RECORD.size
+        name = bytes(buf[name_start : name_start + name_size]).decode("utf-8")
+        entries.append(
+            PackEntry(name_key(name), fetched_at, pos, stored_size, raw_size)
+        )
+        pos = record_end
+    return entries, pos
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _read_index(path: Path, pack_size: int) -> tuple[list[PackEntry], int] | None:
+    """(항목들, 인덱스에 포함된 pack 크기), 없거나 맞지 않으면 None"""
+    try:
+        with open(_index_path(path), "rb") as fp:
+            data = fp.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < _INDEX_HEADER.size:
+        return None
+    magic, version, covered, count = _INDEX_HEADER.unpack_from(data)
+    if (
+        magic != INDEX_MAGIC
+        or version != PACK_VERSION
+        or covered > pack_size
+        or len(data) != _INDEX_HEADER.size + count * _ENTRY.size
+    ):
+        return None
+    entries = [PackEntry(*e) for e in _ENTRY.iter_unpack(data[_INDEX_HEADER.size :])]
+    return entries, covered
+
+
+def _index_bytes(entries: list[PackEntry], covered: int) -> bytes:
+    entries.sort()
+    data = bytearray(_INDEX_HEADER.size + len(entries) * _ENTRY.size)
+    _INDEX_HEADER.pack_into(data, 0, INDEX_MAGIC, PACK_VERSION, covered, len(entries))
+    for i, entry in enumerate(entries):
+        _ENTRY.pack_into(data, _INDEX_HEADER.size + i * _ENTRY.size, *entry)
+    return bytes(data)
+
+
+def _write_index(path: Path, data: bytes):
+    index_path = _index_path(path)
+    tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as fp:
+        fp.write(data)
+    os.replace(tmp_path, index_path)
+
+
+def _load_entries(path: Path, buf, size: int) -> tuple[list[PackEntry], int]:
+    """인덱스와, 인덱스 이후에 추가된 레코드의 항목, 온전한 레코드의 끝 위치"""
+    index = _read_index(path, size)
+    if index is None:
+        entries, covered = [], _PACK_HEADER.size
+    else:
+        entries, covered = index
+    new_entries, end = _scan(buf, covered, size)
+    return entries + new_entries, end
+
+
+class PackWriter:
+    """
+    pack 파일 끝에 응답을 추가, 닫을 때 인덱스를 다시 씀
+    with PackWriter("corpus.pack") as writer:
+        writer.append("이름", raw, fetched_at)
+    """
+
+    def __init__(self, path: str | Path, level: int = DEFAULT_LEVEL):
+        self.path = Path(path)
+        self.level = level
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            with open(self.path, "wb") as fp:
+                fp.write(_PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION))
+            self.entries, end = [], _PACK_HEADER.size
+        else:
+            with open(self.path, "rb") as fp:
+                data = fp.read(_PACK_HEADER.size)
+                _check_header(self.path, data)
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self.entries, end = _load_entries(self.path, mm, len(mm))
+        self.fp = open(self.path, "r+b")
+        # 중간에 끊겨서 반쯤 쓰인 레코드
+        self.fp.truncate(end)
+        self.fp.seek(end)
+        self.appended = 0
+
+    def append(self, name: str, raw: bytes, fetched_at: float | None = None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        encoded = name.encode("utf-8")
+        if self.level > 0:
+            stored, flags = zlib.compress(raw, self.level), FLAG_ZLIB
+        else:
+            stored, flags = raw, 0
+        offset = self.fp.tell()
+        self.fp.write(
+            _RECORD.pack(
+                len(encoded), flags, fetched_at, len(stored), len(raw), zlib.crc32(raw)
+            )
+        )
+        self.fp.write(encoded)
+        self.fp.write(stored)
+        self.entries.append(
+            PackEntry(name_key(name), fetched_at, offset, len(stored), len(raw))
+        )
+        self.appended += 1
+
+    def close(self):
+        self.fp.flush()
+        end = self.fp.tell()
+        self.fp.close()
+        _write_index(self.path, _index_bytes(self.entries, end))
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path: Path, data: bytes):
+    if len(data) < _PACK_HEADER.size:
+        raise ValueError(f"pack 파일이 아닙니다: {path}")
+    magic, version = _PACK_HEADER.unpack_from(data)
+    if magic != PACK_MAGIC:
+        raise ValueError(f"pack 파일이 아닙니다: {path}")
+    if version != PACK_VERSION:
+        raise ValueError(f"지원하지 않는 pack 버전입니다: {version}")
+
+
+class Pack:
+    """
+    pack 파일 읽기, 인덱스도 mmap으로 열어서 항목을 파이썬 객체로 올리지 않고 이진 탐색
+    인덱스가 없거나 오래됐으면 새로 만들어서 저장 (쓸 수 없으면 메모리에만)
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._fp = open(self.path, "rb")
+        _check_header(self.path, self._fp.read(_PACK_HEADER.size))
+        self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_fp = None
+        self._index = self._open_index()
+        self._count = _INDEX_HEADER.unpack_from(self._index)[3]
+
+    def _open_index(self):
+        index_path = _index_path(self.path)
+        try:
+            self._index_fp = open(index_path, "rb")
+        except FileNotFoundError:
+            pass
+        else:
+            header = self._index_fp.read(_INDEX_HEADER.size)
+            if len(header) == _INDEX_HEADER.size:
+                magic, version, covered, count = _INDEX_HEADER.unpack(header)
+                if (
+                    magic == INDEX_MAGIC
+                    and version == PACK_VERSION
+                    and covered == len(self._mm)
+                    and os.fstat(self._index_fp.fileno()).st_size
+                    == _INDEX_HEADER.size + count * _ENTRY.size
+                ):
+                    return mmap.mmap(
+                        self._index_fp.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+            self._index_fp.close()
+            self._index_fp = None
+
+        # 인덱스 이후에 추가된 레코드가 있음
+        entries, end = _load_entries(self.path, self._mm, len(self._mm))
+        data = _index_bytes(entries, end)
+        try:
+            _write_index(self.path, data)
+        except OSError:
+            pass
+        return data
+
+    def close(self):
+        if isinstance(self._index, mmap.mmap):
+            self._index.close()
+        if self._index_fp is not None:
+            self._index_fp.close()
+        self._mm.close()
+        self._fp.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, i: int) -> PackEntry:
+        return PackEntry(
+            *_ENTRY.unpack_from(self._index, _INDEX_HEADER.size + i * _ENTRY.size)
+        )
+
+    def _key(self, i: int) -> int:
+        return _KEY.unpack_from(self._index, _INDEX_HEADER.size + i * _ENTRY.size)[0]
+
+    def _lower_bound(self, key: int) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        # 캐시에 없는 레코드를 mmap으로 읽으면 페이지마다 읽기가 생기고 주변까지 미리 읽으므로
+        # pread가 있으면 필요한 범위를 읽기 한 번으로 가져옴
+        if hasattr(os, "pread"):
+            return os.pread(self._fp.fileno(), size, offset)
+        return self._mm[offset : offset + size]
+
+    def _name_at(self, offset: int) -> str:
+        data = self._read_at(offset, _RECORD.size + _NAME_HINT)
+        name_size = _RECORD.unpack_from(data)[0]
+        if name_size > _NAME_HINT:
+            data = self._read_at(offset, _RECORD.size + name_size)
+        return data[_RECORD.size : _RECORD.size + name_size].decode("utf-8")
+
+    def versions(self, name: str) -> list[PackEntry]:
+        """name의 레코드들, 받은 시각 순서"""
+        key = name_key(name)
+        versions = []
+        i = self._lower_bound(key)
+        while i < self._count and self._key(i) == key:
+            entry = self._entry(i)
+            if self._name_at(entry.offset) == name:
+                versions.append(entry)
+            i += 1
+        return versions
+
+    def find(self, name: str, at: float | None = None) -> PackEntry:
+        """at 이전에 받은 마지막 레코드, at이 없으면 가장 최근 레코드"""
+        versions = self.versions(name)
+        if at is not None:
+            versions = [entry for entry in versions if entry.fetched_at <= at]
+        if not versions:
+            raise KeyError(name)
+        return versions[-1]
+
+    def __contains__(self, name: str) -> bool:
+        return bool(self.versions(name))
+
+    def _payload(self, entry: PackEntry) -> tuple[memoryview, int]:
+        name_size, flags, *_ = _RECORD.unpack_from(self._mm, entry.offset)
+        start = entry.offset + _RECORD.size + name_size
+        return memoryview(self._mm)[start : start + entry.stored_size], flags
+
+    def read_view(self, entry: PackEntry) -> memoryview:
+        """압축하지 않고 저장한 레코드의 응답, mmap을 그대로 가리킴"""
+        view, flags = self._payload(entry)
+        if flags & FLAG_ZLIB:
+            raise ValueError("압축된 레코드는 read_view로 읽을 수 없습니다.")
+        return view
+
+    def read_entry(self, entry: PackEntry) -> bytes:
+        # 레코드 하나를 읽기 한 번으로 가져옴 (이름이 _NAME_HINT보다 길면 다시 읽음)
+        data = self._read_at(
+            entry.offset, _RECORD.size + _NAME_HINT + entry.stored_size
+        )
+        name_size, flags, _, _, _, crc = _RECORD.unpack_from(data)
+        start = _RECORD.size + name_size
+        if start + entry.stored_size > len(data):
+            data = self._read_at(entry.offset, start + entry.stored_size)
+        payload = memoryview(data)[start : start + entry.stored_size]
+        raw = zlib.decompress(payload) if flags & FLAG_ZLIB else bytes(payload)
+        if zlib.crc32(raw) != crc:
+            raise ValueError(f"손상된 레코드입니다: {entry.offset}")
+        return raw
+
+    def read(self, name: str, at: float | None = None) -> bytes:
+        return self.read_entry(self.find(name, at))
+
+    def entries(self) -> Iterator[tuple[str, PackEntry]]:
+        """모든 레코드, 인덱스 순서 (같은 캐릭터는 받은 시각 순서로 붙어 있음)"""
+        for i in range(self._count):
+            entry = self._entry(i)
+            yield self._name_at(entry.offset), entry
+
+    def latest(self) -> dict[str, PackEntry]:
+        """캐릭터별 가장 최근 레코드, 이름 순서"""
+        latest: dict[str, PackEntry] = {}
+        for name, entry in self.entries():
+            previous = latest.get(name)
+            if previous is None or previous.fetched_at <= entry.fetched_at:
+                latest[name] = entry
+        return dict(sorted(latest.items()))
+
+
+# 다른 도구에서 파일 이름처럼 쓰는 "pack#이름"
+
+SOURCE_SEPARATOR = "#"
+
+# 프로세스마다 열어둔 pack
+_open_packs: dict[str, Pack] = {}
+
+
+def open_pack(path: str | Path) -> Pack:
+    """같은 프로세스에서는 한 번만 열어서 재사용"""
+    pack = _open_packs.get(path)
+    if pack is None:
+        key = os.path.abspath(path)
+        pack = _open_packs.get(key)
+        if pack is None:
+            pack = _open_packs[key] = Pack(path)
+        _open_packs[path] = pack
+    return pack
+
+
+def split_source(source: str) -> tuple[str, str] | None:
+    """ "corpus.pack#이름" -> ("corpus.pack", "이름"), pack 안의 캐릭터가 아니면 None"""
+    path, sep, name = source.partition(PACK_SUFFIX + SOURCE_SEPARATOR)
+    if not sep:
+        return None
+    return path + PACK_SUFFIX, name
+
+
+def expand(pattern: str) -> list[str]:
+    """
+    glob 패턴을 파일 목록으로, .pack 파일은 캐릭터별 가장 최근 응답 목록("corpus.pack#이름")으로
+    """
+    sources = []
+    for fname in sorted(glob.glob(pattern)):
+        if fname.endswith(PACK_SUFFIX):
+            sources += [
+                f"{fname}{SOURCE_SEPARATOR}{name}" for name in open_pack(fname).latest()
+            ]
+        else:
+            sources.append(fname)
+    return sources
+
+
+def read_input(source: str) -> bytes:
+    """파일 이름 또는 "corpus.pack#이름"의 응답"""
+    split = split_source(source)
+    if split is None:
+        with open(source, "rb") as fp:
+            return fp.read()
+    path, name = split
+    return open_pack(path).read(name)
+
+
+def source_name(source: str) -> str:
+    """character_이름.json, corpus.pack#이름 -> 이름"""
+    split = split_source(source)
+    if split is not None:
+        return split[1]
+    return Path(source).stem.removeprefix("character_")
@@ -0,0 +1,38 @@
+"""
+프로세스 풀에 파일 목록을 나눠 보내고 결과를 입력 순서대로 받기
+
+executor.map은 처음에 모든 입력을 제출하므로 파일이 수십만 개면 future와 끝난 결과가
+결과를 쓰는 속도와 관계없이 메모리에 쌓입니다.
+여기서는 batch_size개씩 묶어서 보내고, 작업자마다 SUBMITS_PER_WORKER 묶음까지만 미리 보낸 뒤
+앞에서부터 결과를 하나 받을 때마다 하나씩 더 보냅니다.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Executor
+from typing import Any
+
+BATCH_SIZE = 16
+SUBMITS_PER_WORKER = 4
+
+
+def imap_batched(
+    executor: Executor,
+    fn: Callable[..., list],
+    items: Sequence,
+    *args: Any,
+    workers: int,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator:
+    """
+    fn(items[i : i + batch_size], *args)를 작업자에게 보내고 결과 list를 이어서 하나씩 반환
+    fn은 작업자 프로세스로 보낼 수 있는 모듈 수준 함수여야 함
+    """
+    window = workers * SUBMITS_PER_WORKER
+    pending = deque()
+    for i in range(0, len(items), batch_size):
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+        pending.append(executor.submit(fn, items[i : i + batch_size], *args))
+    while pending:
+        yield from pending.popleft().result()
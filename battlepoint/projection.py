@@ -0,0 +1,206 @@
+"""
+armory 응답에서 필요한 최상위 항목만 디코딩
+
+CharacterInformation은 ArmoryProfile, ArmoryEquipment, ArmoryEngraving, ArmoryCard,
+ArmoryGem, ArkPassive만 읽지만 응답의 대부분은 ArmorySkills, Collectibles, ArmoryAvatars입니다.
+필요한 항목의 위치만 찾고 나머지는 파이썬 객체를 만들지 않고 건너뛴 뒤,
+필요한 부분만 모아서 json_backend로 디코딩합니다.
+
+위치는 두 가지 방법으로 찾습니다.
+1. 알려진 최상위 키("ArmorySkills": 등)를 bytes.find로 찾고 다음 키 직전까지를 값으로 봄
+   문자열 안의 따옴표는 항상 \"로 이스케이프되므로 "키": 형태는 실제 키에서만 나옴
+2. 1이 실패하면 (키가 없거나, 범위가 틀려서 디코딩 실패)
+   최상위 객체를 바이트 단위로 훑으면서 괄호 깊이를 셈
+"""
+
+import re
+
+from battlepoint import json_backend
+
+# CharacterInformation이 읽는 항목
+CHARACTER_SECTIONS = (
+    "ArmoryProfile",
+    "ArmoryEquipment",
+    "ArmoryEngraving",
+    "ArmoryCard",
+    "ArmoryGem",
+    "ArkPassive",
+)
+
+# /armories/characters/{characterName}?filters= 에 넣는 이름
+ARMORY_FILTERS = {
+    "ArmoryProfile": "profiles",
+    "ArmoryEquipment": "equipment",
+    "ArmoryAvatars": "avatars",
+    "ArmorySkills": "combat-skills",
+    "ArmoryEngraving": "engravings",
+    "ArmoryCard": "cards",
+    "ArmoryGem": "gems",
+    "ColosseumInfo": "colosseums",
+    "Collectibles": "collectibles",
+    "ArkPassive": "arkpassive",
+}
+
+# ex. profiles+equipment+engravings+cards+gems+arkpassive
+CHARACTER_FILTERS = "+".join(ARMORY_FILTERS[s] for s in CHARACTER_SECTIONS)
+
+_WS = re.compile(rb"[ \t\r\n]*")
+# 여는 따옴표 다음부터 닫는 따옴표까지, 이스케이프 포함
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# 객체/배열 안에서 깊이나 문자열에 영향을 주는 문자
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_SCALAR = re.compile(rb"[^,}\]\s]+")
+
+_QUOTE, _LBRACE, _RBRACE, _LBRACKET, _RBRACKET = b'"{}[]'
+
+
+def _skip_string(raw: bytes, pos: int) -> int:
+    """raw[pos]가 여는 따옴표일 때 닫는 따옴표 다음 위치"""
+    m = _STRING_BODY.match(raw, pos + 1)
+    if m is None:
+        raise ValueError(f"끝나지 않은 문자열입니다: {pos}")
+    return m.end()
+
+
+def _skip_value(raw: bytes, pos: int) -> int:
+    """raw[pos]에서 시작하는 값 하나의 끝 위치, 객체/배열은 괄호 깊이만 셈"""
+    c = raw[pos]
+    if c == _QUOTE:
+        return _skip_string(raw, pos)
+    if c != _LBRACE and c != _LBRACKET:
+        m = _SCALAR.match(raw, pos)
+        if m is None:
+            raise ValueError(f"잘못된 json 값입니다: {pos}")
+        return m.end()
+
+    depth = 0
+    while True:
+        m = _STRUCTURAL.search(raw, pos)
+        if m is None:
+            raise ValueError(f"끝나지 않은 객체입니다: {pos}")
+        c = raw[m.start()]
+        if c == _QUOTE:
+            pos = _skip_string(raw, m.start())
+            continue
+        depth += 1 if c == _LBRACE or c == _LBRACKET else -1
+        pos = m.end()
+        if depth == 0:
+            return pos
+
+
+def section_spans(
+    raw: bytes, sections: tuple[str, ...] = CHARACTER_SECTIONS
+) -> dict[str, tuple[int, int]] | None:
+    """
+    최상위 객체에서 sections에 해당하는 값의 (시작, 끝) 위치
+    최상위가 객체가 아니면 (ex. 없는 캐릭터의 null 응답) None
+    """
+    wanted = set(sections)
+    spans: dict[str, tuple[int, int]] = {}
+    pos = _WS.match(raw).end()
+    if raw[pos : pos + 1] != b"{":
+        return None
+    pos = _WS.match(raw, pos + 1).end()
+
+    while pos < len(raw) and raw[pos] != _RBRACE:
+        if raw[pos] != _QUOTE:
+            raise ValueError(f"키가 와야 합니다: {pos}")
+        key_end = _skip_string(raw, pos)
+        key = raw[pos + 1 : key_end - 1].decode()
+        pos = _WS.match(raw, key_end).end()
+        if raw[pos] != ord(":"):
+            raise ValueError(f"':'가 와야 합니다: {pos}")
+        pos = _WS.match(raw, pos + 1).end()
+
+        end = _skip_value(raw, pos)
+        if key in wanted:
+            spans[key] = pos, end
+            if len(spans) == len(wanted):
+                break
+        pos = _WS.match(raw, end).end()
+        if raw[pos : pos + 1] == b",":
+            pos = _WS.match(raw, pos + 1).end()
+
+    return spans
+
+
+def _find_key(raw: bytes, key: bytes, pos: int) -> tuple[int, int]:
+    """pos 이후 처음 나오는 "key": 의 (따옴표 위치, 값 시작 위치), 없으면 (-1, -1)"""
+    needle = b'"' + key + b'"'
+    while (found := raw.find(needle, pos)) >= 0:
+        pos = _WS.match(raw, found + len(needle)).end()
+        if raw[pos : pos + 1] == b":":
+            return found, _WS.match(raw, pos + 1).end()
+    return -1, -1
+
+
+def known_key_spans(
+    raw: bytes, sections: tuple[str, ...] = CHARACTER_SECTIONS
+) -> dict[str, tuple[int, int]] | None:
+    """
+    ARMORY_FILTERS에 있는 최상위 키들의 위치로 값의 범위를 정함, sections 중 하나라도 없으면 None
+    키는 응답에 나오는 순서대로 앞의 키 다음부터 찾으므로 전체를 대략 한 번만 훑습니다.
+    하위 객체에 같은 이름의 키가 있으면 범위가 값 하나가 아니게 되므로 디코딩할 때 실패하고,
+    모르는 최상위 키는 앞 항목의 범위에 ,"키": 값 형태로 붙으므로 디코딩한 뒤 버립니다.
+    """
+    starts = []
+    pos = 0
+    for key in ARMORY_FILTERS:
+        found, value_start = _find_key(raw, key.encode(), pos)
+        if found < 0:
+            # 순서가 다른 응답
+            found, value_start = _find_key(raw, key.encode(), 0)
+        if found < 0:
+            if key in sections:
+                return None
+            continue
+        starts.append((found, value_start, key))
+        pos = value_start
+    starts.sort()
+
+    end_of_object = raw.rfind(b"}")
+    spans = {}
+    for i, (_, value_start, key) in enumerate(starts):
+        if key not in sections:
+            continue
+        end = starts[i + 1][0] if i + 1 < len(starts) else end_of_object
+        # 다음 키 앞의 ','와 공백은 값이 아님
+        end = value_start + len(raw[value_start:end].rstrip(b" \t\r\n,"))
+        spans[key] = value_start, end
+    return spans
+
+
+def _join(raw: bytes, spans: dict[str, tuple[int, int]]) -> bytes:
+    parts = [
+        b'"' + key.encode() + b'":' + raw[start:end]
+        for key, (start, end) in spans.items()
+    ]
+    return b"{" + b",".join(parts) + b"}"
+
+
+def project(raw: bytes, sections: tuple[str, ...] = CHARACTER_SECTIONS) -> bytes:
+    """sections에 해당하는 항목만 남긴 json 바이트, 최상위가 객체가 아니면 raw 그대로"""
+    try:
+        spans = section_spans(raw, sections)
+    except IndexError as e:
+        raise ValueError("json이 중간에 끝났습니다.") from e
+    if spans is None:
+        return raw
+    return _join(raw, spans)
+
+
+def loads(raw: bytes, sections: tuple[str, ...] = CHARACTER_SECTIONS):
+    """json_backend.loads(raw)와 같지만 sections에 해당하는 최상위 항목만 디코딩"""
+    spans = known_key_spans(raw, sections) if raw[:1] == b"{" else None
+    if spans is not None:
+        try:
+            data = json_backend.loads(_join(raw, spans))
+        except ValueError:
+            # 범위가 틀림, 바이트 단위로 다시 훑음
+            spans = None
+    if spans is None:
+        return json_backend.loads(project(raw, sections))
+
+    if len(data) > len(spans):
+        data = {key: data[key] for key in spans}
+    return data
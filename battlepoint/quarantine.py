@@ -0,0 +1,134 @@
+"""
+배치 작업에서 실패한 캐릭터 격리
+
+이상한 툴팁 하나 때문에 몇 시간짜리 배치가 멈추지 않도록, 캐릭터마다 실패를 분류해서
+기록하고 원본 응답은 격리 폴더에 따로 저장한 뒤 다음 캐릭터로 넘어갑니다.
+
+quarantine/
+    errors.ndjson       실패 기록 (한 줄에 하나, 계속 이어 씀)
+    {이름}.json         실패한 원본 응답
+"""
+
+import json
+import re
+import time
+import traceback
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Literal
+
+# 캐릭터 하나의 실패로 보고 배치를 계속 진행하는 예외
+# 파싱: RuntimeError(툴팁 추출 실패), KeyError/TypeError/IndexError(응답 형식 변경), ValueError(json)
+# 계산: ValueError(포인트 초과), KeyError(계수 표에 없는 값)
+RECORD_ERRORS = (
+    OSError,
+    RuntimeError,
+    ValueError,
+    KeyError,
+    TypeError,
+    IndexError,
+    AttributeError,
+    ArithmeticError,
+)
+
+Stage = Literal["read", "parse", "calc"]
+
+# 분류할 때 메시지에서 지우는 부분 (숫자, ':' 뒤의 툴팁 내용)
+REGEX_NUMBER = re.compile(r"\d+")
+
+
+def classify(stage: Stage, e: BaseException) -> str:
+    """
+    같은 원인의 실패가 같은 문자열이 되도록 분류
+    ex) parse/RuntimeError: 아크 패시브 노드 파싱 실패
+        calc/KeyError: 'N'
+    """
+    message = str(e).split(":", 1)[0].strip()
+    message = REGEX_NUMBER.sub("N", message)[:80]
+    return f"{stage}/{type(e).__name__}: {message}"
+
+
+@dataclass
+class ErrorRecord:
+    name: str
+    stage: Stage
+    error_type: str
+    message: str
+    category: str  # classify 결과
+    where: str  # 예외가 난 위치 (파일:줄 함수)
+    failed_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_exception(cls, name: str, stage: Stage, e: BaseException) -> "ErrorRecord":
+        frames = traceback.extract_tb(e.__traceback__)
+        where = ""
+        if frames:
+            frame = frames[-1]
+            where = f"{Path(frame.filename).name}:{frame.lineno} {frame.name}"
+        return cls(
+            name=name,
+            stage=stage,
+            error_type=type(e).__name__,
+            message=str(e),
+            category=classify(stage, e),
+            where=where,
+        )
+
+    def to_dict(self) -> dict:
+        """배치 결과 한 줄, error 필드는 기존 형식 ("타입: 메시지")"""
+        return {
+            "name": self.name,
+            "error": f"{self.error_type}: {self.message}",
+            "stage": self.stage,
+            "category": self.category,
+            "where": self.where,
+        }
+
+
+class ErrorCounters:
+    """처리한 수, 실패 수, 분류별 실패 수"""
+
+    def __init__(self):
+        self.total = 0
+        self.failed = 0
+        self.by_category: Counter[str] = Counter()
+
+    def ok(self):
+        self.total += 1
+
+    def fail(self, category: str):
+        self.total += 1
+        self.failed += 1
+        self.by_category[category] += 1
+
+    @property
+    def error_rate(self) -> float:
+        return self.failed / self.total if self.total else 0.0
+
+    def report(self, top: int = 10) -> str:
+        lines = [f"{self.total:,}개 중 {self.failed:,}개 실패 ({self.error_rate:.2%})"]
+        for category, count in self.by_category.most_common(top):
+            lines.append(f"  {count:>7,} {category}")
+        if len(self.by_category) > top:
+            lines.append(f"  ... 외 {len(self.by_category) - top}가지")
+        return "\n".join(lines)
+
+
+class Quarantine:
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._errors = open(self.directory / "errors.ndjson", "a", encoding="utf-8")
+
+    def put(self, record: ErrorRecord, raw: bytes | None = None):
+        """실패 기록을 남기고, 원본 응답이 있으면 {이름}.json으로 저장"""
+        if raw is not None:
+            # 이름에 경로 구분자가 들어가도 격리 폴더 밖에 쓰지 않게 함
+            fname = record.name.replace("/", "_").replace("\\", "_")
+            (self.directory / f"{fname}.json").write_bytes(raw)
+        self._errors.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+        self._errors.flush()
+
+    def close(self):
+        self._errors.close()
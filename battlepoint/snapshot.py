@@ -0,0 +1,201 @@
+import hashlib
+import marshal
+import os
+from pathlib import Path
+
+from battlepoint import projection
+from battlepoint.character import (
+    ArkPassiveNode,
+    CharacterInformation,
+    Engraving,
+    Equipment,
+    Gem,
+    to_equipment_type,
+    to_grade,
+)
+
+# 파싱이 끝난 CharacterInformation을 저장하는 바이너리 스냅샷
+# 형식이 바뀌면 SNAPSHOT_VERSION을 올려서 기존 스냅샷을 무시하게 함
+SNAPSHOT_MAGIC = b"LBPS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = ".snapshot"
+
+
+def content_hash(raw: bytes) -> str:
+    """원본 json 파일 내용의 해시, 스냅샷 파일 이름으로 사용"""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def dumps(char: CharacterInformation) -> bytes:
+    """
+    CharacterInformation에서 계산에 필요한 필드만 tuple로 만들어 marshal로 직렬화합니다.
+    marshal은 intern된 문자열을 intern된 상태로 복원하므로 중복 문자열도 다시 공유됩니다.
+    """
+    equipments = tuple(
+        (
+            e.name,
+            str(e.equipment_type),
+            e.quality,
+            tuple(e.base_effects),
+            tuple(e.additional_effects),
+            tuple(e.grinding_effects),
+            tuple(e.bracelet_effects),
+            e.transcendence_level,
+            e.transcendence_grade,
+            tuple(e.elixir_effects),
+            e.elixir_set,
+        )
+        for e in char.equipments
+    )
+    engravings = tuple(
+        (e.name, e.ability_stone_level, str(e.grade), e.level) for e in char.engravings
+    )
+    gems = tuple((g.name, g.tier, g.level) for g in char.gems)
+    arkpassive_nodes = {
+        group: tuple((n.name, n.level, n.tier, n.desc) for n in nodes)
+        for group, nodes in char.arkpassive_nodes.items()
+    }
+
+    body = (
+        char.base_attack_point,
+        char.base_health_point,
+        char.character_level,
+        char.character_class_name,
+        char.combat_power,
+        dict(char.battle_stat),
+        equipments,
+        engravings,
+        tuple(char.card_sets),
+        gems,
+        arkpassive_nodes,
+        dict(char.karma),
+        dict(char.arkpassive_available_points),
+    )
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + marshal.dumps(body)
+
+
+def loads(data: bytes) -> CharacterInformation:
+    """
+    dumps로 만든 바이트를 CharacterInformation으로 복원합니다.
+    정규식이나 HTML 정리 없이 필드만 채워 넣습니다.
+    """
+    if data[:4] != SNAPSHOT_MAGIC or data[4] != SNAPSHOT_VERSION:
+        raise ValueError("지원하지 않는 스냅샷 형식입니다.")
+
+    (
+        base_attack_point,
+        base_health_point,
+        character_level,
+        character_class_name,
+        combat_power,
+        battle_stat,
+        equipments,
+        engravings,
+        card_sets,
+        gems,
+        arkpassive_nodes,
+        karma,
+        arkpassive_available_points,
+    ) = marshal.loads(data[5:])
+
+    char = CharacterInformation.__new__(CharacterInformation)
+    char._data = None
+    char.base_attack_point = base_attack_point
+    char.base_health_point = base_health_point
+    char.character_level = character_level
+    char.character_class_name = character_class_name
+    char.combat_power = combat_power
+    char.battle_stat = battle_stat
+    char.equipments = [
+        Equipment(
+            name=name,
+            equipment_type=to_equipment_type(equipment_type),
+            quality=quality,
+            base_effects=list(base_effects),
+            additional_effects=list(additional_effects),
+            grinding_effects=list(grinding_effects),
+            bracelet_effects=list(bracelet_effects),
+            transcendence_level=transcendence_level,
+            transcendence_grade=transcendence_grade,
+            elixir_effects=list(elixir_effects),
+            elixir_set=elixir_set,
+        )
+        for (
+            name,
+            equipment_type,
+            quality,
+            base_effects,
+            additional_effects,
+            grinding_effects,
+            bracelet_effects,
+            transcendence_level,
+            transcendence_grade,
+            elixir_effects,
+            elixir_set,
+        ) in equipments
+    ]
+    char.engravings = [
+        Engraving(
+            name=name,
+            ability_stone_level=stone_level,
+            grade=to_grade(grade),
+            level=level,
+        )
+        for name, stone_level, grade, level in engravings
+    ]
+    char.card_sets = list(card_sets)
+    char.gems = [Gem(name=name, tier=tier, level=level) for name, tier, level in gems]
+    char.arkpassive_nodes = {
+        group: [
+            ArkPassiveNode(name=name, level=level, tier=tier, desc=desc)
+            for name, level, tier, desc in nodes
+        ]
+        for group, nodes in arkpassive_nodes.items()
+    }
+    char.karma = karma
+    char.arkpassive_available_points = arkpassive_available_points
+    return char
+
+
+def load_character(
+    fname: str | Path, snapshot_dir: str | Path | None = SNAPSHOT_DIR
+) -> CharacterInformation:
+    """
+    OPENAPI 응답 json 파일을 CharacterInformation으로 읽습니다.
+    파일 내용의 해시로 저장된 스냅샷이 있으면 파싱 없이 스냅샷을 읽고,
+    없으면 파싱한 뒤 스냅샷을 남겨둡니다. (snapshot_dir이 None이면 파싱만)
+    """
+    with open(fname, "rb") as fp:
+        raw = fp.read()
+    return load_raw(raw, snapshot_dir)
+
+
+def load_raw(
+    raw: bytes, snapshot_dir: str | Path | None = None
+) -> CharacterInformation:
+    """
+    load_character와 같지만 파일 대신 응답 바이트를 받습니다.
+    snapshot_dir이 None이면 스냅샷을 읽거나 남기지 않고 파싱만 합니다.
+    pack 파일이나 캐시에서 읽은 응답마다 스냅샷 파일을 만들면 작은 파일이 캐릭터 수만큼 생기므로
+    스냅샷은 부르는 쪽에서 필요할 때만 켭니다. (main.py, batch에서 json 파일을 읽을 때)
+    """
+    if snapshot_dir is None:
+        return CharacterInformation(projection.loads(raw), keep_raw=False)
+
+    snapshot_path = Path(snapshot_dir) / f"{content_hash(raw)}.bin"
+    try:
+        with open(snapshot_path, "rb") as fp:
+            return loads(fp.read())
+    except (FileNotFoundError, ValueError, EOFError):
+        pass
+
+    char = CharacterInformation(projection.loads(raw), keep_raw=False)
+
+    # 다른 프로세스가 읽는 중에 반쯤 쓰인 파일을 보지 않도록 임시 파일에 쓰고 교체
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as fp:
+        fp.write(dumps(char))
+    os.replace(tmp_path, snapshot_path)
+
+    return char
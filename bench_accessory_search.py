@@ -0,0 +1,88 @@
+import argparse
+import random
+import sys
+import time
+
+from accessory_search import AccessorySearch, Listing
+from battlepoint.calculator import BattlePointCalculator
+from battlepoint.character import EquipmentType
+from battlepoint.snapshot import load_character
+
+# python bench_accessory_search.py character_이름.json --listings 30000 --limit 10
+# 연마 효과 수치가 매물마다 다르면 (공격, 케어) 프론티어가 커지므로 수치를 연속값으로 뽑은 매물로 측정
+LINES = {
+    EquipmentType.목걸이: [
+        "추가 피해 +{:.2f}%",
+        "적에게 주는 피해 +{:.2f}%",
+        "낙인력 +{:.2f}%",
+        "세레나데, 신앙, 조화 게이지 획득량 +{:.2f}%",
+    ],
+    EquipmentType.귀걸이: [
+        "공격력 +{:.2f}%",
+        "무기 공격력 +{:.2f}%",
+        "파티원 회복 효과 +{:.2f}%",
+        "파티원 보호막 효과 +{:.2f}%",
+    ],
+    EquipmentType.반지: [
+        "치명타 적중률 +{:.2f}%",
+        "치명타 피해 +{:.2f}%",
+        "아군 공격력 강화 효과 +{:.2f}%",
+        "아군 피해량 강화 효과 +{:.2f}%",
+    ],
+}
+COMMON_LINES = [
+    "공격력 +{:.0f}",
+    "무기 공격력 +{:.0f}",
+    "파티원 회복 효과 +{:.2f}%",
+    "파티원 보호막 효과 +{:.2f}%",
+]
+
+
+def synthetic_listings(count: int, seed: int) -> list[Listing]:
+    rng = random.Random(seed)
+    listings = []
+    for i in range(count):
+        equipment_type = rng.choice(list(LINES))
+        lines = rng.sample(LINES[equipment_type], 2) + [rng.choice(COMMON_LINES)]
+        effects = [
+            line.format(rng.uniform(0.5, 8.0) if "%" in line else rng.uniform(80, 960))
+            for line in lines
+        ]
+        listings.append(
+            Listing(
+                name=f"{equipment_type}{i}",
+                equipment_type=equipment_type,
+                grinding_effects=effects,
+                price=rng.randint(1000, 300000),
+            )
+        )
+    return listings
+
+
+parser = argparse.ArgumentParser(description="장신구 조합 탐색 시간 측정")
+parser.add_argument("character", help="OPENAPI 응답 json 파일")
+parser.add_argument("--listings", type=int, default=30000)
+parser.add_argument("--budget", type=int, default=800000)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--limit", type=float, default=10.0, help="이보다 오래 걸리면 실패")
+args = parser.parse_args()
+
+calculator = BattlePointCalculator()
+char = load_character(args.character)
+listings = synthetic_listings(args.listings, args.seed)
+
+search = AccessorySearch(calculator, listings)
+failed = False
+print(f"매물 {len(listings):,}개, 예산 {args.budget:,}골드")
+for score_type in ("attack", "defense"):
+    # 점수 종류가 바뀌면 precompute부터 다시 하므로 그 시간도 포함
+    start = time.perf_counter()
+    best, frontier = search.search(char, score_type, args.budget)
+    elapsed = time.perf_counter() - start
+    score = f"{best.score / 100:,.2f}" if best else "-"
+    print(f"{score_type:<8} {elapsed:6.2f}초 최적 {score} 프론티어 {len(frontier)}개")
+    if elapsed > args.limit:
+        print(f"  {args.limit}초를 넘었습니다.")
+        failed = True
+
+sys.exit(1 if failed else 0)
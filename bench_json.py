@@ -0,0 +1,38 @@
+import glob
+import sys
+import time
+
+from battlepoint import json_backend, projection
+from battlepoint.character import CharacterInformation
+
+# python bench_json.py "character*.json"
+fnames = glob.glob(sys.argv[1] if len(sys.argv) > 1 else "character*.json")
+if not fnames:
+    raise SystemExit("측정할 character*.json 파일이 없습니다.")
+
+# 디스크 읽기 시간은 빼고 파싱 시간만 측정
+corpus: list[bytes] = []
+for fname in fnames:
+    with open(fname, "rb") as fp:
+        corpus.append(fp.read())
+total_mb = sum(map(len, corpus)) / 1024 / 1024
+
+print(f"캐릭터 {len(corpus)}개, {total_mb:.1f}MB")
+for name in json_backend.BACKENDS:
+    try:
+        json_backend.set_decoder(name)
+    except ImportError:
+        print(f"{name:<13} 설치되지 않음")
+        continue
+
+    # 전체 디코딩, 필요한 항목만 디코딩(projection)
+    for label, decode in (("", json_backend.loads), ("+proj", projection.loads)):
+        start = time.perf_counter()
+        for raw in corpus:
+            CharacterInformation(decode(raw), keep_raw=False)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{name + label:<13} {len(corpus) / elapsed:>8.1f} 캐릭터/s "
+            f"{total_mb / elapsed:>6.1f}MB/s"
+        )
@@ -0,0 +1,44 @@
+import gc
+import glob
+import json
+import sys
+import tracemalloc
+
+from battlepoint.character import CharacterInformation
+
+
+def measure(fnames: list[str], keep_raw: bool) -> int:
+    """
+    CharacterInformation들을 메모리에 들고 있을 때 차지하는 바이트 수를 반환합니다.
+    json 파일을 읽는 동안 잠깐 쓰이는 메모리는 포함하지 않습니다.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    characters = []
+    for fname in fnames:
+        with open(fname, "rb") as fp:
+            data = json.load(fp)
+        characters.append(CharacterInformation(data, keep_raw=keep_raw))
+        del data
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del characters
+    return after - before
+
+
+# python bench_memory.py "character*.json"
+fnames = glob.glob(sys.argv[1] if len(sys.argv) > 1 else "character*.json")
+if not fnames:
+    raise SystemExit("측정할 character*.json 파일이 없습니다.")
+
+print(f"캐릭터 {len(fnames)}개")
+total_raw = measure(fnames, keep_raw=True)
+total_compact = measure(fnames, keep_raw=False)
+print(f"keep_raw=True  {total_raw // len(fnames):>10,} bytes/캐릭터")
+print(f"keep_raw=False {total_compact // len(fnames):>10,} bytes/캐릭터")
+print(f"{total_raw / total_compact:.1f}배 감소")
@@ -0,0 +1,90 @@
+import glob
+import statistics
+import subprocess
+import sys
+import time
+
+# python bench_startup.py "character*.json"
+# 짧게 실행되는 작업은 import와 계수 로딩이 실행 시간의 대부분이므로 새 프로세스로 측정
+RUNS = 20
+fnames = glob.glob(sys.argv[1] if len(sys.argv) > 1 else "character*.json")
+
+commands = {
+    "python": ["-c", "pass"],
+    "import battlepoint": ["-c", "import battlepoint"],
+    "import calculator": ["-c", "from battlepoint import BattlePointCalculator"],
+    "BattlePointCalculator()": [
+        "-c",
+        "from battlepoint import BattlePointCalculator; BattlePointCalculator()",
+    ],
+    "load coefficients": [
+        "-c",
+        (
+            "from battlepoint import BattlePointCalculator; "
+            "BattlePointCalculator().dict_battle_point"
+        ),
+    ],
+}
+if fnames:
+    commands["python -m battlepoint score"] = ["-m", "battlepoint", "score", fnames[0]]
+else:
+    print("character*.json 파일이 없어서 score는 측정하지 않습니다.")
+
+
+def measure(args: list[str]) -> list[float]:
+    elapsed = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, capture_output=True)
+        elapsed.append(time.perf_counter() - start)
+    return elapsed
+
+
+print(f"{RUNS}번 실행, 중앙값 (최소)")
+base = None
+for label, args in commands.items():
+    elapsed = measure(args)
+    median = statistics.median(elapsed) * 1000
+    best = min(elapsed) * 1000
+    # 다른 프로세스의 영향을 덜 받는 최소값으로 비교
+    base = best if base is None else base
+    print(
+        f"{label:<28} {median:7.1f}ms ({best:6.1f}ms) python 대비 +{best - base:5.1f}ms"
+    )
+
+
+def import_times(code: str) -> dict[str, tuple[int, int]]:
+    """python -X importtime 결과, 모듈 이름 -> (자기 시간, 누적 시간) us"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times[name.rstrip()] = int(self_us), int(cumulative_us)
+    return times
+
+
+# 인터프리터 시작 때 import 되는 모듈은 빼고, 누적 시간이 큰 모듈들
+startup = {name.strip() for name in import_times("pass")}
+# battlepoint/__init__.py의 import_module은 -X importtime에 나오지 않으므로 하위 모듈을 직접 import
+times = import_times(
+    "from battlepoint.calculator import BattlePointCalculator; "
+    "from battlepoint.snapshot import load_character"
+)
+print("\nimport 시간 (누적, 자기 시간)")
+rows = sorted(
+    (
+        (cumulative, self_us, name)
+        for name, (self_us, cumulative) in times.items()
+        if name.strip() not in startup
+    ),
+    reverse=True,
+)
+for cumulative, self_us, name in rows[:15]:
+    print(f"{cumulative / 1000:6.1f}ms {self_us / 1000:6.1f}ms {name}")
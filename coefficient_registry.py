@@ -0,0 +1,187 @@
+"""
+패치 버전별 계수 저장소
+
+과거 패치의 armory 스냅샷은 그 당시의 BattlePoint.json으로 계산해야 합니다.
+버전마다 BattlePointCalculator를 따로 만들면 거의 같은 dict가 버전 수만큼 메모리에 올라가므로,
+내용이 같은 하위 테이블(level, weapon_quality, gem 등)은 모든 버전이 하나의 객체를 공유하게 합니다.
+
+versions.json은 아래와 같은 배열입니다. date는 그 버전이 적용되기 시작한 날짜
+[
+    {"version": "865", "date": "2025-01-08", "battle_point": "BattlePoint.865.json", "arkpassive": "ArkPassive.865.json"},
+    {"version": "869", "date": "2025-02-12", "battle_point": "BattlePoint.869.json", "arkpassive": "ArkPassive.869.json"}
+]
+
+$ python coefficient_registry.py versions.json "history/*/character_*.json"
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from battlepoint.calculator import BattlePointCalculator
+from battlepoint.snapshot import load_character
+
+# 파일 이름에 들어있는 날짜, character_이름_20250212.json 또는 history/2025-02-12/character_이름.json
+REGEX_SNAPSHOT_DATE = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
+
+
+@dataclass
+class CoefficientVersion:
+    version: str
+    date: date
+    dict_battle_point: dict
+    dict_arkpassive_point: dict
+
+
+class CoefficientRegistry:
+    """
+    여러 버전의 계수를 한 번에 들고 있는 저장소
+
+    registry = CoefficientRegistry.load("versions.json")
+    calculator = registry.calculator_for(snapshot_date("history/2025-02-12/character_이름.json"))
+    """
+
+    def __init__(self):
+        self.versions: list[CoefficientVersion] = []  # date 순서
+        # 내용 -> 공유 객체, 키는 (key, id(하위 객체)) 튜플이라 하위 테이블부터 공유됨
+        self._pool: dict[tuple, dict] = {}
+        self._calculators: dict[str, BattlePointCalculator] = {}
+
+    def _intern(self, value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+
+        children = {sys.intern(k): self._intern(v) for k, v in value.items()}
+        key = tuple(
+            (k, id(v) if isinstance(v, dict) else v) for k, v in children.items()
+        )
+        shared = self._pool.get(key)
+        if shared is None:
+            shared = self._pool[key] = children
+        return shared
+
+    def add(
+        self,
+        version: str,
+        effective_date: date,
+        dict_battle_point: dict,
+        dict_arkpassive_point: dict,
+    ) -> CoefficientVersion:
+        """
+        버전을 추가합니다. 이전 버전과 같은 하위 테이블은 기존 객체로 바뀌므로,
+        추가한 뒤에는 반환된 dict들을 수정하면 안 됩니다.
+        """
+        entry = CoefficientVersion(
+            version=version,
+            date=effective_date,
+            dict_battle_point=self._intern(dict_battle_point),
+            dict_arkpassive_point=self._intern(dict_arkpassive_point),
+        )
+        self.versions.append(entry)
+        self.versions.sort(key=lambda v: v.date)
+        return entry
+
+    @classmethod
+    def load(cls, manifest: str) -> "CoefficientRegistry":
+        """versions.json을 읽습니다. 파일 경로는 versions.json 기준 상대 경로"""
+        root = Path(manifest).parent
+        with open(manifest, "r", encoding="utf-8") as fp:
+            entries = json.load(fp)
+
+        registry = cls()
+        for entry in entries:
+            with open(root / entry["battle_point"], "r", encoding="utf-8") as fp:
+                dict_battle_point = json.load(fp)
+            with open(root / entry["arkpassive"], "r", encoding="utf-8") as fp:
+                dict_arkpassive_point = json.load(fp)
+            registry.add(
+                str(entry["version"]),
+                date.fromisoformat(entry["date"]),
+                dict_battle_point,
+                dict_arkpassive_point,
+            )
+        return registry
+
+    def version_for(self, when: date) -> CoefficientVersion:
+        """when 시점에 적용 중이던 버전, 첫 버전보다 이전이면 첫 버전"""
+        if not self.versions:
+            raise ValueError("등록된 버전이 없습니다.")
+        idx = bisect_right([v.date for v in self.versions], when)
+        return self.versions[max(idx - 1, 0)]
+
+    def calculator(self, version: str) -> BattlePointCalculator:
+        calculator = self._calculators.get(version)
+        if calculator is None:
+            entry = next(v for v in self.versions if v.version == version)
+            calculator = self._calculators[version] = BattlePointCalculator(
+                dict_battle_point=entry.dict_battle_point,
+                dict_arkpassive_point=entry.dict_arkpassive_point,
+            )
+        return calculator
+
+    def calculator_for(self, when: date) -> BattlePointCalculator:
+        return self.calculator(self.version_for(when).version)
+
+    def stats(self) -> tuple[int, int]:
+        """(모든 버전의 dict 개수 합, 실제로 메모리에 있는 dict 개수)"""
+        total = 0
+        for v in self.versions:
+            stack = [v.dict_battle_point, v.dict_arkpassive_point]
+            while stack:
+                d = stack.pop()
+                total += 1
+                stack.extend(x for x in d.values() if isinstance(x, dict))
+        return total, len(self._pool)
+
+
+def snapshot_date(fname: str) -> date:
+    """경로에 날짜(YYYYMMDD, YYYY-MM-DD)가 있으면 그 날짜, 없으면 파일 수정 시각"""
+    for match in reversed(list(REGEX_SNAPSHOT_DATE.finditer(fname))):
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            continue
+    return datetime.fromtimestamp(os.path.getmtime(fname)).date()
+
+
+def score_history(
+    registry: CoefficientRegistry,
+    fnames: list[str],
+    score_type: Literal["attack", "defense"] | None = None,
+) -> list[tuple[str, str, int]]:
+    """스냅샷마다 그 당시 버전으로 계산한 (파일, 버전, 점수)"""
+    result = []
+    for fname in fnames:
+        version = registry.version_for(snapshot_date(fname))
+        char = load_character(fname)
+        st = score_type or ("defense" if char.is_supporter else "attack")
+        score = registry.calculator(version.version).calc(char, st)
+        result.append((fname, version.version, score))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="버전별 계수로 과거 스냅샷 계산")
+    parser.add_argument("manifest", help="versions.json")
+    parser.add_argument("pattern", help='스냅샷 파일 glob (ex. "history/*/*.json")')
+    parser.add_argument("--score-type", choices=["attack", "defense"])
+    args = parser.parse_args()
+
+    registry = CoefficientRegistry.load(args.manifest)
+    total, shared = registry.stats()
+    print(
+        f"{len(registry.versions)}개 버전, dict {total}개 중 {shared}개만 메모리에 유지"
+    )
+
+    for fname, version, score in score_history(
+        registry, sorted(glob.glob(args.pattern)), args.score_type
+    ):
+        print(f"{fname} [{version}] {score / 100:,.2f}")
@@ -0,0 +1,483 @@
+"""
+캐릭터 특성 컬럼 형식 내보내기
+
+보석 레벨, 각인 레벨, 엘릭서 세트, 초월 등급, 연마 효과 등으로 캐릭터를 나눠 보려면
+CharacterInformation을 하나씩 읽어야 합니다.
+캐릭터마다 같은 폭으로 펼친 값과 calc의 단계별 증가율을 컬럼별 .npy 파일로 저장해서
+np.load(..., mmap_mode="r")로 복사 없이 조회할 수 있게 합니다.
+
+- 문자열 컬럼은 사전 인코딩 (int32 코드, 없으면 -1), 사전은 schema.json에 저장
+- chunk_size개씩 모아서 파일 끝에 이어 쓰므로 캐릭터 수와 관계없이 메모리 사용량이 일정
+- .npy 헤더는 자리를 잡아두고 마지막에 전체 행 수로 다시 씀
+
+$ python columnar_export.py "character*.json" --out export --workers 4
+
+export = ColumnarExport("export")
+gem = export["gem_level"]                         # (행, MAX_GEMS) int16 memmap
+rows = (gem == 10).sum(axis=1) >= 6              # 10레벨 보석 6개 이상
+export.decode("class_name", export["class_name"][rows])
+"""
+
+import argparse
+import json
+import re
+import struct
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Self
+
+import numpy as np
+
+from battlepoint.calculator import BattlePointCalculator, BattlePointType
+from battlepoint.character import (
+    VALID_BATTLE_STAT_TYPE,
+    CharacterInformation,
+    EquipmentType,
+)
+from battlepoint.pack import expand, read_input, source_name
+from battlepoint.parallel import imap_batched
+from battlepoint.snapshot import load_raw
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+MAX_GEMS = 11
+MAX_ENGRAVINGS = 5
+MAX_CARD_SETS = 3
+MAX_BRACELET_EFFECTS = 6
+GRINDING_LINES = 3  # 장신구 하나의 연마 효과 수
+
+ARMOR_SLOTS = (
+    EquipmentType.무기,
+    EquipmentType.투구,
+    EquipmentType.상의,
+    EquipmentType.하의,
+    EquipmentType.장갑,
+    EquipmentType.어깨,
+)
+ACCESSORY_SLOTS = (
+    EquipmentType.목걸이,
+    EquipmentType.귀걸이,
+    EquipmentType.귀걸이,
+    EquipmentType.반지,
+    EquipmentType.반지,
+)
+BATTLE_STATS = sorted(VALID_BATTLE_STAT_TYPE)
+ARKPASSIVE_GROUPS = ("진화", "깨달음", "도약")
+
+# 공격력 +1.55%, 무기 공격력 +195
+REGEX_GRINDING_LINE = re.compile(r"^(.+?) \+([0-9.]+)(%?)$")
+
+# .npy 헤더 크기, 헤더를 다시 써도 데이터 위치가 바뀌지 않게 고정
+NPY_HEADER_SIZE = 128
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    dtype: str
+    width: int = 1  # 1이면 (행,), 아니면 (행, width)
+    dictionary: bool = False  # 문자열 컬럼, 코드로 저장
+    labels: tuple[str, ...] | None = None  # width 방향 각 칸의 의미
+
+    @property
+    def fill(self) -> Any:
+        """값이 없는 칸"""
+        if np.dtype(self.dtype).kind == "f":
+            return np.nan
+        if np.dtype(self.dtype).kind == "b":
+            return False
+        return -1
+
+
+def _stage_labels() -> tuple[str, ...]:
+    return tuple(t.value for t in BattlePointType)
+
+
+def _slot_labels(slots: Iterable[EquipmentType], lines: int = 1) -> tuple[str, ...]:
+    labels = []
+    for i, slot in enumerate(slots):
+        labels += [
+            f"{i}:{slot}" if lines == 1 else f"{i}:{slot}:{j}" for j in range(lines)
+        ]
+    return tuple(labels)
+
+
+COLUMNS = (
+    Column("name", "int32", dictionary=True),
+    Column("class_name", "int32", dictionary=True),
+    Column("character_level", "int16"),
+    Column("combat_power", "int64"),  # 실제 전투력 x100
+    Column("base_attack_point", "int64"),
+    Column("base_health_point", "int64"),
+    Column("is_supporter", "bool"),
+    Column("attack_score", "int64"),
+    Column("defense_score", "int64"),
+    Column("error", "int32", dictionary=True),  # calc 예외 이름
+    # 계산 단계(BattlePointType)별 증가율, 해당 단계 직후 값 / 직전 값
+    Column("attack_stage", "float64", len(BattlePointType), labels=_stage_labels()),
+    Column("defense_stage", "float64", len(BattlePointType), labels=_stage_labels()),
+    Column("battle_stat", "int16", len(BATTLE_STATS), labels=tuple(BATTLE_STATS)),
+    Column("weapon_quality", "int16"),
+    Column(
+        "transcendence_level",
+        "int8",
+        len(ARMOR_SLOTS),
+        labels=_slot_labels(ARMOR_SLOTS),
+    ),
+    Column(
+        "transcendence_grade",
+        "int8",
+        len(ARMOR_SLOTS),
+        labels=_slot_labels(ARMOR_SLOTS),
+    ),
+    Column("elixir_set", "int32", dictionary=True),
+    Column("elixir_set_stage", "int8"),
+    Column(
+        "grinding_effect",
+        "int32",
+        len(ACCESSORY_SLOTS) * GRINDING_LINES,
+        dictionary=True,
+        labels=_slot_labels(ACCESSORY_SLOTS, GRINDING_LINES),
+    ),
+    Column(
+        "grinding_value",
+        "float32",
+        len(ACCESSORY_SLOTS) * GRINDING_LINES,
+        labels=_slot_labels(ACCESSORY_SLOTS, GRINDING_LINES),
+    ),
+    Column("bracelet_effect", "int32", MAX_BRACELET_EFFECTS, dictionary=True),
+    Column("engraving_name", "int32", MAX_ENGRAVINGS, dictionary=True),
+    Column("engraving_level", "int8", MAX_ENGRAVINGS),  # total_level
+    Column("engraving_stone_level", "int8", MAX_ENGRAVINGS),
+    Column("gem_name", "int32", MAX_GEMS, dictionary=True),
+    Column("gem_tier", "int8", MAX_GEMS),
+    Column("gem_level", "int16", MAX_GEMS),
+    Column("card_set", "int32", MAX_CARD_SETS, dictionary=True),
+    Column("karma_rank", "int8", 3, labels=ARKPASSIVE_GROUPS),
+    Column("karma_level", "int8", 3, labels=ARKPASSIVE_GROUPS),
+    Column("arkpassive_points", "int16", 3, labels=ARKPASSIVE_GROUPS),
+)
+
+
+def _grinding_line(line: str) -> tuple[str, float]:
+    """공격력 +1.55% -> ("공격력%", 1.55), 형식이 다르면 (줄 전체, nan)"""
+    if matches := REGEX_GRINDING_LINE.match(line):
+        return matches.group(1) + matches.group(3), float(matches.group(2))
+    return line, float("nan")
+
+
+def features(
+    name: str, char: CharacterInformation, calculator: BattlePointCalculator
+) -> dict[str, Any]:
+    """COLUMNS에 맞게 펼친 값, 문자열 컬럼은 문자열 그대로 (코드는 ColumnarWriter에서)"""
+    row: dict[str, Any] = {
+        "name": name,
+        "class_name": char.character_class_name,
+        "character_level": char.character_level,
+        "combat_power": round(float(char.combat_power.replace(",", "")) * 100),
+        "base_attack_point": char.base_attack_point,
+        "base_health_point": char.base_health_point,
+        "is_supporter": char.is_supporter,
+        "battle_stat": [char.battle_stat.get(s, -1) for s in BATTLE_STATS],
+        "weapon_quality": char.weapon_quality,
+    }
+
+    for score_type in ("attack", "defense"):
+        try:
+            chain = calculator.calc_factors(char, score_type)
+        except (KeyError, ValueError, TypeError, RuntimeError) as e:
+            row["error"] = type(e).__name__
+            continue
+        row[f"{score_type}_score"] = chain.score()
+        row[f"{score_type}_stage"] = list(chain.stage_gains().values())
+
+    armors = {}
+    accessories: dict[EquipmentType, list] = {}
+    for e in char.equipments:
+        if e.equipment_type in ARMOR_SLOTS:
+            armors.setdefault(e.equipment_type, e)
+        elif e.equipment_type in ACCESSORY_SLOTS:
+            accessories.setdefault(e.equipment_type, []).append(e)
+        elif e.equipment_type == EquipmentType.팔찌:
+            row["bracelet_effect"] = e.bracelet_effects
+        if e.equipment_type == EquipmentType.투구 and e.elixir_set is not None:
+            row["elixir_set"], row["elixir_set_stage"] = e.elixir_set
+
+    row["transcendence_level"] = [
+        getattr(armors.get(slot), "transcendence_level", None) for slot in ARMOR_SLOTS
+    ]
+    row["transcendence_grade"] = [
+        getattr(armors.get(slot), "transcendence_grade", None) for slot in ARMOR_SLOTS
+    ]
+
+    # 같은 종류의 장신구는 나온 순서대로 칸을 채움
+    effects, values = [], []
+    taken: dict[EquipmentType, int] = {}
+    for slot in ACCESSORY_SLOTS:
+        i = taken.get(slot, 0)
+        taken[slot] = i + 1
+        same = accessories.get(slot, [])
+        lines = same[i].grinding_effects[:GRINDING_LINES] if i < len(same) else []
+        lines = [_grinding_line(line) for line in lines]
+        lines += [(None, None)] * (GRINDING_LINES - len(lines))
+        effects += [effect for effect, _ in lines]
+        values += [value for _, value in lines]
+    row["grinding_effect"], row["grinding_value"] = effects, values
+
+    row["engraving_name"] = [e.name for e in char.engravings]
+    row["engraving_level"] = [e.total_level for e in char.engravings]
+    row["engraving_stone_level"] = [e.ability_stone_level for e in char.engravings]
+
+    # 높은 레벨부터
+    gems = sorted(char.gems, key=lambda g: (g.level, g.tier), reverse=True)
+    row["gem_name"] = [g.name for g in gems]
+    row["gem_tier"] = [g.tier for g in gems]
+    row["gem_level"] = [g.level for g in gems]
+
+    row["card_set"] = char.card_sets
+    row["karma_rank"] = [char.karma[g][0] for g in ARKPASSIVE_GROUPS]
+    row["karma_level"] = [char.karma[g][1] for g in ARKPASSIVE_GROUPS]
+    row["arkpassive_points"] = [
+        char.arkpassive_available_points.get(g) for g in ARKPASSIVE_GROUPS
+    ]
+    return row
+
+
+def _npy_header(dtype: np.dtype, shape: tuple[int, ...]) -> bytes:
+    """NPY_HEADER_SIZE 바이트로 맞춘 .npy 1.0 헤더"""
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": shape,
+        }
+    )
+    # magic(6) + version(2) + 헤더 길이(2) + 헤더, 헤더는 \n으로 끝나야 함
+    header_len = NPY_HEADER_SIZE - 10
+    if len(header) >= header_len:
+        raise ValueError(f".npy 헤더가 너무 깁니다: {header}")
+    return (
+        b"\x93NUMPY\x01\x00"
+        + struct.pack("<H", header_len)
+        + (header.ljust(header_len - 1) + "\n").encode("latin1")
+    )
+
+
+class ColumnarWriter:
+    """
+    with ColumnarWriter("export") as writer:
+        writer.append(features(name, char, calculator))
+
+    chunk_size행마다 컬럼 파일 끝에 이어 쓰고, close할 때 헤더와 schema.json을 씁니다.
+    with 블록이 예외로 끝나면 schema.json을 쓰지 않으므로 끝나지 않은 내보내기는 열리지 않습니다.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        columns: tuple[Column, ...] = COLUMNS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        # 이전 내보내기의 schema.json이 남아 있으면 중간에 끊겨도 끝난 것처럼 보임
+        (self.out_dir / "schema.json").unlink(missing_ok=True)
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.truncated = 0  # 칸이 모자라서 잘린 값이 있는 행 수
+        self.dictionaries: dict[str, dict[str, int]] = {
+            c.name: {} for c in columns if c.dictionary
+        }
+
+        self._buffers = {c.name: self._new_buffer(c) for c in columns}
+        self._filled = 0
+        self._files = {}
+        for c in columns:
+            fp = open(self.out_dir / f"{c.name}.npy", "wb")
+            fp.write(_npy_header(np.dtype(c.dtype), self._shape(c, 0)))
+            self._files[c.name] = fp
+
+    def _new_buffer(self, column: Column) -> np.ndarray:
+        shape = self._shape(column, self.chunk_size)
+        return np.full(shape, column.fill, dtype=column.dtype)
+
+    @staticmethod
+    def _shape(column: Column, rows: int) -> tuple[int, ...]:
+        return (rows,) if column.width == 1 else (rows, column.width)
+
+    def _encode(self, column: Column, value: str | None) -> int:
+        if value is None:
+            return -1
+        codes = self.dictionaries[column.name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def append(self, row: dict[str, Any]):
+        i = self._filled
+        truncated = False
+        for c in self.columns:
+            value = row.get(c.name)
+            if value is None:
+                continue
+            buffer = self._buffers[c.name]
+            if c.width == 1:
+                buffer[i] = self._encode(c, value) if c.dictionary else value
+                continue
+
+            if len(value) > c.width:
+                truncated = True
+                value = value[: c.width]
+            if c.dictionary:
+                value = [self._encode(c, v) for v in value]
+            else:
+                value = [c.fill if v is None else v for v in value]
+            buffer[i, : len(value)] = value
+
+        self.truncated += truncated
+        self.rows += 1
+        self._filled += 1
+        if self._filled == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._filled == 0:
+            return
+        for c in self.columns:
+            buffer = self._buffers[c.name]
+            self._files[c.name].write(buffer[: self._filled].tobytes())
+            buffer.fill(c.fill)
+        self._filled = 0
+
+    def close(self):
+        self.flush()
+        for c in self.columns:
+            fp = self._files[c.name]
+            fp.seek(0)
+            fp.write(_npy_header(np.dtype(c.dtype), self._shape(c, self.rows)))
+            fp.close()
+
+        schema = {
+            "rows": self.rows,
+            "truncated": self.truncated,
+            "columns": [
+                {
+                    "name": c.name,
+                    "dtype": c.dtype,
+                    "width": c.width,
+                    "labels": list(c.labels) if c.labels else None,
+                    "dictionary": list(self.dictionaries[c.name])
+                    if c.dictionary
+                    else None,
+                }
+                for c in self.columns
+            ],
+        }
+        # schema.json이 있으면 내보내기가 끝난 것
+        with open(self.out_dir / "schema.json", "w", encoding="utf-8") as fp:
+            json.dump(schema, fp, ensure_ascii=False)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def abort(self):
+        """schema.json 없이 파일만 닫음, 끝나지 않은 내보내기로 남음"""
+        for fp in self._files.values():
+            fp.close()
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ColumnarExport:
+    """내보낸 폴더를 읽기, 컬럼은 읽기 전용 memmap"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path / "schema.json", "r", encoding="utf-8") as fp:
+            schema = json.load(fp)
+        self.rows: int = schema["rows"]
+        self.schema: dict[str, dict] = {c["name"]: c for c in schema["columns"]}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.schema:
+            raise KeyError(name)
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    def labels(self, name: str) -> list[str] | None:
+        return self.schema[name]["labels"]
+
+    def code(self, name: str, value: str) -> int:
+        """문자열 값의 코드, 사전에 없으면 -1 (어떤 행과도 같지 않음)"""
+        try:
+            return self.schema[name]["dictionary"].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, name: str, codes: np.ndarray) -> np.ndarray:
+        """코드 배열을 문자열 배열로, -1은 None"""
+        dictionary = np.array([*self.schema[name]["dictionary"], None], dtype=object)
+        return dictionary[np.asarray(codes)]
+
+
+# 작업자 프로세스마다 하나씩
+_calculator: BattlePointCalculator | None = None
+
+
+def _features_file(fname: str) -> dict[str, Any] | None:
+    global _calculator
+    if _calculator is None:
+        _calculator = BattlePointCalculator()
+    try:
+        char = load_raw(read_input(fname))
+    except (OSError, RuntimeError, ValueError, KeyError, TypeError):
+        return None
+    return features(source_name(fname), char, _calculator)
+
+
+def _features_files(fnames: list[str]) -> list[dict[str, Any] | None]:
+    return [_features_file(fname) for fname in fnames]
+
+
+def iter_features(fnames: list[str], workers: int = 1) -> Iterator[dict | None]:
+    if workers <= 1:
+        yield from map(_features_file, fnames)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        yield from imap_batched(
+            executor, _features_files, fnames, workers=workers, batch_size=64
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="캐릭터 특성 컬럼 형식 내보내기")
+    parser.add_argument(
+        "pattern",
+        nargs="?",
+        default="character*.json",
+        help="json 파일 glob 또는 pack 파일",
+    )
+    parser.add_argument("--out", default="export", help="컬럼 파일을 저장할 폴더")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fnames = expand(args.pattern)
+    failed = 0
+    with ColumnarWriter(args.out, chunk_size=args.chunk_size) as writer:
+        for row in iter_features(fnames, args.workers):
+            if row is None:
+                failed += 1
+                continue
+            writer.append(row)
+
+    print(
+        f"{writer.rows:,}행 저장, 읽기 실패 {failed}개, 칸이 모자라 잘린 행 {writer.truncated}개"
+    )
@@ -1,10 +1,22 @@
+"""
+게임 db에서 BattlePoint.json, ArkPassive.json을 추출
+
+$ python dump.py --base "F:\\loadumps\\869\\db"
+$ python dump.py arkpassive
+"""
+
+import argparse
 import json
 import re
 import sqlite3
 import xml.etree.ElementTree as ET
 from decimal import Decimal
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
+from typing import Self
+
+from battlepoint.calculator import ARKPASSIVE_PATH, BATTLE_POINT_PATH
 
 BASE = "F:\loadumps\869\db"
 
@@ -28,6 +40,12 @@ DICT_EQUIPMENT_TYPE = {
 }  # ItemTranscendenceSet.db 기준. 일반적인 장비 순서와 다름
 # 문자열은 OPENAPI의 ArmoryEquipment.Type 값 기준으로 설정함
 
+# EFGameMsg_Enums.xml에서 사용하는 enum 종류
+ENUM_TYPES = ("battlepointtype", "stattype", "playerclass")
+
+GAME_MSG_CACHE_SIZE = 4096
+FIND_SQL = "SELECT MSG FROM GameMsg WHERE KEY = ? COLLATE NOCASE"
+
 
 class BattlePointType(str, Enum):
     BASE_ATTACK_POINT = "base_attack_point"
@@ -60,60 +78,142 @@ class BattlePointType(str, Enum):
     PET_SPECIALTY = "pet_specialty"
 
 
-def dump_enum():
-    """xml에 있는 battlepoint 노드들을 BattlePointType enum을 만들기 편하게 출력"""
-    tree = ET.parse(f"{BASE}/EFGameMsg_Enums.xml")
-    root = tree.getroot()
+def scan_enums(
+    fname: str | Path, types: tuple[str, ...] = ENUM_TYPES
+) -> dict[str, dict[int, str]]:
+    """
+    EFGameMsg_Enums.xml을 한 번만 읽으면서 필요한 종류의 NODE만 {Type: {Index: Name}}으로 모음
+    트리 전체를 메모리에 올리지 않도록 iterparse로 읽고, 읽은 노드는 바로 버림
+    """
+    result: dict[str, dict[int, str]] = {t: {} for t in types}
+    depth = 0
+    root = None
+    for event, elem in ET.iterparse(fname, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
 
-    for node in root.findall("NODE"):
-        node_type = node.attrib.get("Type")
-        if node_type == "battlepointtype":
-            name = node.attrib["Name"]
-            print(f'    {name.upper()} = "{name}"')
+        depth -= 1
+        if depth != 1:  # root 바로 아래의 NODE만 사용
+            continue
 
+        if elem.tag == "NODE":
+            index = result.get(elem.attrib.get("Type"))
+            if index is not None:
+                index[int(elem.attrib["Index"])] = elem.attrib["Name"]
+        root.clear()
 
-# GameMsg를 읽고 python dict으로 만들어줌
+    return result
+
+
+# GameMsg에서 KEY로 MSG를 찾아줌
 class GameMsg:
-    def __init__(self):
-        with sqlite3.connect(f"{BASE}/EFTable_GameMsg.db") as conn:
-            cur = conn.cursor()
-            self.data: dict[str, str] = {}
-            for row in cur.execute("SELECT KEY, MSG FROM GameMsg").fetchall():
-                self.data[row[0].lower()] = row[1]
+    """
+    전체 KEY/MSG를 dict으로 만들지 않고, 필요한 KEY만 db에서 조회한 뒤 캐시합니다.
+    KEY는 대소문자 구분 없이(collate nocase) 찾습니다.
 
-    def find(self, key: str) -> str:
-        result = self.data[key.lower()]  # collate nocase
+    게임 db는 읽기 전용으로 열고 바꾸지 않습니다. KEY 인덱스가 없으면 KEY/MSG만 메모리로 복사해서
+    인덱스를 만든 뒤 조회합니다.
+    """
 
+    def __init__(self, db_path: str | Path, cache_size: int = GAME_MSG_CACHE_SIZE):
+        self.uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+        self.conn = sqlite3.connect(self.uri, uri=True)
+        if not self._has_index():
+            self._index_copy()
+        self.find = lru_cache(maxsize=cache_size)(self._find)
+
+    def _has_index(self) -> bool:
+        plan = self.conn.execute(f"EXPLAIN QUERY PLAN {FIND_SQL}", ("",)).fetchall()
+        # 인덱스를 타면 SEARCH, 전체를 훑으면 SCAN
+        return any(row[-1].startswith("SEARCH") for row in plan)
+
+    def _index_copy(self):
+        conn = sqlite3.connect(":memory:", uri=True)
+        conn.execute("ATTACH DATABASE ? AS src", (self.uri,))
+        conn.execute("CREATE TABLE GameMsg AS SELECT KEY, MSG FROM src.GameMsg")
+        conn.execute("DETACH DATABASE src")
+        conn.execute("CREATE INDEX GameMsg_KEY_nocase ON GameMsg (KEY COLLATE NOCASE)")
+        self.conn.close()
+        self.conn = conn
+
+    def _find(self, key: str) -> str:
+        row = self.conn.execute(FIND_SQL, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+
+        result = row[0]
         result = result.replace("\n", " ")  # html의 <BR>에 대응
         result = result.replace("\t", "")
         result = re.sub(REGEX_TAG, "", result)
         return result
 
+    def close(self):
+        self.conn.close()
+
+
+class ExtractionContext:
+    """
+    추출에 필요한 입력을 한 곳에서 관리
+    Enums.xml은 처음 사용할 때 한 번만 읽고, GameMsg는 필요한 키만 조회합니다.
+    """
+
+    def __init__(self, base: str | Path = BASE):
+        self.base = Path(base)
+        self._enums: dict[str, dict[int, str]] | None = None
+        self._game_msg: GameMsg | None = None
+
+    def path(self, name: str) -> Path:
+        return self.base / name
+
+    def table(self, db: str) -> Path:
+        fname = self.path(f"EFTable_{db}.db")
+        if not fname.exists():
+            raise ValueError(f"{fname} 파일이 없습니다.")
+        return fname
+
+    def enum(self, node_type: str) -> dict[int, str]:
+        if self._enums is None:
+            self._enums = scan_enums(self.path("EFGameMsg_Enums.xml"))
+        return self._enums[node_type]
 
-game_msg = GameMsg()
+    @property
+    def game_msg(self) -> GameMsg:
+        if self._game_msg is None:
+            self._game_msg = GameMsg(self.table("GameMsg"))
+        return self._game_msg
+
+    def close(self):
+        if self._game_msg is not None:
+            self._game_msg.close()
+            self._game_msg = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def dump_enum(ctx: ExtractionContext):
+    """xml에 있는 battlepoint 노드들을 BattlePointType enum을 만들기 편하게 출력"""
+    for name in ctx.enum("battlepointtype").values():
+        print(f'    {name.upper()} = "{name}"')
 
 
 # current version: 865
-def dump_battle_point_json():
+def dump_battle_point_json(ctx: ExtractionContext, out: str | Path = BATTLE_POINT_PATH):
     """
     XML과 DB를 읽고 JSON 형태로 덤프합니다.
     """
-    # EFGameMsg_Enums.xml을 읽고 dict으로 만듦
-    tree = ET.parse(f"{BASE}/EFGameMsg_Enums.xml")
-    root = tree.getroot()
-
-    battle_point_type: dict[int, str] = {}
-    stat_type: dict[int, str] = {}
-    for node in root.findall("NODE"):
-        node_type = node.attrib.get("Type")
-        if node_type == "battlepointtype":
-            battle_point_type[int(node.attrib["Index"])] = node.attrib["Name"]
-
-        elif node_type == "stattype":
-            stat_type[int(node.attrib["Index"])] = node.attrib["Name"]
+    battle_point_type = ctx.enum("battlepointtype")
+    stat_type = ctx.enum("stattype")
+    game_msg = ctx.game_msg
 
     # EFTable_BattlePoint.db을 읽기
-    con = sqlite3.connect(f"{BASE}/EFTable_BattlePoint.db")
+    con = sqlite3.connect(ctx.table("BattlePoint"))
     con.row_factory = sqlite3.Row
     cur = con.cursor()
 
@@ -133,10 +233,7 @@ def dump_battle_point_json():
         "SeasonCardBook",
         "ItemGradeOptionRandom",
     ]:
-        fname = f"{BASE}/EFTable_{db}.db"
-        if not Path(fname).exists():
-            raise ValueError(f"{fname} 파일이 없습니다.")
-        cur.execute(f"ATTACH DATABASE '{BASE}/EFTable_{db}.db' AS {db}")
+        cur.execute(f"ATTACH DATABASE ? AS {db}", (str(ctx.table(db)),))
 
     # 작업 시작
     result = {"attack": {}, "defense": {}}
@@ -159,7 +256,7 @@ def dump_battle_point_json():
         if bp == BattlePointType.PET_SPECIALTY:
             val_a = game_msg.find(
                 cur.execute(
-                    f"SELECT DESC FROM PetSpecialty WHERE PrimaryKey = {val_a}"
+                    "SELECT DESC FROM PetSpecialty WHERE PrimaryKey = ?", (val_a,)
                 ).fetchone()[0]
             )
 
@@ -167,7 +264,7 @@ def dump_battle_point_json():
         if bp in [BattlePointType.ABILITY_ATTACK, BattlePointType.ABILITY_DEFENSE]:
             val_a = game_msg.find(
                 cur.execute(
-                    f"SELECT Name FROM Ability WHERE PrimaryKey = {val_a}"
+                    "SELECT Name FROM Ability WHERE PrimaryKey = ?", (val_a,)
                 ).fetchone()[0]
             )
 
@@ -176,7 +273,8 @@ def dump_battle_point_json():
         if bp == BattlePointType.ELIXIR_SET:
             set_name = game_msg.find(
                 cur.execute(
-                    f"SELECT SetName FROM ItemElixirOptionSet WHERE PrimaryKey = {val_a}"
+                    "SELECT SetName FROM ItemElixirOptionSet WHERE PrimaryKey = ?",
+                    (val_a,),
                 ).fetchone()[0]
             )
             total_set_name = f"{set_name} {val_b}단계"
@@ -194,7 +292,8 @@ def dump_battle_point_json():
         ]:
             desc = game_msg.find(
                 cur.execute(
-                    f"SELECT Title FROM ItemElixirOption WHERE SecondaryKey = {val_a}"
+                    "SELECT Title FROM ItemElixirOption WHERE SecondaryKey = ?",
+                    (val_a,),
                 ).fetchone()[0]
             )
             desc += f" Lv.{val_b}"
@@ -269,16 +368,11 @@ def dump_battle_point_json():
 
             # ValueA가 4면 CombatEffect 사용
             elif val_a == 4:
-                msg = game_msg.find(
-                    cur.execute(
-                        f"SELECT Desc FROM CombatEffect WHERE PrimaryKey = {val_b}"
-                    ).fetchone()[0]
-                )
-                arg = cur.execute(f"""
-                    SELECT Action0ArgA
-                    FROM CombatEffect
-                    WHERE PrimaryKey = {val_b}
-                """).fetchone()[0]
+                desc, arg = cur.execute(
+                    "SELECT Desc, Action0ArgA FROM CombatEffect WHERE PrimaryKey = ?",
+                    (val_b,),
+                ).fetchone()
+                msg = game_msg.find(desc)
 
                 # 악세 연마 효과용
                 # 적에게 주는 피해 수치가 GameMsg에 그대로 있는 게 아니라, format해야 볼 수 있음
@@ -292,7 +386,9 @@ def dump_battle_point_json():
             ):
                 # 출처를 찾을 수 없으나, 계수를 통해서 추정
                 desc = cur.execute(
-                    f"SELECT ReplaceDesc FROM ItemGradeOptionRandom WHERE Type = {val_a} AND KeyIndex = {val_b}"
+                    "SELECT ReplaceDesc FROM ItemGradeOptionRandom "
+                    "WHERE Type = ? AND KeyIndex = ?",
+                    (val_a, val_b),
                 ).fetchone()[0]
                 msg = game_msg.find(desc)
             else:
@@ -308,7 +404,8 @@ def dump_battle_point_json():
         if bp == BattlePointType.CARD_SET:
             name, card_count, awakening_level_sum = cur.execute(
                 "SELECT Name, CardCount, AwakeningLevelSum FROM SeasonCardBook "
-                f"WHERE PrimaryKey = {val_a} and SecondaryKey = {val_b}"
+                "WHERE PrimaryKey = ? and SecondaryKey = ?",
+                (val_a, val_b),
             ).fetchone()
 
             name = game_msg.find(name)
@@ -350,8 +447,10 @@ def dump_battle_point_json():
                 result[pk][bp][val_a] = {}
             result[pk][bp][val_a][val_b] = val_c
 
+    con.close()
+
     # # dump as `BattlePoint.json`
-    with open("BattlePoint.json", "w", encoding="utf-8") as fp:
+    with open(out, "w", encoding="utf-8") as fp:
         fp.write(json.dumps(result, ensure_ascii=False, indent=2))
 
 
@@ -397,45 +496,38 @@ def dump_elixir_set():  # DEPRECATED
         json.dump(result_dict, fp, ensure_ascii=False)
 
 
-def build_player_class_dict() -> dict[int, str]:
+def build_player_class_dict(ctx: ExtractionContext) -> dict[int, str]:
     """
     클래스 id와 실제 한글명을 맞게 설정
     """
-    tree = ET.parse(f"{BASE}/EFGameMsg_Enums.xml")
-    root = tree.getroot()
-
-    player_class: dict[int, str] = {}
-    for node in root.findall("NODE"):
-        node_type = node.attrib.get("Type")
-        if node_type == "playerclass":
-            player_class[int(node.attrib["Index"])] = node.attrib["Name"]
-
     result = {}
-    for idx, keyword in player_class.items():
-        msg = game_msg.find(f"tip.name.enum_playerclass_{keyword}")
+    for idx, keyword in ctx.enum("playerclass").items():
+        msg = ctx.game_msg.find(f"tip.name.enum_playerclass_{keyword}")
         result[idx] = msg
     return result
 
 
-def dump_arkpassive_node_name():
+def dump_arkpassive_node_name(
+    ctx: ExtractionContext, out: str | Path = ARKPASSIVE_PATH
+):
     """
     진화, 깨달음, 도약 직업별 아크패시브 이름과 소모 포인트를 ArkPassive.json으로 저장
     이름만 저장하면 안 되는 이유는 동일한 이름의 노드가 많아서
     """
 
-    with sqlite3.connect(f"{BASE}/EFTable_ArkPassive.db") as conn:
+    with sqlite3.connect(ctx.table("ArkPassive")) as conn:
         cur = conn.cursor()
         rows = cur.execute(
             'SELECT Name, "Group", PCClass, ActivatePoint FROM ArkPassive'
         ).fetchall()
 
     dict_group = {0: "진화", 1: "깨달음", 2: "도약"}
-    dict_player_class = build_player_class_dict()
+    dict_player_class = build_player_class_dict(ctx)
 
     result = {}
 
     for name_id, group_id, pc_class_id, activate_point in rows:
-        name = game_msg.find(name_id)
+        name = ctx.game_msg.find(name_id)
         group = dict_group[group_id]
         player_class = dict_player_class[pc_class_id]
 
@@ -449,9 +541,28 @@ def dump_arkpassive_node_name():
                 result[group][player_class] = {}
             result[group][player_class][name] = activate_point
 
-    with open("ArkPassive.json", "w", encoding="utf-8") as fp:
+    with open(out, "w", encoding="utf-8") as fp:
         json.dump(result, fp, indent=2, ensure_ascii=False)
 
 
-dump_battle_point_json()
-# dump_arkpassive_node_name()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="게임 db에서 계수 추출")
+    parser.add_argument(
+        "target",
+        nargs="?",
+        default="battle_point",
+        choices=["battle_point", "arkpassive", "enum"],
+    )
+    parser.add_argument("--base", default=BASE, help="db 파일들이 있는 폴더")
+    parser.add_argument(
+        "--out", help="저장할 json 파일, 없으면 battlepoint/ 아래에 저장"
+    )
+    args = parser.parse_args()
+
+    with ExtractionContext(args.base) as ctx:
+        if args.target == "battle_point":
+            dump_battle_point_json(ctx, args.out or BATTLE_POINT_PATH)
+        elif args.target == "arkpassive":
+            dump_arkpassive_node_name(ctx, args.out or ARKPASSIVE_PATH)
+        else:
+            dump_enum(ctx)
@@ -0,0 +1,290 @@
+"""
+각인 조합 최적화
+
+캐릭터의 나머지 스펙은 그대로 두고, 가진 어빌리티 스톤과 각인서 안에서
+전투력이 가장 높은 각인 조합을 branch and bound로 찾습니다.
+
+$ python engraving_optimizer.py character_이름.json --stones 4 3 --slots 5
+"""
+
+import argparse
+import json
+from dataclasses import dataclass, field
+from itertools import permutations
+from typing import Literal
+
+from battlepoint.calculator import (
+    CARE_BATTLE_POINT_TYPES,
+    BattlePointCalculator,
+    BattlePointType,
+    Factor,
+    final_score,
+)
+from battlepoint.character import CharacterInformation, Engraving, Grade, to_grade
+from battlepoint.snapshot import load_character
+
+ABILITY_BATTLE_POINT_TYPES = {
+    BattlePointType.ABILITY_ATTACK,
+    BattlePointType.ABILITY_DEFENSE,
+}
+
+# 각인서가 주어지지 않으면 모든 각인을 유물 20장(4레벨)으로 가정
+DEFAULT_BOOK = (Grade.유물, 4)
+
+
+@dataclass
+class EngravingLoadout:
+    score: int
+    engravings: list[Engraving]
+    visited: int = 0  # 탐색한 노드 수
+    pruned: int = 0  # 상한으로 잘라낸 노드 수
+
+
+@dataclass
+class _Candidate:
+    name: str
+    grade: Grade | str
+    level: int
+    # 스톤 레벨별 (공격 점수 계수, 케어 점수 계수)
+    coeffs: dict[int, tuple[int, int]] = field(default_factory=dict)
+    # 스톤 레벨별 (공격 점수 증가율, 케어 점수 증가율)
+    gains: dict[int, tuple[float, float]] = field(default_factory=dict)
+
+
+def _product(factors: list[Factor]) -> float:
+    result = 1.0
+    for f in factors:
+        result *= 1 + f.coeff / pow(10, f.base)
+    return result
+
+
+def _replay(value: int, factors: list[Factor]) -> int:
+    for f in factors:
+        value += value * f.coeff // pow(10, f.base)
+    return value
+
+
+def _split_care(factors: list[Factor]) -> tuple[list[Factor], list[Factor]]:
+    """(공격 점수 계수, 케어 점수 계수)로 나눔"""
+    attack, care = [], []
+    for f in factors:
+        (care if f.battle_point_type in CARE_BATTLE_POINT_TYPES else attack).append(f)
+    return attack, care
+
+
+class EngravingOptimizer:
+    def __init__(self, calculator: BattlePointCalculator):
+        self.calculator = calculator
+
+    def candidates(
+        self,
+        score_type: Literal["attack", "defense"],
+        stone_levels: list[int],
+        books: dict[str, tuple[Grade | str, int]] | None,
+    ) -> list[_Candidate]:
+        d = self.calculator.dict_battle_point[score_type]
+        table_attack = d.get(BattlePointType.ABILITY_ATTACK, {})
+        table_defense = d.get(BattlePointType.ABILITY_DEFENSE, {})
+
+        result = []
+        for name in dict.fromkeys([*table_attack, *table_defense]):
+            if books is None:
+                grade, level = DEFAULT_BOOK
+            elif name in books:
+                grade, level = books[name]
+            else:
+                continue
+
+            candidate = _Candidate(name=name, grade=grade, level=level)
+            for stone_level in {0, *stone_levels}:
+                total_level = Engraving(
+                    name=name,
+                    ability_stone_level=stone_level,
+                    grade=candidate.grade,
+                    level=level,
+                ).total_level
+                coeff_attack = table_attack.get(name, {}).get(str(total_level), 0)
+                coeff_defense = table_defense.get(name, {}).get(str(total_level), 0)
+                candidate.coeffs[stone_level] = coeff_attack, coeff_defense
+                candidate.gains[stone_level] = (
+                    1 + coeff_attack / 10000,
+                    1 + coeff_defense / 10000,
+                )
+            result.append(candidate)
+
+        return result
+
+    def optimize(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"] = "attack",
+        *,
+        stone_levels: list[int] | None = None,
+        books: dict[str, tuple[Grade | str, int]] | None = None,
+        slots: int = 5,
+    ) -> EngravingLoadout:
+        """
+        stone_levels: 어빌리티 스톤이 올려주는 레벨 목록, 각 값은 각인 하나에만 적용 (ex. [4, 3])
+        books: 각인 이름별로 읽을 수 있는 (등급, 레벨), None이면 모두 유물 4레벨
+        slots: 장착할 수 있는 각인 수
+        """
+        stone_levels = sorted(stone_levels or [], reverse=True)
+        chain = self.calculator.calc_factors(char, score_type)
+        prefix, suffix = chain.split(ABILITY_BATTLE_POINT_TYPES)
+
+        attack_prefix, care_prefix = _split_care(prefix)
+        attack_suffix, care_suffix = _split_care(suffix)
+
+        # 각인 단계 직전 값은 조합과 관계없이 고정
+        start_attack = _replay(chain.base_attack_point, attack_prefix)
+        start_care = _replay(chain.base_health_point, care_prefix)
+        suffix_attack = _product(attack_suffix)
+        suffix_care = _product(care_suffix)
+
+        candidates = sorted(
+            self.candidates(score_type, stone_levels, books),
+            key=lambda c: c.gains[0][0] * c.gains[0][1],
+            reverse=True,
+        )
+        slots = min(slots, len(candidates))
+
+        # 스톤은 각인 하나에만 적용되므로, 스톤별로 가장 크게 오르는 비율만 상한에 곱함
+        stone_boost_attack, stone_boost_care = 1.0, 1.0
+        for stone_level in stone_levels:
+            stone_boost_attack *= max(
+                (c.gains[stone_level][0] / c.gains[0][0] for c in candidates),
+                default=1.0,
+            )
+            stone_boost_care *= max(
+                (c.gains[stone_level][1] / c.gains[0][1] for c in candidates),
+                default=1.0,
+            )
+
+        # i번째 이후 후보들의 스톤 없는 증가율을 큰 순서대로 정렬해둔 것
+        rest_attack = [
+            sorted((c.gains[0][0] for c in candidates[i:]), reverse=True)
+            for i in range(len(candidates) + 1)
+        ]
+        rest_care = [
+            sorted((c.gains[0][1] for c in candidates[i:]), reverse=True)
+            for i in range(len(candidates) + 1)
+        ]
+
+        def estimate(gain_attack: float, gain_care: float) -> float:
+            # 매 단계 내림을 무시한 값이므로 실제 점수보다 항상 크거나 같음
+            attack = start_attack * gain_attack * suffix_attack / 10000
+            if score_type == "attack":
+                return attack + 1
+            return attack + start_care * gain_care * suffix_care / 100 + 1
+
+        def evaluate(chosen: list[tuple[_Candidate, int]]) -> int:
+            result, result2 = start_attack, start_care
+            for candidate, stone_level in chosen:
+                coeff_attack, coeff_defense = candidate.coeffs[stone_level]
+                result += result * coeff_attack // 10000
+                result2 += result2 * coeff_defense // 10000
+            return final_score(
+                score_type,
+                _replay(result, attack_suffix),
+                _replay(result2, care_suffix),
+            )
+
+        best = EngravingLoadout(score=-1, engravings=[])
+
+        def search(
+            start: int,
+            chosen: list[_Candidate],
+            gain_attack: float,
+            gain_care: float,
+        ):
+            best.visited += 1
+            left = slots - len(chosen)
+            if left == 0:
+                # 조합이 정해지면 스톤을 어디에 쓸지 모두 시도
+                for assignment in _stone_assignments(len(chosen), stone_levels):
+                    pairs = list(zip(chosen, assignment))
+                    gain_attack, gain_care = 1.0, 1.0
+                    for c, stone_level in pairs:
+                        gain_attack *= c.gains[stone_level][0]
+                        gain_care *= c.gains[stone_level][1]
+                    if estimate(gain_attack, gain_care) <= best.score:
+                        continue
+
+                    score = evaluate(pairs)
+                    if score > best.score:
+                        best.score = score
+                        best.engravings = [
+                            Engraving(
+                                name=c.name,
+                                ability_stone_level=stone_level,
+                                grade=c.grade,
+                                level=c.level,
+                            )
+                            for c, stone_level in pairs
+                        ]
+                return
+
+            if len(candidates) - start < left:
+                return
+
+            # 남은 후보 중 가장 좋은 left개를 고르고 스톤도 가장 좋게 쓴다고 가정한 상한
+            bound_attack = gain_attack * stone_boost_attack
+            for g in rest_attack[start][:left]:
+                bound_attack *= g
+            bound_care = gain_care * stone_boost_care
+            for g in rest_care[start][:left]:
+                bound_care *= g
+            if estimate(bound_attack, bound_care) <= best.score:
+                best.pruned += 1
+                return
+
+            for i in range(start, len(candidates) - left + 1):
+                c = candidates[i]
+                search(
+                    i + 1,
+                    chosen + [c],
+                    gain_attack * c.gains[0][0],
+                    gain_care * c.gains[0][1],
+                )
+
+        search(0, [], 1.0, 1.0)
+        return best
+
+
+def _stone_assignments(count: int, stone_levels: list[int]) -> set[tuple[int, ...]]:
+    """count개의 각인에 스톤 레벨을 하나씩 나눠주는 모든 방법 (안 주는 경우는 0)"""
+    levels = (stone_levels + [0] * count)[: max(count, len(stone_levels))]
+    return {p[:count] for p in permutations(levels, len(levels))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="각인 조합 최적화")
+    parser.add_argument("character", help="OPENAPI 응답 json 파일")
+    parser.add_argument("--score-type", choices=["attack", "defense"])
+    parser.add_argument("--stones", type=int, nargs="*", default=[])
+    parser.add_argument("--slots", type=int, default=5)
+    parser.add_argument(
+        "--books",
+        help='각인서 json 파일 {"원한": ["유물", 4], ...}, 없으면 모두 유물 4',
+    )
+    args = parser.parse_args()
+
+    books = None
+    if args.books:
+        with open(args.books, "r", encoding="utf-8") as fp:
+            books = {k: (to_grade(v[0]), int(v[1])) for k, v in json.load(fp).items()}
+
+    calculator = BattlePointCalculator()
+    char = load_character(args.character)
+    score_type = args.score_type or ("defense" if char.is_supporter else "attack")
+
+    current = calculator.calc(char, score_type)
+    loadout = EngravingOptimizer(calculator).optimize(
+        char, score_type, stone_levels=args.stones, books=books, slots=args.slots
+    )
+
+    print(f"현재 전투력: {current / 100:,.2f}")
+    print(f"최적 전투력: {loadout.score / 100:,.2f}")
+    for e in loadout.engravings:
+        print(f"  {e.name} {e.grade} {e.level}레벨 스톤 {e.ability_stone_level}")
+    print(f"탐색 노드 {loadout.visited:,}개, 가지치기 {loadout.pruned:,}번")
@@ -0,0 +1,562 @@
+"""
+calc 차등 퍼징
+
+빠른 계산 경로(FactorChain 재계산, 스냅샷, 점수 캐시 등)는 BattlePointCalculator.calc와
+매 apply마다의 내림, 연마 효과의 base=8 계산까지 완전히 같은 값을 내야 합니다.
+BattlePoint.json, ArkPassive.json에 있는 값들로 무작위 CharacterInformation을 만들어서
+등록된 엔진마다 calc와 결과(점수 또는 예외 종류)를 비교하고,
+다르면 여전히 다른 값이 나오는 가장 작은 캐릭터로 줄여서 보여줍니다.
+
+같은 seed와 번호면 항상 같은 캐릭터가 만들어지므로 --replay로 다시 확인할 수 있습니다.
+
+$ python fuzz.py --cases 1000000 --workers 8 --seed 1
+$ python fuzz.py --seed 1 --replay 123456 --engine factor_chain
+"""
+
+import argparse
+import copy
+import os
+import random
+import re
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+from battlepoint import snapshot
+from battlepoint.calculator import BattlePointCalculator, BattlePointType
+from battlepoint.character import (
+    SUPPORTER_ARKPASSIVE_NODE,
+    VALID_BATTLE_STAT_TYPE,
+    ArkPassiveNode,
+    CharacterInformation,
+    Engraving,
+    Equipment,
+    EquipmentType,
+    Gem,
+    Grade,
+)
+from score_cache import ScoreCache
+
+SCORE_TYPES: tuple[Literal["attack", "defense"], ...] = ("attack", "defense")
+CHUNK_SIZE = 500
+
+# (char, score_type) -> 점수
+Engine = Callable[[CharacterInformation, Literal["attack", "defense"]], int]
+
+# 이름 -> calculator를 받아서 엔진을 만드는 함수
+ENGINES: dict[str, Callable[[BattlePointCalculator], Engine]] = {}
+
+
+def register_engine(name: str):
+    """
+    @register_engine("my_engine")
+    def my_engine(calculator):
+        return lambda char, score_type: ...
+    """
+
+    def decorator(factory: Callable[[BattlePointCalculator], Engine]):
+        ENGINES[name] = factory
+        return factory
+
+    return decorator
+
+
+@register_engine("factor_chain")
+def _factor_chain(calculator: BattlePointCalculator) -> Engine:
+    """calc_factors로 기록한 계수를 다시 적용"""
+    return lambda char, score_type: calculator.calc_factors(char, score_type).score()
+
+
+@register_engine("snapshot")
+def _snapshot(calculator: BattlePointCalculator) -> Engine:
+    """스냅샷으로 저장했다가 복원한 캐릭터로 계산"""
+    return lambda char, score_type: calculator.calc(
+        snapshot.loads(snapshot.dumps(char)), score_type
+    )
+
+
+@register_engine("score_cache")
+def _score_cache(calculator: BattlePointCalculator) -> Engine:
+    """
+    작업자마다 하나의 캐시를 계속 사용
+    calc가 읽는 값이 키에서 빠져 있으면 다른 캐릭터의 점수가 나와서 불일치로 잡힘
+    """
+    return ScoreCache(calculator).calc
+
+
+Outcome = tuple[str, int | str]  # ("ok", 점수) 또는 ("error", 예외 이름)
+
+
+def outcome(
+    fn: Engine, char: CharacterInformation, score_type: Literal["attack", "defense"]
+) -> Outcome:
+    try:
+        return "ok", fn(char, score_type)
+    except (KeyError, ValueError, TypeError, RuntimeError, ArithmeticError) as e:
+        return "error", type(e).__name__
+
+
+def _sample_regex(pattern: str, value: str) -> str | None:
+    """'공격력 +\\+([0-9.]+)%$' 같은 계수 키에 매치되는 문자열, 만들 수 없으면 None"""
+    text = pattern.removeprefix("^").removesuffix("$")
+    text = text.replace(" +\\+", " +").replace("([0-9.]+)", value)
+    text = re.sub(r"\\(.)", r"\1", text)
+    return text if re.match(pattern, text) else None
+
+
+class CharacterGenerator:
+    """BattlePoint.json, ArkPassive.json에 있는 값들로 무작위 CharacterInformation을 만듦"""
+
+    def __init__(self, calculator: BattlePointCalculator):
+        bp = calculator.dict_battle_point
+        ap = calculator.dict_arkpassive_point
+
+        def keys(battle_point_type: BattlePointType) -> list[str]:
+            return sorted(
+                {k for st in SCORE_TYPES for k in bp[st].get(battle_point_type, {})}
+            )
+
+        self.levels = keys(BattlePointType.LEVEL)
+        self.qualities = keys(BattlePointType.WEAPON_QUALITY)
+        self.engravings = keys(BattlePointType.ABILITY_ATTACK) + [
+            k
+            for k in keys(BattlePointType.ABILITY_DEFENSE)
+            if k not in bp["attack"][BattlePointType.ABILITY_ATTACK]
+        ]
+        # "회심 2단계" -> ("회심", 2), Equipment.elixir_set 형식
+        self.elixir_sets = [
+            (name, int(stage.removesuffix("단계")))
+            for name, stage in (
+                k.rsplit(" ", 1) for k in keys(BattlePointType.ELIXIR_SET)
+            )
+        ]
+        self.elixir_effects = keys(BattlePointType.ELIXIR_GRADE_ATTACK) + keys(
+            BattlePointType.ELIXIR_GRADE_DEFENSE
+        )
+        self.grinding_patterns = keys(BattlePointType.ACCESSORY_GRINDING_ATTACK) + keys(
+            BattlePointType.ACCESSORY_GRINDING_DEFENSE
+        )
+        self.grinding_effects = keys(
+            BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK
+        ) + keys(BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_DEFENSE)
+        self.bracelet_patterns = keys(BattlePointType.BRACELET_STATTYPE)
+        self.bracelet_effects = keys(BattlePointType.BRACELET_ADDONTYPE_ATTACK) + keys(
+            BattlePointType.BRACELET_ADDONTYPE_DEFENSE
+        )
+        self.gems = {
+            tier: sorted(levels, key=int)
+            for tier, levels in bp["attack"][BattlePointType.GEM].items()
+        }
+        self.card_sets = keys(BattlePointType.CARD_SET)
+
+        self.evolution = sorted(ap["진화"].items())
+        self.classes = sorted(set(ap["깨달음"]) & set(ap["도약"]))
+        self.enlightenment = {c: sorted(ap["깨달음"][c].items()) for c in self.classes}
+        self.leap = {c: sorted(ap["도약"][c].items()) for c in self.classes}
+
+    def _number(self, rng: random.Random, percent: bool) -> str:
+        if percent:
+            value = rng.choice([0.4, 0.95, 1.55, 2.6, 3.4, 4.0, 6.0])
+            return f"{value + rng.randint(0, 99) / 100:.2f}"
+        return str(rng.choice([80, 195, 390, 480, 960, rng.randint(1, 3000)]))
+
+    def _grinding(self, rng: random.Random, patterns: list[str]) -> str | None:
+        pattern = rng.choice(patterns)
+        return _sample_regex(pattern, self._number(rng, pattern.endswith("%$")))
+
+    def _nodes(
+        self, rng: random.Random, table: list[tuple[str, int]], tier_range: range
+    ) -> tuple[list[ArkPassiveNode], int]:
+        nodes, points = [], 0
+        for name, cost in rng.sample(table, min(len(table), rng.randint(0, 6))):
+            level = rng.randint(1, 5)
+            tier = rng.choice(tier_range)
+            nodes.append(ArkPassiveNode(name=name, level=level, tier=tier, desc=""))
+            points += cost * level
+        return nodes, points
+
+    def generate(self, rng: random.Random) -> CharacterInformation:
+        char = CharacterInformation.__new__(CharacterInformation)
+        char._data = None
+        char.base_attack_point = rng.randint(1, 200000)
+        char.base_health_point = rng.randint(1, 500000)
+        # 가끔 계수 표에 없는 레벨, 품질 등을 넣어서 KeyError 경로도 비교
+        char.character_level = int(rng.choice(self.levels)) + (rng.random() < 0.05)
+        char.character_class_name = rng.choice(self.classes)
+        char.combat_power = f"{rng.randint(0, 9999)}.{rng.randint(0, 99):02d}"
+        char.battle_stat = {
+            stat: rng.randint(0, 2500)
+            for stat in rng.sample(sorted(VALID_BATTLE_STAT_TYPE), rng.randint(0, 6))
+        }
+
+        char.equipments = []
+        if rng.random() < 0.95:
+            # 초월 단계와 등급은 툴팁에서 함께 읽히므로 둘 다 있거나 둘 다 None
+            transcendence = rng.random() < 0.5
+            char.equipments.append(
+                Equipment(
+                    name="무기",
+                    equipment_type=EquipmentType.무기,
+                    quality=int(rng.choice(self.qualities)),
+                    transcendence_level=7 if transcendence else None,
+                    transcendence_grade=rng.randint(0, 21) if transcendence else None,
+                )
+            )
+        for et in (
+            EquipmentType.투구,
+            EquipmentType.상의,
+            EquipmentType.하의,
+            EquipmentType.장갑,
+            EquipmentType.어깨,
+        ):
+            transcendence = rng.random() < 0.8
+            char.equipments.append(
+                Equipment(
+                    name=str(et),
+                    equipment_type=et,
+                    quality=rng.randint(0, 100),
+                    transcendence_level=rng.randint(1, 7) if transcendence else None,
+                    transcendence_grade=rng.randint(0, 21) if transcendence else None,
+                    elixir_effects=rng.sample(self.elixir_effects, rng.randint(0, 2)),
+                    elixir_set=(
+                        rng.choice(self.elixir_sets)
+                        if et == EquipmentType.투구 and rng.random() < 0.8
+                        else None
+                    ),
+                )
+            )
+        for et in (
+            EquipmentType.목걸이,
+            EquipmentType.귀걸이,
+            EquipmentType.귀걸이,
+            EquipmentType.반지,
+            EquipmentType.반지,
+        ):
+            effects = [self._grinding(rng, self.grinding_patterns) for _ in range(2)]
+            effects += rng.sample(self.grinding_effects, rng.randint(0, 2))
+            char.equipments.append(
+                Equipment(
+                    name=str(et),
+                    equipment_type=et,
+                    quality=rng.randint(0, 100),
+                    grinding_effects=[e for e in effects if e is not None],
+                )
+            )
+        if rng.random() < 0.95:
+            effects = [self._grinding(rng, self.bracelet_patterns)]
+            effects += rng.sample(self.bracelet_effects, rng.randint(0, 2))
+            effects.append(f"특화 +{rng.randint(1, 120)}")
+            char.equipments.append(
+                Equipment(
+                    name="팔찌",
+                    equipment_type=EquipmentType.팔찌,
+                    bracelet_effects=[e for e in effects if e is not None],
+                )
+            )
+        char.equipments.append(Equipment(name="스톤", equipment_type="어빌리티 스톤"))
+
+        char.engravings = [
+            Engraving(
+                name=name if rng.random() < 0.95 else "없는 각인",
+                ability_stone_level=rng.choice([0, 0, 1, 2, 3, 4]),
+                grade=rng.choice([Grade.유물, Grade.전설]),
+                level=rng.randint(0, 4),
+            )
+            for name in rng.sample(self.engravings, rng.randint(0, 5))
+        ]
+        char.card_sets = rng.sample(self.card_sets, rng.randint(0, 2))
+        char.gems = []
+        for _ in range(rng.randint(0, 11)):
+            tier = rng.choice(sorted(self.gems))
+            name = rng.choice(
+                ["겁화", "작열", "광휘"] if tier == "4" else ["멸화", "홍염"]
+            )
+            level = int(rng.choice(self.gems[tier]))
+            char.gems.append(Gem(name=name, tier=int(tier), level=level))
+
+        cls = char.character_class_name
+        stats = [
+            ArkPassiveNode(name=stat, level=rng.randint(1, 30), tier=1, desc="")
+            for stat in rng.sample(["치명", "특화", "신속"], 2)
+        ]
+        evolution, evolution_points = self._nodes(rng, self.evolution, range(2, 5))
+        enlightenment, enlightenment_points = self._nodes(
+            rng, self.enlightenment[cls], range(1, 5)
+        )
+        leap, leap_points = self._nodes(rng, self.leap[cls], range(1, 3))
+        supporter_node = SUPPORTER_ARKPASSIVE_NODE.get(cls)
+        costs = dict(self.enlightenment[cls])
+        if supporter_node in costs and rng.random() < 0.5:
+            # 서폿 각인 노드, is_supporter가 True가 됨
+            enlightenment.append(
+                ArkPassiveNode(name=supporter_node, level=1, tier=1, desc="")
+            )
+            enlightenment_points += costs[supporter_node]
+        char.arkpassive_nodes = {
+            "진화": stats + evolution,
+            "깨달음": enlightenment,
+            "도약": leap,
+        }
+
+        def available(points: int) -> int:
+            # 가끔 가진 포인트보다 많이 찍힌 캐릭터도 만들어서 ValueError 경로도 비교
+            return points + rng.randint(-5 if rng.random() < 0.03 else 0, 20)
+
+        char.arkpassive_available_points = {
+            "진화": available(evolution_points),
+            "깨달음": available(enlightenment_points),
+            "도약": available(leap_points),
+        }
+        char.karma = {
+            "진화": (rng.randint(0, 6), rng.randint(0, 30)),
+            "깨달음": (rng.randint(0, 6), rng.randint(0, 30)),
+            "도약": (rng.randint(0, 6), rng.randint(0, 30)),
+        }
+        return char
+
+
+def case_rng(seed: int, index: int) -> random.Random:
+    return random.Random(seed * 1_000_003 + index)
+
+
+@dataclass
+class Mismatch:
+    index: int
+    engine: str
+    score_type: Literal["attack", "defense"]
+    expected: Outcome
+    actual: Outcome
+
+
+def _shrink_candidates(char: CharacterInformation) -> Iterator[CharacterInformation]:
+    """char보다 작은 캐릭터들, 큰 덩어리를 지우는 것부터"""
+
+    def variant(mutate: Callable[[CharacterInformation], None]):
+        c = copy.deepcopy(char)
+        mutate(c)
+        return c
+
+    def shrink_list(get: Callable[[CharacterInformation], list]):
+        n = len(get(char))
+        size = n
+        while size >= 1:
+            for start in range(0, n, size):
+                yield variant(
+                    lambda c, s=start, z=size: get(c).__delitem__(slice(s, s + z))
+                )
+            size //= 2
+
+    yield from shrink_list(lambda c: c.equipments)
+    yield from shrink_list(lambda c: c.engravings)
+    yield from shrink_list(lambda c: c.gems)
+    yield from shrink_list(lambda c: c.card_sets)
+    for group in ("진화", "깨달음", "도약"):
+        yield from shrink_list(lambda c, g=group: c.arkpassive_nodes[g])
+    for i in range(len(char.equipments)):
+        for attr in ("elixir_effects", "grinding_effects", "bracelet_effects"):
+            yield from shrink_list(lambda c, i=i, a=attr: getattr(c.equipments[i], a))
+        if char.equipments[i].transcendence_grade is not None:
+
+            def no_transcendence(c: CharacterInformation, i: int = i):
+                c.equipments[i].transcendence_level = None
+                c.equipments[i].transcendence_grade = None
+
+            yield variant(no_transcendence)
+        if char.equipments[i].elixir_set is not None:
+            yield variant(lambda c, i=i: setattr(c.equipments[i], "elixir_set", None))
+    for stat in list(char.battle_stat):
+        yield variant(lambda c, s=stat: c.battle_stat.pop(s))
+    for group, value in char.karma.items():
+        if value != (0, 0):
+            yield variant(lambda c, g=group: c.karma.__setitem__(g, (0, 0)))
+    for attr in ("base_attack_point", "base_health_point"):
+        value = getattr(char, attr)
+        if value > 1:
+            yield variant(lambda c, a=attr, v=value: setattr(c, a, v // 2))
+            yield variant(lambda c, a=attr: setattr(c, a, 1))
+
+
+def shrink(
+    char: CharacterInformation,
+    fails: Callable[[CharacterInformation], bool],
+    max_steps: int = 10_000,
+) -> CharacterInformation:
+    """fails가 True인 동안 계속 줄임, 더 줄일 수 없으면 반환"""
+    steps = 0
+    improved = True
+    while improved and steps < max_steps:
+        improved = False
+        for candidate in _shrink_candidates(char):
+            steps += 1
+            if fails(candidate):
+                char = candidate
+                improved = True
+                break
+    return char
+
+
+def describe(char: CharacterInformation) -> str:
+    lines = [
+        (
+            f"직업 {char.character_class_name}, 레벨 {char.character_level}, "
+            f"기본 공격력 {char.base_attack_point}, 최대 생명력 {char.base_health_point}"
+        )
+    ]
+    if char.battle_stat:
+        lines.append(f"스탯 {char.battle_stat}")
+    for e in char.equipments:
+        fields = {
+            k: v
+            for k, v in (
+                ("quality", e.quality),
+                ("transcendence", (e.transcendence_level, e.transcendence_grade)),
+                ("elixir", e.elixir_effects),
+                ("elixir_set", e.elixir_set),
+                ("grinding", e.grinding_effects),
+                ("bracelet", e.bracelet_effects),
+            )
+            if v not in (-1, (None, None), [], None)
+        }
+        lines.append(f"{e.equipment_type} {fields}")
+    if char.engravings:
+        lines.append(
+            "각인 " + ", ".join(f"{e.name} {e.total_level}" for e in char.engravings)
+        )
+    if char.gems:
+        lines.append("보석 " + ", ".join(f"{g.tier}티어 {g.level}" for g in char.gems))
+    if char.card_sets:
+        lines.append(f"카드 {char.card_sets}")
+    for group, nodes in char.arkpassive_nodes.items():
+        if nodes:
+            lines.append(
+                f"{group} "
+                + ", ".join(f"{n.tier}티어 {n.name} Lv.{n.level}" for n in nodes)
+                + f" (포인트 {char.arkpassive_available_points[group]})"
+            )
+    lines.append(f"카르마 {char.karma}")
+    return "\n".join(lines)
+
+
+# 작업자 프로세스마다 하나씩
+_worker: tuple[BattlePointCalculator, CharacterGenerator, dict[str, Engine]] | None = (
+    None
+)
+
+
+def _init_worker(engine_names: list[str]):
+    global _worker
+    calculator = BattlePointCalculator()
+    _worker = (
+        calculator,
+        CharacterGenerator(calculator),
+        {name: ENGINES[name](BattlePointCalculator()) for name in engine_names},
+    )
+
+
+def _run_chunk(seed: int, start: int, stop: int) -> tuple[int, list[Mismatch]]:
+    calculator, generator, engines = _worker
+    mismatches = []
+    for index in range(start, stop):
+        char = generator.generate(case_rng(seed, index))
+        for score_type in SCORE_TYPES:
+            expected = outcome(calculator.calc, char, score_type)
+            for name, engine in engines.items():
+                actual = outcome(engine, char, score_type)
+                if actual != expected:
+                    mismatches.append(
+                        Mismatch(index, name, score_type, expected, actual)
+                    )
+    return stop - start, mismatches
+
+
+def run(
+    seed: int, cases: int, engine_names: list[str], workers: int
+) -> Iterator[tuple[int, list[Mismatch]]]:
+    """(끝난 캐릭터 수, 불일치 목록)을 chunk가 끝나는 대로 반환"""
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(engine_names,)
+    ) as executor:
+        futures = [
+            executor.submit(_run_chunk, seed, start, min(start + CHUNK_SIZE, cases))
+            for start in range(0, cases, CHUNK_SIZE)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def reproduce(
+    seed: int, mismatch: Mismatch, out_dir: Path | None = None
+) -> CharacterInformation:
+    """새로 만든 엔진으로 불일치를 다시 확인하고 가장 작은 캐릭터로 줄임"""
+    calculator = BattlePointCalculator()
+    char = CharacterGenerator(calculator).generate(case_rng(seed, mismatch.index))
+    factory = ENGINES[mismatch.engine]
+
+    def fails(c: CharacterInformation) -> bool:
+        expected = outcome(calculator.calc, c, mismatch.score_type)
+        return outcome(factory(calculator), c, mismatch.score_type) != expected
+
+    if not fails(char):
+        # score_cache처럼 이전 캐릭터들에 따라 결과가 달라지는 엔진
+        print("  새 엔진으로는 재현되지 않음 (이전 입력에 의존하는 불일치)")
+        return char
+
+    smallest = shrink(char, fails)
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"{mismatch.engine}_{seed}_{mismatch.index}.snap"
+        path.write_bytes(snapshot.dumps(smallest))
+        print(f"  {path}에 저장 (battlepoint.snapshot.loads로 읽기)")
+    return smallest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calc 차등 퍼징")
+    parser.add_argument("--cases", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--engine", action="append", choices=sorted(ENGINES), help="없으면 모두"
+    )
+    parser.add_argument("--replay", type=int, help="이 번호의 캐릭터만 다시 확인")
+    parser.add_argument("--max-reports", type=int, default=5, help="줄여서 보여줄 개수")
+    parser.add_argument("--out-dir", default="fuzz_failures", help="최소 재현 스냅샷")
+    args = parser.parse_args()
+
+    engine_names = args.engine or sorted(ENGINES)
+    if args.replay is not None:
+        calculator = BattlePointCalculator()
+        char = CharacterGenerator(calculator).generate(case_rng(args.seed, args.replay))
+        print(describe(char))
+        for score_type in SCORE_TYPES:
+            expected = outcome(calculator.calc, char, score_type)
+            for name in engine_names:
+                actual = outcome(ENGINES[name](calculator), char, score_type)
+                state = "같음" if actual == expected else "다름"
+                print(
+                    f"{name:<14} {score_type:<8} calc {expected} 엔진 {actual} {state}"
+                )
+        raise SystemExit
+
+    start = time.perf_counter()
+    done, found = 0, []
+    for count, mismatches in run(args.seed, args.cases, engine_names, args.workers):
+        done += count
+        found += mismatches
+        if done % (CHUNK_SIZE * 20) == 0 or done == args.cases:
+            elapsed = time.perf_counter() - start
+            print(
+                f"{done:,}/{args.cases:,} ({done / elapsed:,.0f}개/s) 불일치 {len(found)}"
+            )
+
+    found.sort(key=lambda m: (m.engine, m.index))
+    for mismatch in found[: args.max_reports]:
+        print(
+            f"\n[{mismatch.engine}] {mismatch.score_type} #{mismatch.index}: "
+            f"calc {mismatch.expected}, 엔진 {mismatch.actual}"
+        )
+        print(describe(reproduce(args.seed, mismatch, Path(args.out_dir))))
+    raise SystemExit(1 if found else 0)
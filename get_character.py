@@ -1,16 +1,67 @@
-import requests
-import json
-
-with open("jwt.txt", "r") as fp:
-    jwt = fp.read()
-with open("charnames.txt", "r", encoding="utf-8") as fp:
-    charnames = fp.readlines()
-for charname in charnames:
-    charname = charname.strip()
-    res = requests.get(
-        f"https://developer-lostark.game.onstove.com/armories/characters/{charname}",
-        headers={"authorization": f"Bearer {jwt}"},
-    ).json()
-
-    with open(f"character_{charname}.json", "w", encoding="utf-8") as fp:
-        json.dump(res, fp, ensure_ascii=False, indent=2)
+"""
+charnames.txt의 캐릭터들의 armory를 받아서 character_{이름}.json으로 저장
+
+받은 응답은 armory 캐시에 저장하고, TTL 안이면 다시 받지 않으며
+내용이 바뀐 경우에만 json 파일을 다시 씁니다.
+--needed-only이면 계산에 필요한 항목만 받습니다. (스킬, 아바타, 수집품 등 제외)
+캐시는 전체 응답과 따로 기록하므로 pipeline.py 등과 같은 캐시를 써도 됩니다.
+
+$ python get_character.py --ttl 3600
+$ python get_character.py --needed-only
+"""
+
+import argparse
+
+from armory_cache import ARMORY_CACHE_DIR, DEFAULT_TTL, ArmoryCache, fetch_cached
+from battlepoint.api import API_BASE, create_session
+from battlepoint.projection import CHARACTER_FILTERS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="armory 받기")
+    parser.add_argument("--charnames", default="charnames.txt")
+    parser.add_argument("--jwt", default="jwt.txt")
+    parser.add_argument("--api-base", default=API_BASE)
+    parser.add_argument("--cache", default=ARMORY_CACHE_DIR)
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        help=f"초, 없으면 캐릭터별로 저장된 값 (처음은 {DEFAULT_TTL})",
+    )
+    parser.add_argument("--force", action="store_true", help="TTL 무시하고 받기")
+    parser.add_argument(
+        "--needed-only",
+        action="store_true",
+        help="계산에 필요한 항목만 요청 (스킬, 아바타, 수집품 등 제외)",
+    )
+    args = parser.parse_args()
+
+    with open(args.jwt, "r") as fp:
+        jwt = fp.read().strip()
+    with open(args.charnames, "r", encoding="utf-8") as fp:
+        charnames = [line.strip() for line in fp if line.strip()]
+
+    filters = CHARACTER_FILTERS if args.needed_only else None
+    cache = ArmoryCache(args.cache)
+    counts = {"fresh": 0, "unchanged": 0, "changed": 0, "missing": 0}
+    with create_session(jwt, 1) as session:
+        for charname in charnames:
+            result = fetch_cached(
+                cache,
+                session,
+                charname,
+                args.api_base,
+                ttl=args.ttl,
+                force=args.force,
+                filters=filters,
+            )
+            counts[result.status] += 1
+
+            if result.status == "changed":
+                with open(f"character_{charname}.json", "wb") as fp:
+                    fp.write(cache.read(result.entry.content_hash))
+            print(charname, result.status)
+
+    print(
+        f"새로 받음 {counts['changed']}, 같음 {counts['unchanged']}, "
+        f"TTL 안 {counts['fresh']}, 없음 {counts['missing']}"
+    )
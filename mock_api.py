@@ -0,0 +1,116 @@
+"""
+로컬 테스트용 LOSTARK OPENAPI 흉내
+
+character_*.json이 있는 디렉토리를 하나의 원정대로 보고 아래 API를 제공합니다.
+GET /characters/{characterName}/siblings
+GET /armories/characters/{characterName}?filters=profiles+equipment+...
+
+$ python mock_api.py ./characters --port 8080 --latency 0.2
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from battlepoint import projection
+
+# filters 이름 -> 최상위 항목 이름
+SECTION_BY_FILTER = {v: k for k, v in projection.ARMORY_FILTERS.items()}
+
+
+class MockLostArkAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory: str, latency: float = 0.0):
+        super().__init__(address, MockLostArkHandler)
+        self.latency = latency
+        self.request_count = 0  # not thread-safe, 대략적인 값
+
+        # 캐릭터 이름 -> 파일 경로
+        self.armories: dict[str, str] = {}
+        self.siblings: list[dict] = []
+        for fname in sorted(glob.glob(os.path.join(directory, "character_*.json"))):
+            with open(fname, "rb") as fp:
+                profile = json.load(fp)["ArmoryProfile"]
+            self.armories[profile["CharacterName"]] = fname
+            self.siblings.append(
+                {
+                    "ServerName": profile.get("ServerName"),
+                    "CharacterName": profile["CharacterName"],
+                    "CharacterLevel": profile["CharacterLevel"],
+                    "CharacterClassName": profile["CharacterClassName"],
+                    "ItemAvgLevel": profile.get("ItemAvgLevel"),
+                    "ItemMaxLevel": profile.get("ItemAvgLevel"),
+                }
+            )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class MockLostArkHandler(BaseHTTPRequestHandler):
+    server: MockLostArkAPI
+
+    def do_GET(self):
+        self.server.request_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        # parse_qs는 +를 공백으로 바꾸므로 직접 나눔
+        query = dict(q.partition("=")[::2] for q in url.query.split("&") if q)
+
+        match parts:
+            case ["characters", name, "siblings"]:
+                if name in self.server.armories:
+                    body = json.dumps(self.server.siblings, ensure_ascii=False)
+                else:
+                    body = "null"
+                self._send(body.encode("utf-8"))
+            case ["armories", "characters", name]:
+                fname = self.server.armories.get(name)
+                if fname is None:
+                    self._send(b"null")
+                    return
+                with open(fname, "rb") as fp:
+                    body = fp.read()
+                if filters := query.get("filters"):
+                    sections = tuple(
+                        SECTION_BY_FILTER[f]
+                        for f in unquote(filters).split("+")
+                        if f in SECTION_BY_FILTER
+                    )
+                    body = projection.project(body, sections)
+                self._send(body)
+            case _:
+                self.send_error(404)
+
+    def _send(self, body: bytes, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 OPENAPI 목 서버")
+    parser.add_argument("directory", help="character_*.json이 있는 디렉토리")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연(초)")
+    args = parser.parse_args()
+
+    server = MockLostArkAPI((args.host, args.port), args.directory, args.latency)
+    print(f"{server.base_url} 에서 {len(server.armories)}개 캐릭터 제공 중")
+    server.serve_forever()
@@ -0,0 +1,384 @@
+"""
+길드 레이드 파티 편성
+
+점수를 계산한 캐릭터들(딜러는 공격 점수, 서폿은 버프/케어 점수)을 4인 또는 8인 공격대로 나눕니다.
+- 4명마다 서폿 1명
+- 같은 원정대(account)의 캐릭터는 같은 공격대에 들어갈 수 없음
+- 딜러/서폿 최소 점수보다 낮은 캐릭터는 제외
+
+공격대 점수는 딜러 점수 합 + support_weight * 서폿 점수 합이고,
+가장 약한 공격대를 최대로(min) 또는 전체 합을 최대로(total) 만드는 편성을 찾습니다.
+약한 공격대부터 채우는 greedy 배치에서 시작해서, 공격대끼리 혹은 공격대와 대기 인원 사이에
+같은 역할의 캐릭터를 맞바꾸는 local search로 더 좋아지지 않을 때까지 개선합니다.
+
+캐릭터 목록은 pipeline.py의 ndjson 결과나 같은 형식의 json 배열입니다.
+{"name": "이름", "account": "원정대 대표 캐릭터", "score_type": "attack", "score": 123456}
+account가 없으면 캐릭터마다 다른 원정대로 봅니다.
+
+$ python party_optimizer.py scores.ndjson --raid-size 8 --objective min --min-attack 400000
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Literal
+
+EPSILON = 1e-9
+
+
+@dataclass
+class Member:
+    name: str
+    account: str
+    score_type: Literal["attack", "defense"]
+    score: int
+
+
+@dataclass
+class Raid:
+    dealers: list[Member]
+    supporters: list[Member]
+    strength: float
+
+    def parties(self, support_weight: float) -> list[list[Member]]:
+        """4인 파티로 나눔, 8인이면 두 파티 점수 차이가 가장 작게"""
+        if len(self.supporters) <= 1:
+            return [self.supporters + self.dealers]
+
+        def party_strength(supporter: Member, dealers: tuple[Member, ...]) -> float:
+            return sum(d.score for d in dealers) + support_weight * supporter.score
+
+        best, best_gap = None, None
+        first, second = self.supporters
+        for chosen in combinations(self.dealers, len(self.dealers) // 2):
+            rest = tuple(d for d in self.dealers if d not in chosen)
+            for a, b in ((first, second), (second, first)):
+                gap = abs(party_strength(a, chosen) - party_strength(b, rest))
+                if best_gap is None or gap < best_gap:
+                    best, best_gap = ([a, *chosen], [b, *rest]), gap
+        return list(best)
+
+
+@dataclass
+class PartyPlan:
+    raids: list[Raid]
+    bench: list[Member] = field(default_factory=list)  # 편성되지 않은 캐릭터
+    excluded: list[Member] = field(default_factory=list)  # 최소 점수 미달
+    upper_bound: float = 0.0  # 원정대 조건을 무시했을 때 objective의 상한
+    moves: int = 0  # local search에서 맞바꾼 횟수
+    elapsed: float = 0.0
+
+    @property
+    def weakest(self) -> float:
+        return min((r.strength for r in self.raids), default=0.0)
+
+    @property
+    def total(self) -> float:
+        return sum(r.strength for r in self.raids)
+
+
+def load_pool(fname: str) -> list[Member]:
+    """json 배열 또는 ndjson, 실패한 기록(error)이나 점수가 없는 기록은 제외"""
+    with open(fname, "r", encoding="utf-8") as fp:
+        text = fp.read()
+    if text.lstrip().startswith("["):
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    pool = []
+    for r in records:
+        if r.get("error") or r.get("score") is None:
+            continue
+        pool.append(
+            Member(
+                name=r["name"],
+                account=r.get("account") or r["name"],
+                score_type=r.get("score_type") or "attack",
+                score=int(r["score"]),
+            )
+        )
+    return pool
+
+
+class PartyOptimizer:
+    def __init__(
+        self,
+        *,
+        raid_size: int = 8,
+        objective: Literal["min", "total"] = "min",
+        support_weight: float = 1.0,
+        min_attack: int = 0,
+        min_defense: int = 0,
+        time_limit: float = 1.0,
+    ):
+        if raid_size not in (4, 8):
+            raise ValueError(f"공격대 인원은 4 또는 8이어야 합니다: {raid_size}")
+        self.raid_size = raid_size
+        self.objective = objective
+        self.support_weight = support_weight
+        self.min_attack = min_attack
+        self.min_defense = min_defense
+        self.time_limit = time_limit
+
+        self.supporter_slots = raid_size // 4
+        self.dealer_slots = raid_size - self.supporter_slots
+
+    def weight(self, m: Member) -> float:
+        return self.support_weight * m.score if m.score_type == "defense" else m.score
+
+    def better(self, old: list[float], new: list[float]) -> bool:
+        """
+        바뀐 공격대들의 점수만으로 비교
+        가장 약한 공격대부터 차례로 비교(leximin)하므로, 나머지 공격대가 같으면 전체를 비교한 것과 같음
+        """
+        if self.objective == "total":
+            delta = sum(new) - sum(old)
+            if abs(delta) > EPSILON:
+                return delta > 0
+        for o, n in zip(sorted(old), sorted(new)):
+            if abs(n - o) > EPSILON:
+                return n > o
+        return False
+
+    def optimize(self, pool: list[Member], raids: int | None = None) -> PartyPlan:
+        """raids가 없으면 역할별 인원으로 만들 수 있는 최대 공격대 수"""
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+
+        dealers, supporters, excluded = [], [], []
+        for m in pool:
+            if m.score_type == "defense":
+                (supporters if m.score >= self.min_defense else excluded).append(m)
+            else:
+                (dealers if m.score >= self.min_attack else excluded).append(m)
+        dealers.sort(key=lambda m: m.score, reverse=True)
+        supporters.sort(key=lambda m: m.score, reverse=True)
+
+        if raids is None:
+            raids = min(
+                len(dealers) // self.dealer_slots,
+                len(supporters) // self.supporter_slots,
+            )
+
+        # 원정대 조건 때문에 greedy로 모두 채우지 못하면 공격대 수를 줄여서 다시 시도
+        while raids > 0:
+            state = _State(self, raids, dealers, supporters)
+            if state.is_full():
+                break
+            raids -= 1
+        else:
+            return PartyPlan(
+                raids=[],
+                bench=dealers + supporters,
+                excluded=excluded,
+                elapsed=time.perf_counter() - start,
+            )
+
+        moves = state.improve(deadline)
+        plan = state.plan()
+        plan.excluded = excluded
+        plan.moves = moves
+        plan.upper_bound = self.upper_bound(dealers, supporters, raids)
+        plan.elapsed = time.perf_counter() - start
+        return plan
+
+    def upper_bound(
+        self, dealers: list[Member], supporters: list[Member], raids: int
+    ) -> float:
+        """가장 높은 캐릭터들로 채우고 고르게 나눴다고 가정한 값, 실제 결과와의 차이를 보여주는 용도"""
+        total = sum(m.score for m in dealers[: raids * self.dealer_slots])
+        total += self.support_weight * sum(
+            m.score for m in supporters[: raids * self.supporter_slots]
+        )
+        return total / raids if self.objective == "min" else total
+
+
+class _State:
+    """공격대별 인원, 점수, 원정대 수를 들고 맞바꾸기를 O(1)로 평가"""
+
+    def __init__(
+        self,
+        optimizer: PartyOptimizer,
+        raids: int,
+        dealers: list[Member],
+        supporters: list[Member],
+    ):
+        self.optimizer = optimizer
+        self.strength = [0.0] * raids
+        self.accounts: list[dict[str, int]] = [{} for _ in range(raids)]
+        # 역할별로 공격대 인원과 대기 인원을 따로 관리
+        self.members = {
+            "attack": [[] for _ in range(raids)],
+            "defense": [[] for _ in range(raids)],
+        }
+        self.bench = {"attack": [], "defense": []}
+        self.slots = {
+            "attack": optimizer.dealer_slots,
+            "defense": optimizer.supporter_slots,
+        }
+
+        # 서폿부터 배치해야 딜러를 배치할 때 공격대 점수 차이를 함께 고려함
+        for m in [*supporters, *dealers]:
+            self._place(m)
+
+    def _place(self, m: Member):
+        members = self.members[m.score_type]
+        target = None
+        for r in range(len(self.strength)):
+            if len(members[r]) >= self.slots[m.score_type]:
+                continue
+            if self.accounts[r].get(m.account):
+                continue
+            if target is None or self.strength[r] < self.strength[target]:
+                target = r
+
+        if target is None:
+            self.bench[m.score_type].append(m)
+            return
+        members[target].append(m)
+        self.strength[target] += self.optimizer.weight(m)
+        self.accounts[target][m.account] = self.accounts[target].get(m.account, 0) + 1
+
+    def is_full(self) -> bool:
+        return all(
+            len(raid) == self.slots[score_type]
+            for score_type, raids in self.members.items()
+            for raid in raids
+        )
+
+    def _swap_account(self, r: int, out: Member, into: Member):
+        counts = self.accounts[r]
+        counts[out.account] -= 1
+        if not counts[out.account]:
+            del counts[out.account]
+        counts[into.account] = counts.get(into.account, 0) + 1
+
+    def improve(self, deadline: float) -> int:
+        """더 좋아지는 맞바꾸기가 없거나 시간이 다 될 때까지 반복"""
+        moves = 0
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for score_type in ("attack", "defense"):
+                moves_type = self._improve_raids(score_type, deadline)
+                moves_type += self._improve_bench(score_type)
+                if moves_type:
+                    moves += moves_type
+                    improved = True
+        return moves
+
+    def _improve_raids(self, score_type: str, deadline: float) -> int:
+        """서로 다른 공격대의 같은 역할 캐릭터 맞바꾸기"""
+        better = self.optimizer.better
+        weight = self.optimizer.weight
+        members = self.members[score_type]
+        strength = self.strength
+        accounts = self.accounts
+        moves = 0
+
+        for a in range(len(members)):
+            if time.perf_counter() >= deadline:
+                break
+            for b in range(a + 1, len(members)):
+                for i, x in enumerate(members[a]):
+                    for j, y in enumerate(members[b]):
+                        if x.account != y.account and (
+                            accounts[b].get(x.account) or accounts[a].get(y.account)
+                        ):
+                            continue
+                        delta = weight(y) - weight(x)
+                        new = [strength[a] + delta, strength[b] - delta]
+                        if not better([strength[a], strength[b]], new):
+                            continue
+
+                        members[a][i], members[b][j] = y, x
+                        strength[a], strength[b] = new
+                        self._swap_account(a, x, y)
+                        self._swap_account(b, y, x)
+                        x = y
+                        moves += 1
+        return moves
+
+    def _improve_bench(self, score_type: str) -> int:
+        """공격대 캐릭터와 대기 캐릭터 맞바꾸기"""
+        better = self.optimizer.better
+        weight = self.optimizer.weight
+        members = self.members[score_type]
+        bench = self.bench[score_type]
+        moves = 0
+
+        for r in range(len(members)):
+            for i, x in enumerate(members[r]):
+                for k, y in enumerate(bench):
+                    if x.account != y.account and self.accounts[r].get(y.account):
+                        continue
+                    new = self.strength[r] + weight(y) - weight(x)
+                    if not better([self.strength[r]], [new]):
+                        continue
+
+                    members[r][i], bench[k] = y, x
+                    self.strength[r] = new
+                    self._swap_account(r, x, y)
+                    x = y
+                    moves += 1
+        return moves
+
+    def plan(self) -> PartyPlan:
+        raids = [
+            Raid(
+                dealers=sorted(dealers, key=lambda m: m.score, reverse=True),
+                supporters=sorted(supporters, key=lambda m: m.score, reverse=True),
+                strength=strength,
+            )
+            for dealers, supporters, strength in zip(
+                self.members["attack"], self.members["defense"], self.strength
+            )
+        ]
+        raids.sort(key=lambda r: r.strength, reverse=True)
+        bench = sorted(
+            self.bench["attack"] + self.bench["defense"],
+            key=lambda m: m.score,
+            reverse=True,
+        )
+        return PartyPlan(raids=raids, bench=bench)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="길드 레이드 파티 편성")
+    parser.add_argument("pool", help="캐릭터 점수 파일 (json 배열 또는 ndjson)")
+    parser.add_argument("--raid-size", type=int, choices=[4, 8], default=8)
+    parser.add_argument("--raids", type=int, help="공격대 수, 없으면 가능한 최대")
+    parser.add_argument("--objective", choices=["min", "total"], default="min")
+    parser.add_argument("--support-weight", type=float, default=1.0)
+    parser.add_argument("--min-attack", type=int, default=0, help="딜러 최소 점수")
+    parser.add_argument("--min-defense", type=int, default=0, help="서폿 최소 점수")
+    parser.add_argument("--time-limit", type=float, default=1.0, help="초")
+    args = parser.parse_args()
+
+    optimizer = PartyOptimizer(
+        raid_size=args.raid_size,
+        objective=args.objective,
+        support_weight=args.support_weight,
+        min_attack=args.min_attack,
+        min_defense=args.min_defense,
+        time_limit=args.time_limit,
+    )
+    plan = optimizer.optimize(load_pool(args.pool), args.raids)
+
+    for idx, raid in enumerate(plan.raids, 1):
+        print(f"공격대 {idx} ({raid.strength / 100:,.2f})")
+        for party in raid.parties(args.support_weight):
+            print("  " + ", ".join(f"{m.name}({m.score / 100:,.2f})" for m in party))
+    if plan.bench:
+        print(f"대기 {len(plan.bench)}명: " + ", ".join(m.name for m in plan.bench))
+    if plan.excluded:
+        print(f"최소 점수 미달 {len(plan.excluded)}명")
+
+    value = plan.weakest if args.objective == "min" else plan.total
+    print(
+        f"{args.objective} {value / 100:,.2f} (상한 {plan.upper_bound / 100:,.2f}), "
+        f"맞바꾸기 {plan.moves}번, {plan.elapsed:.3f}초"
+    )
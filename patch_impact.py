@@ -0,0 +1,328 @@
+"""
+패치로 바뀐 계수에 영향을 받는 캐릭터만 다시 계산
+
+dump.py로 BattlePoint.json을 새로 뽑으면 보통 몇 개의 테이블(카드 세트 하나, 팔찌 효과 몇 개 등)만 바뀝니다.
+캐릭터를 계산할 때 calc가 읽은 계수 키(각인 이름+레벨, 카드 세트, 엘릭서 옵션, 연마 효과 등)를
+캐릭터 목록으로 역색인해두고, 두 BattlePoint.json의 차이에 걸리는 캐릭터만 다시 계산합니다.
+
+$ python patch_impact.py index "character*.json"
+$ python patch_impact.py diff BattlePoint.old.json battlepoint/BattlePoint.json --rescore
+"""
+
+import argparse
+import glob
+import json
+import re
+from collections.abc import Iterator
+from enum import Enum
+from typing import Any
+
+from battlepoint.calculator import (
+    BATTLE_POINT_PATH,
+    BattlePointCalculator,
+    BattlePointType,
+)
+from battlepoint.character import CharacterInformation
+from battlepoint.quarantine import RECORD_ERRORS, ErrorCounters, classify
+from battlepoint.snapshot import load_character
+
+INDEX_FILE = ".impact_index.json"
+
+SCORE_TYPES = ("attack", "defense")
+
+# find_by_regex로 찾는 테이블, 키가 정규식이라 캐릭터 쪽 입력(연마 효과 문자열)을 대신 기록
+REGEX_BATTLE_POINT_TYPES = {
+    BattlePointType.ACCESSORY_GRINDING_ATTACK.value,
+    BattlePointType.ACCESSORY_GRINDING_DEFENSE.value,
+    BattlePointType.BRACELET_STATTYPE.value,
+}
+
+# 계수 키, ("attack", "card_set", "가디언의 광기 6세트 (12각성합계)") 같은 BattlePoint.json 경로
+Key = tuple[str, ...]
+
+
+def _key_part(k: Any) -> str:
+    return k.value if isinstance(k, Enum) else str(k)
+
+
+class _KeyRecorder:
+    """
+    BattlePoint.json dict를 감싸서 calc가 읽은 경로를 기록합니다.
+    없는 키를 찾은 것도 기록하므로, 패치로 키가 추가되는 경우도 잡을 수 있습니다.
+    """
+
+    def __init__(self, data: dict, path: Key, sink: set[Key]):
+        self.data = data
+        self.path = path
+        self.sink = sink
+
+    def _child(self, k: Any, value: Any) -> Any:
+        path = self.path + (_key_part(k),)
+        if isinstance(value, dict):
+            return _KeyRecorder(value, path, self.sink)
+        self.sink.add(path)
+        return value
+
+    def __getitem__(self, k: Any) -> Any:
+        try:
+            value = self.data[k]
+        except KeyError:
+            self.sink.add(self.path + (_key_part(k),))
+            raise
+        return self._child(k, value)
+
+    def get(self, k: Any, default: Any = None) -> Any:
+        if k not in self.data:
+            self.sink.add(self.path + (_key_part(k),))
+            return default
+        return self._child(k, self.data[k])
+
+    def __contains__(self, k: Any) -> bool:
+        self.sink.add(self.path + (_key_part(k),))
+        return k in self.data
+
+    def keys(self) -> "_KeyRecorder":
+        # `et in d[...].keys()`처럼 멤버십 검사에만 쓰임
+        return self
+
+    def __iter__(self) -> Iterator[Any]:
+        # 전체를 훑는 경우는 테이블 전체에 의존
+        self.sink.add(self.path)
+        return iter(self.data)
+
+    def items(self):
+        self.sink.add(self.path)
+        return self.data.items()
+
+
+class _RecordingCalculator(BattlePointCalculator):
+    """calc가 읽은 계수 키를 기록하는 calculator"""
+
+    def __init__(self, calculator: BattlePointCalculator):
+        self.__dict__.update(calculator.__dict__)
+        self.verbose = False
+        self.trace = None
+        self._raw_battle_point = calculator.dict_battle_point
+
+    def lookups(
+        self,
+        char: CharacterInformation,
+        score_type: str,
+        sink: set[Key] | None = None,
+    ) -> set[Key]:
+        """
+        calc가 읽은 계수 키
+        sink를 주면 거기에 기록하므로 calc가 실패해도 그 전까지 읽은 키는 sink에 남음
+        """
+        if sink is None:
+            sink = set()
+        self.dict_battle_point = {
+            score_type: _KeyRecorder(
+                self._raw_battle_point[score_type], (score_type,), sink
+            )
+        }
+        try:
+            self.calc(char, score_type)
+        finally:
+            self.dict_battle_point = self._raw_battle_point
+        return sink
+
+    def find_by_regex(self, str_in: str, dict_in: Any) -> int:
+        # 정규식 대신 입력 문자열을 기록하고, 바뀐 정규식과 매치해서 영향을 판단
+        if not isinstance(dict_in, _KeyRecorder):  # d.get(..., {})로 받은 빈 테이블
+            return super().find_by_regex(str_in, dict_in)
+        dict_in.sink.add(dict_in.path + (str_in,))
+        return super().find_by_regex(str_in, dict_in.data)
+
+    def find_by_str(self, str_in: str, dict_in: Any) -> int:
+        if not isinstance(dict_in, _KeyRecorder):
+            return super().find_by_str(str_in, dict_in)
+        dict_in.sink.add(dict_in.path + (str_in,))
+        return dict_in.data.get(str_in, 0)
+
+
+def diff_coefficients(old: Any, new: Any, path: Key = ()) -> list[Key]:
+    """두 BattlePoint.json에서 값이 바뀌거나 추가/삭제된 경로 목록"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        result = []
+        for k in old.keys() | new.keys():
+            if k not in old or k not in new:
+                result.append(path + (k,))
+            else:
+                result.extend(diff_coefficients(old[k], new[k], path + (k,)))
+        return sorted(result)
+    if old != new:
+        return [path]
+    return []
+
+
+class ImpactIndex:
+    """계수 키 -> 그 키를 읽은 캐릭터들의 역색인"""
+
+    def __init__(self):
+        self.characters: list[str] = []
+        self.keys: dict[Key, set[int]] = {}
+        self._ids: dict[str, int] = {}
+
+    def _id(self, character: str) -> int:
+        idx = self._ids.get(character)
+        if idx is None:
+            idx = self._ids[character] = len(self.characters)
+            self.characters.append(character)
+        return idx
+
+    def add(self, character: str, keys: set[Key]):
+        idx = self._id(character)
+        for key in keys:
+            self.keys.setdefault(key, set()).add(idx)
+
+    def remove(self, character: str):
+        idx = self._ids.get(character)
+        if idx is None:
+            return
+        for ids in self.keys.values():
+            ids.discard(idx)
+
+    def affected(self, changes: list[Key]) -> dict[str, set[str]]:
+        """바뀐 경로마다 영향을 받는 캐릭터, {캐릭터: {"attack", "defense"}}"""
+        result: dict[str, set[str]] = {}
+        for key, ids in self.keys.items():
+            if ids and any(_depends(key, change) for change in changes):
+                for idx in ids:
+                    result.setdefault(self.characters[idx], set()).add(key[0])
+        return result
+
+    def save(self, fname: str):
+        data = {
+            "characters": self.characters,
+            "keys": [[list(key), sorted(ids)] for key, ids in self.keys.items() if ids],
+        }
+        with open(fname, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, fname: str) -> "ImpactIndex":
+        with open(fname, "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+
+        index = cls()
+        for character in data["characters"]:
+            index._id(character)
+        for key, ids in data["keys"]:
+            index.keys[tuple(key)] = set(ids)
+        return index
+
+
+def _depends(key: Key, change: Key) -> bool:
+    if len(key) >= 3 and len(change) >= 3 and key[1] in REGEX_BATTLE_POINT_TYPES:
+        # key[2]는 캐릭터의 효과 문자열, change[2]는 바뀐 정규식
+        return key[:2] == change[:2] and re.match(change[2], key[2]) is not None
+
+    # 한 쪽이 다른 쪽의 상위 경로면 영향 있음
+    n = min(len(key), len(change))
+    return key[:n] == change[:n]
+
+
+def build_index(
+    calculator: BattlePointCalculator,
+    fnames: list[str],
+    index: ImpactIndex | None = None,
+    counters: ErrorCounters | None = None,
+) -> ImpactIndex:
+    """
+    읽지 못한 캐릭터는 건너뛰고 (이미 색인된 키는 그대로 둠), 계산에 실패한 캐릭터는
+    실패하기 전까지 읽은 키로 색인합니다. 새 계수에서는 계산될 수 있으므로 패치 영향에 포함되어야 함
+    실패는 counters에 분류해서 셈
+    """
+    index = index or ImpactIndex()
+    counters = counters if counters is not None else ErrorCounters()
+    recorder = _RecordingCalculator(calculator)
+    for fname in fnames:
+        try:
+            char = load_character(fname)
+        except RECORD_ERRORS as e:
+            counters.fail(classify("read" if isinstance(e, OSError) else "parse", e))
+            continue
+
+        keys: set[Key] = set()
+        failed = None
+        for score_type in SCORE_TYPES:
+            try:
+                recorder.lookups(char, score_type, keys)
+            except RECORD_ERRORS as e:
+                failed = failed or e
+        index.remove(fname)
+        index.add(fname, keys)
+        if failed is None:
+            counters.ok()
+        else:
+            counters.fail(classify("calc", failed))
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="패치 영향 분석")
+    parser.add_argument("--index", default=INDEX_FILE, help="역색인 파일")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("index", help="캐릭터들의 계수 키 역색인 생성")
+    p.add_argument("pattern", nargs="?", default="character*.json")
+    p.add_argument("--battle-point", default=BATTLE_POINT_PATH)
+
+    p = sub.add_parser("diff", help="두 BattlePoint.json 비교")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--rescore", action="store_true", help="영향 받는 캐릭터 재계산")
+    args = parser.parse_args()
+
+    if args.command == "index":
+        fnames = glob.glob(args.pattern)
+        counters = ErrorCounters()
+        index = build_index(
+            BattlePointCalculator(args.battle_point), fnames, counters=counters
+        )
+        index.save(args.index)
+        print(f"{len(index.characters)}캐릭터, {len(index.keys)}개 키")
+        if counters.failed:
+            print(counters.report())
+
+    if args.command == "diff":
+        with open(args.old, "r", encoding="utf-8") as fp:
+            old = json.load(fp)
+        with open(args.new, "r", encoding="utf-8") as fp:
+            new = json.load(fp)
+
+        changes = diff_coefficients(old, new)
+        for change in changes:
+            print("변경:", " / ".join(change))
+
+        index = ImpactIndex.load(args.index)
+        affected = index.affected(changes)
+        print(f"{len(index.characters)}캐릭터 중 {len(affected)}캐릭터 영향 받음")
+
+        if args.rescore:
+            calculator_old = BattlePointCalculator(args.old)
+            calculator_new = BattlePointCalculator(args.new)
+            for fname, score_types in sorted(affected.items()):
+                try:
+                    char = load_character(fname)
+                except RECORD_ERRORS as e:
+                    print(f"{fname} 읽기 실패 {type(e).__name__}: {e}")
+                    continue
+                for score_type in sorted(score_types):
+                    scores = []
+                    for calculator in (calculator_old, calculator_new):
+                        try:
+                            scores.append(
+                                f"{calculator.calc(char, score_type) / 100:,.2f}"
+                            )
+                        except RECORD_ERRORS as e:
+                            scores.append(f"실패({type(e).__name__}: {e})")
+                    print(f"{fname} {score_type} {scores[0]} -> {scores[1]}")
+
+            # 새 계수에서 읽는 키가 달라질 수 있으므로 영향 받은 캐릭터만 다시 색인
+            counters = ErrorCounters()
+            build_index(calculator_new, sorted(affected), index, counters)
+            index.save(args.index)
+            if counters.failed:
+                print(counters.report())
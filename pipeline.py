@@ -0,0 +1,423 @@
+"""
+받기 -> 파싱/계산 -> 저장을 하나로 묶은 파이프라인
+
+get_character.py로 파일을 받고 main.py로 계산하면 네트워크 대기와 계산이 겹치지 않습니다.
+여기서는 단계마다 크기가 정해진 큐로 연결해서(앞 단계가 너무 앞서가지 않게) 동시에 진행합니다.
+- fetch: asyncio + 스레드로 armory 요청, API 호출 제한(분당 요청 수)을 지킴
+- score: 프로세스 풀에서 CharacterInformation 파싱과 calc
+- sink: ndjson 파일, sqlite, stdout 중 하나
+  --distribution을 주면 계산한 점수를 직업별 KLL 스케치(score_distribution.py)에도 넣어서
+  json으로 저장하고 직업별 상위 1/10/50% 커트라인을 출력
+
+$ python pipeline.py charnames.txt --sink scores.ndjson --fetch-concurrency 8 --workers 4
+$ python pipeline.py charnames.txt --sink scores.db --distribution distribution.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from armory_cache import ArmoryCache, fetch_cached
+from battlepoint import projection
+from battlepoint.api import API_BASE, create_session, fetch_armory
+from battlepoint.calculator import (
+    ARKPASSIVE_PATH,
+    BATTLE_POINT_PATH,
+    BattlePointCalculator,
+)
+from battlepoint.character import CharacterInformation
+from battlepoint.quarantine import RECORD_ERRORS, ErrorRecord, Quarantine
+from score_distribution import ScoreDistribution
+
+RATE_LIMIT = 100  # OPENAPI 분당 요청 수
+QUEUE_SIZE = 64
+DISTRIBUTION_TOPS = (1, 10, 50)  # --distribution 요약에 출력하는 상위 %
+
+# 캐릭터 하나의 받기 실패로 보고 실패 기록을 쓴 뒤 계속 진행하는 예외
+# 요청 실패, 캐시 db 오류, 캐시 폴더 읽기/쓰기 실패, gc로 지워진 캐시 객체(KeyError)
+FETCH_ERRORS = (requests.RequestException, sqlite3.Error, OSError, KeyError)
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    count: int = 0
+    errors: int = 0
+    busy: float = 0.0  # 작업에 쓴 시간 합 (동시에 진행되면 경과 시간보다 클 수 있음)
+
+    def line(self, elapsed: float) -> str:
+        rate = self.count / elapsed if elapsed else 0.0
+        per_item = self.busy / self.count * 1000 if self.count else 0.0
+        return (
+            f"{self.name:<6} {self.count:>7}개 {rate:>8.1f}/s "
+            f"평균 {per_item:>7.2f}ms 실패 {self.errors}"
+        )
+
+
+class RateLimiter:
+    """토큰 버킷, 분당 rate개까지 허용하고 처음에는 burst개까지 바로 허용"""
+
+    def __init__(self, rate: float, per: float = 60.0, burst: int | None = None):
+        self.interval = per / rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) / self.interval
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.interval)
+
+
+class StdoutSink:
+    def write(self, record: dict):
+        print(json.dumps(record, ensure_ascii=False))
+
+    def close(self):
+        sys.stdout.flush()
+
+
+class NdjsonSink:
+    def __init__(self, fname: str):
+        self.fp = open(fname, "a", encoding="utf-8")
+
+    def write(self, record: dict):
+        self.fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.fp.close()
+
+
+class SqliteSink:
+    def __init__(self, fname: str):
+        self.conn = sqlite3.connect(fname)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS scores (
+                name TEXT, class_name TEXT, score_type TEXT, score INTEGER,
+                combat_power TEXT, scored_at REAL, error TEXT
+            )"""
+        )
+
+    def write(self, record: dict):
+        self.conn.execute(
+            "INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                record["name"],
+                record.get("class_name"),
+                record.get("score_type"),
+                record.get("score"),
+                record.get("combat_power"),
+                record["scored_at"],
+                record.get("error"),
+            ),
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class DistributionSink:
+    """
+    다른 sink에 그대로 쓰면서 계산에 성공한 점수는 (직업, 점수 종류)별 분포 스케치에 넣음
+    close할 때 분포를 fname에 저장 (캐시로 건너뛴 캐릭터는 포함되지 않음)
+    """
+
+    def __init__(self, sink, fname: str):
+        self.sink = sink
+        self.fname = fname
+        self.distribution = ScoreDistribution()
+
+    def write(self, record: dict):
+        self.sink.write(record)
+        if record.get("score") is not None:
+            self.distribution.add(
+                record["class_name"], record["score_type"], record["score"]
+            )
+
+    def close(self):
+        self.sink.close()
+        self.distribution.save(self.fname)
+
+
+def open_sink(target: str | None):
+    if not target or target == "-":
+        return StdoutSink()
+    if target.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteSink(target)
+    return NdjsonSink(target)
+
+
+# 프로세스 풀 작업자마다 하나씩 만드는 calculator
+_calculator: BattlePointCalculator | None = None
+
+
+def _init_worker(battle_point_path: str | Path, arkpassive_path: str | Path):
+    global _calculator
+    _calculator = BattlePointCalculator(battle_point_path, arkpassive_path)
+
+
+def _parse_and_score(name: str, raw: bytes) -> dict[str, Any] | ErrorRecord:
+    """
+    작업자 프로세스에서 실행, 파싱 시간과 계산 시간을 따로 잰다
+    실패하면 어느 단계에서 실패했는지 담은 ErrorRecord를 반환
+    """
+    start = time.perf_counter()
+    try:
+        data = projection.loads(raw)
+        if data is None:
+            raise ValueError("캐릭터 정보 없음")
+        char = CharacterInformation(data, keep_raw=False)
+    except RECORD_ERRORS as e:
+        return ErrorRecord.from_exception(name, "parse", e)
+    parsed = time.perf_counter()
+
+    try:
+        score_type = "defense" if char.is_supporter else "attack"
+        score = _calculator.calc(char, score_type)
+    except RECORD_ERRORS as e:
+        return ErrorRecord.from_exception(name, "calc", e)
+    done = time.perf_counter()
+
+    return {
+        "name": name,
+        "class_name": char.character_class_name,
+        "score_type": score_type,
+        "score": score,
+        "combat_power": char.combat_power,
+        "parse_time": parsed - start,
+        "score_time": done - parsed,
+    }
+
+
+async def run_pipeline(
+    charnames: list[str],
+    sink,
+    *,
+    jwt: str | None = None,
+    api_base: str = API_BASE,
+    fetch_concurrency: int = 8,
+    workers: int = os.cpu_count() or 1,
+    queue_size: int = QUEUE_SIZE,
+    rate_limit: float = RATE_LIMIT,
+    cache: ArmoryCache | None = None,
+    quarantine: Quarantine | None = None,
+    battle_point_path: str | Path = BATTLE_POINT_PATH,
+    arkpassive_path: str | Path = ARKPASSIVE_PATH,
+) -> dict[str, StageMetrics]:
+    """
+    캐릭터 이름들을 받아서 계산 결과를 sink에 씁니다.
+    cache가 주어지면 TTL 안이거나 응답이 바뀌지 않은 캐릭터는 계산하지 않습니다.
+    파싱/계산에 실패한 캐릭터는 실패 기록을 sink에 쓰고 계속 진행하며,
+    quarantine이 주어지면 원본 응답도 격리 폴더에 저장합니다.
+    """
+    metrics = {name: StageMetrics(name) for name in ("fetch", "parse", "score", "sink")}
+    loop = asyncio.get_running_loop()
+    limiter = RateLimiter(rate_limit)
+
+    names: asyncio.Queue = asyncio.Queue(queue_size)
+    raws: asyncio.Queue = asyncio.Queue(queue_size)
+    records: asyncio.Queue = asyncio.Queue(queue_size)
+
+    def fetch(session: requests.Session, name: str) -> bytes | None:
+        if cache is None:
+            return fetch_armory(session, name, api_base, projection.CHARACTER_FILTERS)
+        result = fetch_cached(
+            cache, session, name, api_base, filters=projection.CHARACTER_FILTERS
+        )
+        if result.status == "missing":
+            return b"null"
+        if result.status != "changed" and not result.entry.pending:
+            return None  # 이미 계산한 응답
+        return cache.read(result.entry.content_hash)
+
+    async def produce():
+        for name in charnames:
+            await names.put(name)
+        for _ in range(fetch_concurrency):
+            await names.put(None)
+
+    async def fetch_worker(session: requests.Session, threads: ThreadPoolExecutor):
+        m = metrics["fetch"]
+        while (name := await names.get()) is not None:
+            try:
+                fresh = cache is not None and _is_fresh(cache, name)
+            except FETCH_ERRORS:
+                fresh = False  # 캐시를 읽지 못하면 요청 제한 안에서 받아봄
+            if not fresh:
+                await limiter.acquire()
+            start = time.perf_counter()
+            try:
+                raw = await loop.run_in_executor(threads, fetch, session, name)
+            except FETCH_ERRORS as e:
+                m.errors += 1
+                await records.put(_error_record(name, e))
+                continue
+            finally:
+                m.busy += time.perf_counter() - start
+            m.count += 1
+            if raw is not None:
+                await raws.put((name, raw))
+
+    async def score_worker(processes: ProcessPoolExecutor):
+        while (item := await raws.get()) is not None:
+            name, raw = item
+            record = await loop.run_in_executor(processes, _parse_and_score, name, raw)
+            if isinstance(record, ErrorRecord):
+                metrics["parse" if record.stage == "parse" else "score"].errors += 1
+                if quarantine is not None:
+                    quarantine.put(record, raw)
+                error = record.to_dict()
+                error["scored_at"] = record.failed_at
+                await records.put(error)
+                continue
+
+            metrics["parse"].count += 1
+            metrics["parse"].busy += record.pop("parse_time")
+            metrics["score"].count += 1
+            metrics["score"].busy += record.pop("score_time")
+            record["scored_at"] = time.time()
+            await records.put(record)
+
+            if cache is not None:
+                entry = cache.get(name, projection.CHARACTER_FILTERS)
+                if entry is not None:
+                    cache.mark_processed(
+                        name, entry.content_hash, projection.CHARACTER_FILTERS
+                    )
+
+    async def sink_worker():
+        m = metrics["sink"]
+        while (record := await records.get()) is not None:
+            start = time.perf_counter()
+            sink.write(record)
+            m.busy += time.perf_counter() - start
+            m.count += 1
+
+    with (
+        create_session(jwt, fetch_concurrency) as session,
+        ThreadPoolExecutor(fetch_concurrency) as threads,
+        ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(battle_point_path, arkpassive_path),
+        ) as processes,
+    ):
+        sink_task = asyncio.create_task(sink_worker())
+        fetchers = [
+            asyncio.create_task(fetch_worker(session, threads))
+            for _ in range(fetch_concurrency)
+        ]
+        # 계산 작업을 프로세스 수보다 조금 많이 넣어서 작업자가 놀지 않게 함
+        scorers = [
+            asyncio.create_task(score_worker(processes)) for _ in range(workers * 2)
+        ]
+
+        await produce()
+        await asyncio.gather(*fetchers)
+        for _ in scorers:
+            await raws.put(None)
+        await asyncio.gather(*scorers)
+        await records.put(None)
+        await sink_task
+
+    return metrics
+
+
+def _is_fresh(cache: ArmoryCache, name: str) -> bool:
+    entry = cache.get(name, projection.CHARACTER_FILTERS)
+    return entry is not None and entry.is_fresh(time.time())
+
+
+def _error_record(name: str, e: Exception) -> dict:
+    return {"name": name, "error": f"{type(e).__name__}: {e}", "scored_at": time.time()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="받기-계산-저장 파이프라인")
+    parser.add_argument("charnames", help="캐릭터 이름 파일 (한 줄에 하나)")
+    parser.add_argument("--sink", help="결과 저장 위치 (.ndjson, .db), 없으면 stdout")
+    parser.add_argument("--jwt", default="jwt.txt")
+    parser.add_argument("--api-base", default=API_BASE)
+    parser.add_argument("--fetch-concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT, help="분당")
+    parser.add_argument("--cache", help="armory 캐시 폴더")
+    parser.add_argument("--quarantine", help="파싱/계산에 실패한 응답을 저장할 폴더")
+    parser.add_argument(
+        "--distribution", help="직업별 점수 분포 스케치를 저장할 json 파일"
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.jwt, "r") as fp:
+            jwt = fp.read().strip()
+    except FileNotFoundError:
+        jwt = None
+    with open(args.charnames, "r", encoding="utf-8") as fp:
+        charnames = [line.strip() for line in fp if line.strip()]
+
+    sink = open_sink(args.sink)
+    if args.distribution:
+        sink = DistributionSink(sink, args.distribution)
+    quarantine = Quarantine(args.quarantine) if args.quarantine else None
+    start = time.perf_counter()
+    try:
+        metrics = asyncio.run(
+            run_pipeline(
+                charnames,
+                sink,
+                jwt=jwt,
+                api_base=args.api_base,
+                fetch_concurrency=args.fetch_concurrency,
+                workers=args.workers,
+                queue_size=args.queue_size,
+                rate_limit=args.rate_limit,
+                cache=ArmoryCache(args.cache) if args.cache else None,
+                quarantine=quarantine,
+            )
+        )
+    finally:
+        sink.close()
+        if quarantine is not None:
+            quarantine.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(charnames)}캐릭터 {elapsed:.2f}초", file=sys.stderr)
+    for m in metrics.values():
+        print(m.line(elapsed), file=sys.stderr)
+
+    if args.distribution:
+        dist = sink.distribution
+        tops = " ".join(f"상위 {top}%" for top in DISTRIBUTION_TOPS)
+        print(f"{'직업':<8} {'점수 종류':<8} {'표본':>7} {tops}", file=sys.stderr)
+        for class_name, score_type in sorted(dist.sketches):
+            cutlines = " ".join(
+                f"{dist.percentile(class_name, score_type, top) / 100:>10,.2f}"
+                for top in DISTRIBUTION_TOPS
+            )
+            print(
+                f"{class_name:<8} {score_type:<8} "
+                f"{dist.count(class_name, score_type):>7} {cutlines}",
+                file=sys.stderr,
+            )
@@ -0,0 +1,766 @@
+"""
+캐릭터별 변경 빈도를 배워서 API 요청을 바뀌었을 가능성이 큰 캐릭터에 먼저 쓰는 스케줄러
+
+get_character.py는 charnames.txt를 순서대로 모두 받으므로 거의 바뀌지 않는 캐릭터에도
+같은 만큼 요청을 씁니다. 여기서는 받을 때마다 (지난번에 받은 뒤 지난 시간, 내용이 바뀌었는지)를
+기록하고, 캐릭터마다 변경을 포아송 과정으로 보고 변경률 λ를 추정합니다.
+요청할 수 있을 때마다 --objective에 따라 값이 가장 큰 캐릭터를 받습니다. (t = 지난번에 받은 뒤 경과 시간)
+
+- delay (기본값): 아직 발견하지 못한 변경들이 기다린 시간의 기댓값 합 λt²/2
+  변경이 생긴 뒤 발견할 때까지 평균 시간이 최소, 받는 간격은 1/√λ에 비례
+- changes: 지금 바뀌어 있을 확률 1 - exp(-λt)
+  요청당 발견하는 변경 수가 최대 (헛요청이 가장 적음)지만, 자주 바뀌는 캐릭터의 확률이 모두 1에 가까워지면
+  가끔 바뀌는 캐릭터를 늦게 받아서 평균 발견 시간은 순서대로 받기보다 길어질 수 있음
+- simulate 결과 (60캐릭터, 48시간, 시간당 10번): 발견까지 평균 순서대로 3.06시간, changes 3.80시간,
+  delay 2.73시간 / 발견한 변경 171, 196, 189개 / 최신 비율 77.6%, 77.6%, 79.0%
+
+- λ는 전체 캐릭터의 평균 변경률을 사전 분포로 둔 최대 사후 추정 (기록이 적은 캐릭터는 평균에 가까움)
+- 한 구간에서 여러 번 바뀌어도 한 번으로 보이는 것을 고려한 추정이라 오래 안 받은 캐릭터도 과소추정하지 않음
+- 직접 요청한 캐릭터(request)는 우선순위를 올려서 다음 요청에 받음
+- --min-interval 안에는 다시 받지 않고, --max-interval이 지나면 변경률과 관계없이 받음
+- 요청이 실패하면 (429, 5xx, 연결 실패) 변경 기록 없이 그 캐릭터만 점점 길게 미루고 계속 진행
+- score_history.py의 기록으로 처음 변경률을 채울 수 있음 (점수가 바뀌었으면 변경)
+
+$ python poll_scheduler.py run --charnames charnames.txt --rate-limit 100 --out-dir .
+$ python poll_scheduler.py learn --history .score_history.db
+$ python poll_scheduler.py show
+$ python poll_scheduler.py simulate ./characters --hours 72 --budget 20   # 목 서버로 순서대로 받기, 두 목표 비교
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+
+from armory_cache import ARMORY_CACHE_DIR, ArmoryCache, fetch_cached
+from battlepoint.api import API_BASE, create_session
+from battlepoint.projection import CHARACTER_FILTERS
+
+POLL_SCHEDULE_PATH = ".poll_schedule.db"
+
+DEFAULT_RATE = 1 / (24 * 60 * 60)  # 기록이 하나도 없을 때 하루에 한 번
+PRIOR_STRENGTH = 1.0  # 사전 분포의 가상 변경 횟수
+MAX_OBSERVATIONS = 64  # 캐릭터마다 남기는 최근 기록 수
+MIN_RATE, MAX_RATE = 1e-9, 1.0  # 초당
+MIN_INTERVAL = 10 * 60
+MAX_INTERVAL = 7 * 24 * 60 * 60
+ON_DEMAND_BOOST = 10.0  # 직접 요청 가중치, 0보다 크면 목표 값과 관계없이 먼저
+# 요청이 실패한 캐릭터는 RETRY_BACKOFF * 2^(연속 실패 수 - 1)초 뒤에 다시 받음
+RETRY_BACKOFF = 60.0
+MAX_RETRY_BACKOFF = 6 * 60 * 60
+MAX_ERROR_SLEEP = 5 * 60  # 연속으로 실패하면 요청 사이 간격을 이만큼까지 늘림
+
+# 받을 캐릭터를 고르는 목표
+# changes: 지금 바뀌어 있을 확률 1 - exp(-λt), 요청당 발견하는 변경 수가 최대
+# delay: 아직 발견하지 못한 변경들의 기대 지연 합 λt²/2, 변경을 발견할 때까지 평균 시간이 최소
+OBJECTIVES = ("changes", "delay")
+DEFAULT_OBJECTIVE = "delay"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    name TEXT PRIMARY KEY,
+    last_fetch REAL,
+    boost REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS observations (
+    name TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    interval REAL NOT NULL,
+    changed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_name ON observations (name, observed_at);
+"""
+
+
+def estimate_rate(
+    observations: Iterable[tuple[float, bool]],
+    prior_rate: float = DEFAULT_RATE,
+    prior_strength: float = PRIOR_STRENGTH,
+) -> float:
+    """
+    (경과 시간, 바뀌었는지) 기록으로 초당 변경률 추정
+    구간 Δ 동안 바뀌었을 확률은 1 - exp(-λΔ)이므로 로그 우도의 기울기는
+        Σ_바뀜 Δ / (exp(λΔ) - 1) - Σ_같음 Δ
+    여기에 Gamma(1 + k, k / prior_rate) 사전 분포를 더해서 기울기가 0인 λ를 이분법으로 찾음
+    기울기는 λ에 대해 감소하므로 해가 하나뿐
+    """
+    changed = []
+    unchanged = prior_strength / prior_rate
+    for interval, was_changed in observations:
+        if interval <= 0:
+            continue
+        if was_changed:
+            changed.append(interval)
+        else:
+            unchanged += interval
+
+    def slope(rate: float) -> float:
+        s = prior_strength / rate - unchanged
+        for interval in changed:
+            # 아주 짧은 구간에서 expm1이 0에 가까워도 interval / x ≈ 1 / rate
+            s += interval / math.expm1(min(rate * interval, 700.0))
+        return s
+
+    lo, hi = math.log(MIN_RATE), math.log(MAX_RATE)
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if slope(math.exp(mid)) > 0:
+            lo = mid
+        else:
+            hi = mid
+    return math.exp((lo + hi) / 2)
+
+
+@dataclass
+class CharacterState:
+    name: str
+    last_fetch: float | None = None
+    boost: float = 0.0
+    observations: list[tuple[float, bool]] = field(default_factory=list)
+    rate: float | None = None  # 기록이 없으면 None (전체 평균 사용)
+    requested_at: float | None = None  # 직접 요청한 시각
+    failures: int = 0  # 연속으로 요청이 실패한 횟수
+    retry_at: float | None = None  # 실패한 뒤 이 시각 전에는 받지 않음
+
+
+class PollScheduler:
+    """
+    캐릭터별 변경 기록과 마지막으로 받은 시각을 sqlite에 저장하고
+    next_batch로 다음에 받을 캐릭터를 고름, 시각은 모두 인자로 받음 (시뮬레이션)
+    """
+
+    def __init__(
+        self,
+        path: str | Path = POLL_SCHEDULE_PATH,
+        *,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        objective: str = DEFAULT_OBJECTIVE,
+    ):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"알 수 없는 목표입니다: {objective}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.objective = objective
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+        self.states: dict[str, CharacterState] = {}
+        for name, last_fetch, boost in self.conn.execute(
+            "SELECT name, last_fetch, boost FROM characters"
+        ):
+            self.states[name] = CharacterState(name, last_fetch, boost)
+        for name, interval, changed in self.conn.execute(
+            "SELECT name, interval, changed FROM observations ORDER BY observed_at"
+        ):
+            if name in self.states:
+                self.states[name].observations.append((interval, bool(changed)))
+
+        # 전체 평균 변경률 = 변경 횟수 / 관측 시간
+        self._changes = 0
+        self._exposure = 0.0
+        for state in self.states.values():
+            for interval, changed in state.observations:
+                self._changes += changed
+                self._exposure += interval
+        for state in self.states.values():
+            self._update_rate(state)
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def prior_rate(self) -> float:
+        return (self._changes + PRIOR_STRENGTH) / (
+            self._exposure + PRIOR_STRENGTH / DEFAULT_RATE
+        )
+
+    def _update_rate(self, state: CharacterState):
+        state.rate = (
+            estimate_rate(state.observations, self.prior_rate)
+            if state.observations
+            else None
+        )
+
+    def add(self, names: Iterable[str], cache: ArmoryCache | None = None):
+        """
+        스케줄에 캐릭터 추가, 이미 있으면 그대로
+        cache가 주어지면 캐시에 마지막으로 받은 시각을 처음 시각으로 사용
+        """
+        with self.conn:
+            for name in names:
+                if name in self.states:
+                    continue
+                entry = (
+                    cache.get(name, CHARACTER_FILTERS) if cache is not None else None
+                )
+                state = CharacterState(name, entry.fetched_at if entry else None)
+                self.states[name] = state
+                self.conn.execute(
+                    "INSERT INTO characters (name, last_fetch) VALUES (?, ?)",
+                    (name, state.last_fetch),
+                )
+
+    def request(self, name: str, now: float, boost: float = ON_DEMAND_BOOST):
+        """직접 요청, 다음 next_batch에서 먼저 고름 (min_interval도 무시)"""
+        self.add([name])
+        state = self.states[name]
+        state.boost = max(state.boost, boost)
+        if state.requested_at is None:
+            state.requested_at = now
+        with self.conn:
+            self.conn.execute(
+                "UPDATE characters SET boost = ? WHERE name = ?", (state.boost, name)
+            )
+
+    def change_probability(self, state: CharacterState, now: float) -> float:
+        if state.last_fetch is None:
+            return 1.0
+        elapsed = now - state.last_fetch
+        if elapsed >= self.max_interval:
+            return 1.0
+        rate = state.rate if state.rate is not None else self.prior_rate
+        return -math.expm1(-rate * max(elapsed, 0.0))
+
+    def expected_delay(self, state: CharacterState, now: float) -> float:
+        """
+        지난번에 받은 뒤 생긴 변경들이 지금까지 기다린 시간의 기댓값 합 λt²/2 (초)
+        받는 간격을 T라고 하면 변경마다 평균 T/2를 기다리므로, 요청 수가 정해져 있을 때
+        Σ λT가 최소가 되는 간격은 T ∝ 1/√λ이고 모든 캐릭터의 λT²가 같아질 때 받는 것과 같음
+        """
+        if state.last_fetch is None:
+            return math.inf
+        elapsed = now - state.last_fetch
+        if elapsed >= self.max_interval:
+            return math.inf
+        rate = state.rate if state.rate is not None else self.prior_rate
+        return rate * max(elapsed, 0.0) ** 2 / 2
+
+    def priority(self, state: CharacterState, now: float) -> tuple[float, float]:
+        """받을 순서 (직접 요청 가중치, 목표 값), 목표 값이 음수면 아직 받지 않음"""
+        if state.retry_at is not None and now < state.retry_at:
+            return 0.0, -1.0
+        if state.boost:
+            return state.boost, 0.0
+        if state.last_fetch is not None and now - state.last_fetch < self.min_interval:
+            return 0.0, -1.0
+        if self.objective == "delay":
+            return 0.0, self.expected_delay(state, now)
+        return 0.0, self.change_probability(state, now)
+
+    def next_batch(self, k: int, now: float) -> list[str]:
+        """지금 받을 k개 이하의 캐릭터, 우선순위가 높은 순서"""
+        best = heapq.nlargest(
+            k, self.states.values(), key=lambda state: self.priority(state, now)
+        )
+        return [state.name for state in best if self.priority(state, now)[1] >= 0]
+
+    def fail(self, name: str, now: float) -> float:
+        """
+        요청 실패 (429, 5xx, 연결 실패), 변경 기록은 남기지 않고 이 캐릭터만 잠시 미룸
+        직접 요청은 그대로 두므로 미룬 시간이 지나면 먼저 받음, 다시 시도할 시각을 반환
+        """
+        state = self.states[name]
+        state.failures += 1
+        backoff = min(RETRY_BACKOFF * 2 ** (state.failures - 1), MAX_RETRY_BACKOFF)
+        state.retry_at = now + backoff
+        return state.retry_at
+
+    def record(self, name: str, now: float, changed: bool | None):
+        """
+        받은 결과 기록, changed가 None이면 캐릭터 정보 없음 (변경 기록은 남기지 않음)
+        반환값 없음, 변경률은 이 캐릭터만 다시 추정
+        """
+        self.add([name])
+        state = self.states[name]
+        previous = state.last_fetch
+        state.last_fetch = now
+        state.boost = 0.0
+        state.requested_at = None
+        state.failures = 0
+        state.retry_at = None
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE characters SET last_fetch = ?, boost = 0 WHERE name = ?",
+                (now, name),
+            )
+            if changed is None or previous is None or now <= previous:
+                return
+            self._observe(state, now, now - previous, changed)
+        self._update_rate(state)
+
+    def _observe(self, state: CharacterState, now: float, interval: float, changed):
+        state.observations.append((interval, changed))
+        self._changes += changed
+        self._exposure += interval
+        if len(state.observations) > MAX_OBSERVATIONS:
+            old_interval, old_changed = state.observations.pop(0)
+            self._changes -= old_changed
+            self._exposure -= old_interval
+            self.conn.execute(
+                "DELETE FROM observations WHERE rowid = (SELECT rowid FROM observations "
+                "WHERE name = ? ORDER BY observed_at LIMIT 1)",
+                (state.name,),
+            )
+        self.conn.execute(
+            "INSERT INTO observations VALUES (?, ?, ?, ?)",
+            (state.name, now, interval, int(changed)),
+        )
+
+    def learn_from_history(self, history, names: Iterable[str] | None = None) -> int:
+        """
+        score_history.ScoreHistory의 연속된 기록 사이에 점수가 바뀌었는지로 변경 기록을 채움
+        추가한 기록 수를 반환
+        """
+        count = 0
+        with self.conn:
+            for name in history.names() if names is None else names:
+                points = history.range(name)
+                if not points:
+                    continue
+                self.add([name])
+                state = self.states[name]
+                for prev, point in itertools.pairwise(points):
+                    changed = (point.attack, point.defense) != (
+                        prev.attack,
+                        prev.defense,
+                    )
+                    self._observe(state, point.ts, point.ts - prev.ts, changed)
+                    count += 1
+                if state.last_fetch is None or state.last_fetch < points[-1].ts:
+                    state.last_fetch = points[-1].ts
+                    self.conn.execute(
+                        "UPDATE characters SET last_fetch = ? WHERE name = ?",
+                        (state.last_fetch, name),
+                    )
+        for state in self.states.values():
+            self._update_rate(state)
+        return count
+
+
+# ---------------------------------------------------------------------------
+# 시뮬레이션
+
+
+@dataclass
+class PolicyResult:
+    name: str
+    requests: int = 0
+    changed: int = 0
+    detection_delay: float = 0.0  # 변경마다 실제 변경부터 받을 때까지 시간 합
+    detected: int = 0
+    stale: float = 0.0  # 스텝마다 캐시가 실제와 다른 캐릭터 비율 합
+    steps: int = 0
+    on_demand_delay: list[float] = field(default_factory=list)
+    estimated_rates: dict[str, float] = field(default_factory=dict)
+
+    def line(self) -> str:
+        waste = 1 - self.changed / self.requests if self.requests else 0.0
+        delay = self.detection_delay / self.detected / 3600 if self.detected else 0.0
+        fresh = 1 - self.stale / self.steps if self.steps else 0.0
+        on_demand = (
+            sum(self.on_demand_delay) / len(self.on_demand_delay) / 60
+            if self.on_demand_delay
+            else 0.0
+        )
+        return (
+            f"{self.name:<12} 요청 {self.requests:>6} 변경 발견 {self.changed:>5} "
+            f"헛요청 {waste:>6.1%} 발견까지 평균 {delay:>6.2f}시간 "
+            f"최신 비율 {fresh:>6.1%} 직접 요청 대기 {on_demand:>6.1f}분"
+        )
+
+
+def _simulate_policy(
+    policy: str,
+    fnames: list[str],
+    changes: list[tuple[float, str]],
+    on_demand: list[tuple[float, str]],
+    *,
+    hours: float,
+    step: float,
+    budget: float,
+    work_dir: Path,
+) -> PolicyResult:
+    from mock_api import MockLostArkAPI
+
+    api_dir = work_dir / policy / "api"
+    api_dir.mkdir(parents=True)
+    documents = {}
+    for fname in fnames:
+        shutil.copy(fname, api_dir)
+        with open(fname, "rb") as fp:
+            documents[Path(fname).name] = json.load(fp)
+    server = MockLostArkAPI(("127.0.0.1", 0), str(api_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    names = list(server.armories)
+    fname_by_name = {name: Path(path).name for name, path in server.armories.items()}
+
+    cache = ArmoryCache(work_dir / policy / "cache")
+    objective = policy if policy in OBJECTIVES else DEFAULT_OBJECTIVE
+    scheduler = PollScheduler(":memory:", min_interval=step, objective=objective)
+    scheduler.add(names)
+    result = PolicyResult(policy)
+    pending: dict[str, list[float]] = {name: [] for name in names}
+    version: dict[str, int] = dict.fromkeys(names, 0)
+    changes = list(reversed(changes))
+    on_demand = list(reversed(on_demand))
+    cursor = 0
+    tokens = 0.0
+
+    with create_session(None, 1) as session:
+        now = 0.0
+        while now < hours * 3600:
+            while changes and changes[-1][0] <= now:
+                when, name = changes.pop()
+                version[name] += 1
+                document = documents[fname_by_name[name]]
+                document["ArmoryProfile"]["Title"] = f"sim-{version[name]}"
+                with open(api_dir / fname_by_name[name], "w", encoding="utf-8") as fp:
+                    json.dump(document, fp, ensure_ascii=False)
+                pending[name].append(when)
+            while on_demand and on_demand[-1][0] <= now:
+                when, name = on_demand.pop()
+                scheduler.request(name, when)
+
+            tokens += budget * step / 3600
+            k = int(tokens)
+            tokens -= k
+            if policy == "round-robin":
+                batch = [names[(cursor + i) % len(names)] for i in range(k)]
+                cursor += k
+            else:
+                batch = scheduler.next_batch(k, now)
+
+            for name in batch:
+                requested_at = scheduler.states[name].requested_at
+                if requested_at is not None:
+                    result.on_demand_delay.append(now - requested_at)
+                fetched = fetch_cached(
+                    cache,
+                    session,
+                    name,
+                    server.base_url,
+                    now=now,
+                    force=True,
+                    filters=CHARACTER_FILTERS,
+                )
+                scheduler.record(name, now, fetched.status == "changed")
+                result.requests += 1
+                if pending[name]:
+                    result.changed += 1
+                    result.detected += len(pending[name])
+                    result.detection_delay += sum(now - t for t in pending[name])
+                    pending[name].clear()
+
+            result.stale += sum(bool(p) for p in pending.values()) / len(names)
+            result.steps += 1
+            now += step
+
+    # 끝까지 발견하지 못한 변경은 끝난 시각까지 기다린 것으로 셈
+    for times in pending.values():
+        result.detected += len(times)
+        result.detection_delay += sum(now - t for t in times)
+    # 끝까지 받지 못한 직접 요청
+    for state in scheduler.states.values():
+        if state.requested_at is not None:
+            result.on_demand_delay.append(now - state.requested_at)
+    result.estimated_rates = {
+        name: state.rate or scheduler.prior_rate
+        for name, state in scheduler.states.items()
+    }
+
+    server.shutdown()
+    server.server_close()
+    cache.close()
+    scheduler.close()
+    return result
+
+
+def simulate(
+    directory: str,
+    *,
+    characters: int | None = None,
+    hours: float = 72.0,
+    step: float = 600.0,
+    budget: float = 20.0,
+    on_demand_per_hour: float = 0.5,
+    seed: int = 0,
+) -> tuple[list[PolicyResult], dict[str, float]]:
+    """
+    목 서버의 캐릭터 파일을 캐릭터마다 다른 변경률로 바꾸면서
+    같은 변경/직접 요청 순서에 대해 순서대로 받기와 스케줄러를 비교
+    변경률은 2시간에 한 번 ~ 2주에 한 번 사이에서 로그 균등 분포
+    """
+    import glob
+
+    fnames = sorted(glob.glob(os.path.join(directory, "character_*.json")))
+    if characters is not None:
+        fnames = fnames[:characters]
+    names = []
+    for fname in fnames:
+        with open(fname, "rb") as fp:
+            names.append(json.load(fp)["ArmoryProfile"]["CharacterName"])
+
+    rng = random.Random(seed)
+    horizon = hours * 3600
+    true_rates = {
+        name: math.exp(rng.uniform(math.log(1 / (14 * 86400)), math.log(1 / 7200)))
+        for name in names
+    }
+    changes = []
+    for name, rate in true_rates.items():
+        t = rng.expovariate(rate)
+        while t < horizon:
+            changes.append((t, name))
+            t += rng.expovariate(rate)
+    changes.sort()
+    on_demand = []
+    t = rng.expovariate(on_demand_per_hour / 3600) if on_demand_per_hour else horizon
+    while t < horizon:
+        on_demand.append((t, rng.choice(names)))
+        t += rng.expovariate(on_demand_per_hour / 3600)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = [
+            _simulate_policy(
+                policy,
+                fnames,
+                changes,
+                on_demand,
+                hours=hours,
+                step=step,
+                budget=budget,
+                work_dir=Path(work_dir),
+            )
+            for policy in ("round-robin", *OBJECTIVES)
+        ]
+    return results, true_rates
+
+
+def _rank_correlation(a: list[float], b: list[float]) -> float:
+    """스피어만 순위 상관계수 (같은 값 없다고 가정)"""
+    n = len(a)
+    if n < 2:
+        return 0.0
+    rank_a = {i: r for r, i in enumerate(sorted(range(n), key=a.__getitem__))}
+    rank_b = {i: r for r, i in enumerate(sorted(range(n), key=b.__getitem__))}
+    d2 = sum((rank_a[i] - rank_b[i]) ** 2 for i in range(n))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+
+def _format_interval(rate: float) -> str:
+    hours = 1 / rate / 3600
+    return f"{hours:.1f}시간" if hours < 48 else f"{hours / 24:.1f}일"
+
+
+def main_run(args: argparse.Namespace) -> int:
+    try:
+        with open(args.jwt, "r") as fp:
+            jwt = fp.read().strip()
+    except FileNotFoundError:
+        jwt = None
+    with open(args.charnames, "r", encoding="utf-8") as fp:
+        charnames = [line.strip() for line in fp if line.strip()]
+
+    cache = ArmoryCache(args.cache)
+    scheduler = PollScheduler(
+        args.db,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        objective=args.objective,
+    )
+    scheduler.add(charnames, cache)
+    out_dir = Path(args.out_dir) if args.out_dir else None
+    interval = 60 / args.rate_limit
+    on_demand_offset = 0
+    requests_made = 0
+    errors = 0  # 연속으로 실패한 요청 수
+
+    with create_session(jwt, 1) as session:
+        try:
+            while args.max_requests is None or requests_made < args.max_requests:
+                started = time.monotonic()
+                now = time.time()
+                if args.on_demand and os.path.exists(args.on_demand):
+                    # 파일 끝에 추가된 이름만 읽음
+                    with open(args.on_demand, "r", encoding="utf-8") as fp:
+                        fp.seek(on_demand_offset)
+                        for line in fp:
+                            if line.strip():
+                                scheduler.request(line.strip(), now)
+                        on_demand_offset = fp.tell()
+
+                batch = scheduler.next_batch(1, now)
+                if not batch:
+                    time.sleep(interval)
+                    continue
+                (name,) = batch
+                state = scheduler.states[name]
+                probability = scheduler.change_probability(state, now)
+                requests_made += 1
+                try:
+                    # simulate, learn과 같이 계산에 쓰는 항목이 바뀐 것만 변경으로 셈
+                    result = fetch_cached(
+                        cache,
+                        session,
+                        name,
+                        args.api_base,
+                        now=now,
+                        force=True,
+                        filters=CHARACTER_FILTERS,
+                    )
+                except requests.RequestException as e:
+                    # 429, 5xx, 연결 실패는 캐릭터가 바뀌었는지 알 수 없으므로 기록하지 않고 미룸
+                    errors += 1
+                    retry_at = scheduler.fail(name, now)
+                    print(
+                        f"{name} 실패: {e} ({retry_at - now:.0f}초 뒤 다시 시도)",
+                        file=sys.stderr,
+                    )
+                    # 서버 전체가 안 되는 경우에 대비해 연속 실패가 이어지면 간격도 늘림
+                    delay = min(interval * 2**errors, MAX_ERROR_SLEEP)
+                    time.sleep(max(0.0, delay - (time.monotonic() - started)))
+                    continue
+                errors = 0
+                if result.status == "missing":
+                    scheduler.record(name, now, None)
+                else:
+                    scheduler.record(name, now, result.status == "changed")
+                if result.status == "changed" and out_dir is not None:
+                    with open(out_dir / f"character_{name}.json", "wb") as fp:
+                        fp.write(cache.read(result.entry.content_hash))
+                print(
+                    f"{name} {result.status} (변경 확률 {probability:.0%}, "
+                    f"{_format_interval(state.rate or scheduler.prior_rate)}에 한 번)"
+                )
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.close()
+            cache.close()
+    return 0
+
+
+def main_learn(args: argparse.Namespace) -> int:
+    from score_history import ScoreHistory
+
+    scheduler = PollScheduler(args.db)
+    with ScoreHistory(args.history) as history:
+        count = scheduler.learn_from_history(history)
+    print(
+        f"{count}개 기록 추가, 평균 {_format_interval(scheduler.prior_rate)}에 한 번 변경"
+    )
+    scheduler.close()
+    return 0
+
+
+def main_show(args: argparse.Namespace) -> int:
+    scheduler = PollScheduler(args.db)
+    now = time.time()
+    states = sorted(
+        scheduler.states.values(),
+        key=lambda state: scheduler.priority(state, now),
+        reverse=True,
+    )
+    print(
+        f"{len(states)}캐릭터, 평균 {_format_interval(scheduler.prior_rate)}에 한 번 변경"
+    )
+    for state in states[: args.top]:
+        rate = state.rate or scheduler.prior_rate
+        changed = sum(changed for _, changed in state.observations)
+        print(
+            f"{state.name:<12} 변경 확률 {scheduler.change_probability(state, now):>5.0%} "
+            f"{_format_interval(rate):>8}에 한 번 "
+            f"(기록 {len(state.observations)}개 중 변경 {changed})"
+            + (" 직접 요청" if state.boost else "")
+        )
+    scheduler.close()
+    return 0
+
+
+def main_simulate(args: argparse.Namespace) -> int:
+    results, true_rates = simulate(
+        args.directory,
+        characters=args.characters,
+        hours=args.hours,
+        step=args.step,
+        budget=args.budget,
+        on_demand_per_hour=args.on_demand_per_hour,
+        seed=args.seed,
+    )
+    print(f"{len(true_rates)}캐릭터, {args.hours:g}시간, 시간당 {args.budget:g}번 요청")
+    for result in results:
+        print(result.line())
+    adaptive = results[-1].estimated_rates
+    names = list(true_rates)
+    correlation = _rank_correlation(
+        [true_rates[name] for name in names], [adaptive[name] for name in names]
+    )
+    print(f"추정 변경률과 실제 변경률의 순위 상관계수 {correlation:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="변경 빈도 기반 armory 받기 스케줄러")
+    parser.add_argument("--db", default=POLL_SCHEDULE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser(
+        "run", help="요청 제한 안에서 바뀌었을 가능성이 큰 캐릭터부터 받기"
+    )
+    p.add_argument("--charnames", default="charnames.txt")
+    p.add_argument("--jwt", default="jwt.txt")
+    p.add_argument("--api-base", default=API_BASE)
+    p.add_argument("--cache", default=ARMORY_CACHE_DIR)
+    p.add_argument("--out-dir", help="바뀐 캐릭터를 character_{이름}.json으로 저장")
+    p.add_argument("--rate-limit", type=float, default=100, help="분당 요청 수")
+    p.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="초")
+    p.add_argument("--max-interval", type=float, default=MAX_INTERVAL, help="초")
+    p.add_argument(
+        "--on-demand", help="이 파일 끝에 이름을 추가하면 다음 요청에 그 캐릭터를 받음"
+    )
+    p.add_argument("--max-requests", type=int, help="없으면 중단할 때까지")
+    p.add_argument(
+        "--objective",
+        choices=OBJECTIVES,
+        default=DEFAULT_OBJECTIVE,
+        help="delay: 변경을 발견할 때까지 평균 시간 최소, changes: 요청당 발견하는 변경 수 최대",
+    )
+    p.set_defaults(func=main_run)
+
+    p = sub.add_parser("learn", help="점수 기록으로 변경률 채우기")
+    p.add_argument("--history", default=".score_history.db")
+    p.set_defaults(func=main_learn)
+
+    p = sub.add_parser("show", help="받을 순서대로 변경 확률 출력")
+    p.add_argument("--top", type=int, default=30)
+    p.set_defaults(func=main_show)
+
+    p = sub.add_parser("simulate", help="목 서버로 순서대로 받기, 두 목표 비교")
+    p.add_argument("directory", help="character_*.json이 있는 디렉토리")
+    p.add_argument("--characters", type=int, help="앞에서부터 사용할 캐릭터 수")
+    p.add_argument("--hours", type=float, default=72.0)
+    p.add_argument("--step", type=float, default=600.0, help="시뮬레이션 한 스텝(초)")
+    p.add_argument("--budget", type=float, default=20.0, help="시간당 요청 수")
+    p.add_argument("--on-demand-per-hour", type=float, default=0.5)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=main_simulate)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
@@ -0,0 +1,159 @@
+"""
+계산 전투력과 실제 전투력을 맞춰주는 숨은 입력 역추적
+
+OPENAPI 응답에 없는 값들(방범대 특성, 에스더 무기)은 calc에서 고정 값을 쓰거나 적용하지 않습니다.
+BattlePoint.json에 있는 후보 값들을 모두 대입해서 실제 전투력과 정확히 같아지는 조합을 찾습니다.
+
+$ python reconcile.py "character*.json"
+"""
+
+import glob
+import sys
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Literal
+
+from battlepoint.calculator import (
+    BATTLE_POINT_TYPE_ORDER,
+    CARE_BATTLE_POINT_TYPES,
+    BattlePointCalculator,
+    BattlePointType,
+    Factor,
+    final_score,
+)
+from battlepoint.character import CharacterInformation
+from battlepoint.snapshot import load_character
+
+
+@dataclass
+class HiddenFactor:
+    """calc가 알 수 없는 계수 하나와 가능한 후보들 (이름, 계수), 계수가 0이면 미적용"""
+
+    battle_point_type: BattlePointType
+    options: list[tuple[str, int]] = field(default_factory=list)
+
+
+@dataclass
+class Reconciliation:
+    real_score: int  # 실제 전투력 x100
+    calculated_score: int  # calc의 결과
+    # 실제 전투력과 같아지는 후보 조합들, {BattlePointType: 후보 이름}
+    matches: list[dict[BattlePointType, str]] = field(default_factory=list)
+    candidates: int = 0  # 시도한 조합 수
+
+
+def hidden_factors(
+    calculator: BattlePointCalculator,
+    score_type: Literal["attack", "defense"] = "attack",
+) -> list[HiddenFactor]:
+    """BattlePoint.json에서 방범대 특성, 에스더 무기 후보를 만듭니다."""
+    d = calculator.dict_battle_point[score_type]
+
+    esther = HiddenFactor(BattlePointType.ESTHER_WEAPON, [("없음", 0)])
+    for stage, items in d.get(BattlePointType.ESTHER_WEAPON, {}).items():
+        for item_id, coeff in items.items():
+            esther.options.append((f"{stage}단계 {item_id}", coeff))
+
+    pet = HiddenFactor(BattlePointType.PET_SPECIALTY, [("없음", 0)])
+    for name, coeff in d.get(BattlePointType.PET_SPECIALTY, {}).items():
+        pet.options.append((name, coeff))
+
+    return [esther, pet]
+
+
+def real_score(char: CharacterInformation) -> int:
+    """OPENAPI의 전투력 문자열(2,541.23)을 calc 결과와 같은 단위(254123)로"""
+    return int(Decimal(char.combat_power.replace(",", "")) * 100)
+
+
+class Reconciler:
+    def __init__(
+        self,
+        calculator: BattlePointCalculator,
+        hidden: dict[str, list[HiddenFactor]] | None = None,
+    ):
+        self.calculator = calculator
+        self.hidden = hidden or {
+            score_type: hidden_factors(calculator, score_type)
+            for score_type in ("attack", "defense")
+        }
+
+    def reconcile(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"] = "attack",
+    ) -> Reconciliation:
+        chain = self.calculator.calc_factors(char, score_type)
+        target = real_score(char)
+        result = Reconciliation(real_score=target, calculated_score=chain.score())
+
+        hidden = sorted(
+            self.hidden[score_type],
+            key=lambda h: BATTLE_POINT_TYPE_ORDER[h.battle_point_type],
+        )
+        hidden_types = {h.battle_point_type for h in hidden}
+
+        # 숨은 계수 사이사이의 알려진 계수 묶음
+        # segments[i]는 hidden[i] 직전까지, 마지막은 모든 숨은 계수 이후
+        segments: list[list[Factor]] = [[] for _ in range(len(hidden) + 1)]
+        result2 = chain.base_health_point
+        for f in chain.factors:
+            if f.battle_point_type in hidden_types:
+                continue
+            if f.battle_point_type in CARE_BATTLE_POINT_TYPES:
+                # 케어 점수는 숨은 계수와 관계없으므로 미리 계산
+                result2 += result2 * f.coeff // pow(10, f.base)
+                continue
+            order = BATTLE_POINT_TYPE_ORDER[f.battle_point_type]
+            idx = sum(
+                1
+                for h in hidden
+                if BATTLE_POINT_TYPE_ORDER[h.battle_point_type] < order
+            )
+            segments[idx].append(f)
+
+        def replay(value: int, factors: list[Factor]) -> int:
+            for f in factors:
+                value += value * f.coeff // pow(10, f.base)
+            return value
+
+        assignment: dict[BattlePointType, str] = {}
+
+        def search(depth: int, value: int):
+            # 앞 단계까지 계산된 값(value)에 후보 하나를 곱하고 다음 묶음만 적용하면 되므로
+            # 마지막 숨은 계수 이후 묶음이 비어있으면 후보 하나당 O(1)
+            if depth == len(hidden):
+                result.candidates += 1
+                if final_score(score_type, value, result2) == target:
+                    result.matches.append(dict(assignment))
+                return
+
+            h = hidden[depth]
+            for name, coeff in h.options:
+                assignment[h.battle_point_type] = name
+                applied = value + value * coeff // 10000
+                search(depth + 1, replay(applied, segments[depth + 1]))
+
+        search(0, replay(chain.base_attack_point, segments[0]))
+        return result
+
+
+if __name__ == "__main__":
+    calculator = BattlePointCalculator()
+    reconciler = Reconciler(calculator)
+
+    total, matched = 0, 0
+    for fname in glob.glob(sys.argv[1] if len(sys.argv) > 1 else "character*.json"):
+        char = load_character(fname)
+        score_type = "defense" if char.is_supporter else "attack"
+        r = reconciler.reconcile(char, score_type)
+
+        total += 1
+        matched += bool(r.matches)
+        print(
+            f"{fname} 실제 {r.real_score / 100:,.2f} 계산 {r.calculated_score / 100:,.2f}"
+        )
+        for m in r.matches:
+            print("  " + ", ".join(f"{t.value}={name}" for t, name in m.items()))
+
+    print(f"{total}개 중 {matched}개 일치하는 조합 발견")
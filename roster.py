@@ -0,0 +1,144 @@
+"""
+원정대 전체 전투력 계산
+
+캐릭터 이름 하나로 같은 원정대의 모든 캐릭터를 찾고, 동시에 armory를 받아서
+딜러는 공격 점수, 서폿은 버프/케어 점수로 계산합니다.
+
+$ python roster.py 캐릭터명
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Literal
+
+import requests
+
+from battlepoint import BattlePointCalculator, CharacterInformation, projection
+from battlepoint.api import API_BASE, create_session, fetch_armory, fetch_siblings
+from battlepoint.quarantine import RECORD_ERRORS
+
+
+@dataclass
+class RosterEntry:
+    name: str
+    server_name: str
+    class_name: str
+    item_level: str
+    score_type: Literal["attack", "defense"] | None = None
+    score: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class RosterSummary:
+    charname: str
+    entries: list[RosterEntry] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def scored(self) -> list[RosterEntry]:
+        return [e for e in self.entries if e.score is not None]
+
+    def best(self, score_type: Literal["attack", "defense"]) -> RosterEntry | None:
+        candidates = [e for e in self.scored if e.score_type == score_type]
+        return max(candidates, key=lambda e: e.score, default=None)
+
+    def print(self):
+        print(
+            f"{self.charname}의 원정대 {len(self.entries)}캐릭터 ({self.elapsed:.2f}초)"
+        )
+        for e in self.entries:
+            if e.error is not None:
+                print(
+                    f"{e.name:<12} {e.class_name:<8} {e.item_level:>9} 실패: {e.error}"
+                )
+                continue
+            label = "공격" if e.score_type == "attack" else "서폿"
+            print(
+                f"{e.name:<12} {e.class_name:<8} {e.item_level:>9} {label} {e.score / 100:,.2f}"
+            )
+
+
+def _fetch_and_parse(
+    session: requests.Session, charname: str, api_base: str
+) -> CharacterInformation | None:
+    # 네트워크 대기와 파싱이 다른 캐릭터의 요청과 겹치도록 작업 스레드에서 파싱까지 진행
+    raw = fetch_armory(session, charname, api_base, projection.CHARACTER_FILTERS)
+    data = projection.loads(raw)
+    if data is None:
+        return None
+    return CharacterInformation(data, keep_raw=False)
+
+
+def score_roster(
+    charname: str,
+    *,
+    jwt: str | None = None,
+    api_base: str = API_BASE,
+    concurrency: int = 8,
+    calculator: BattlePointCalculator | None = None,
+) -> RosterSummary:
+    """
+    원정대의 모든 캐릭터를 동시에 받아서 파싱하고, 받는 대로 점수를 계산합니다.
+    점수 계산은 호출한 스레드에서 하나의 calculator로 진행합니다.
+    """
+    calculator = calculator or BattlePointCalculator()
+    summary = RosterSummary(charname=charname)
+    start = time.perf_counter()
+
+    with create_session(jwt, concurrency) as session:
+        siblings = fetch_siblings(session, charname, api_base)
+        entries = {
+            s["CharacterName"]: RosterEntry(
+                name=s["CharacterName"],
+                server_name=s.get("ServerName") or "",
+                class_name=s.get("CharacterClassName") or "",
+                item_level=s.get("ItemAvgLevel") or "",
+            )
+            for s in siblings
+        }
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(_fetch_and_parse, session, name, api_base): name
+                for name in entries
+            }
+            for future in as_completed(futures):
+                entry = entries[futures[future]]
+                try:
+                    char = future.result()
+                    if char is None:
+                        entry.error = "캐릭터 정보 없음"
+                        continue
+                    entry.score_type = "defense" if char.is_supporter else "attack"
+                    entry.score = calculator.calc(char, entry.score_type)
+                except RECORD_ERRORS as e:
+                    # requests.RequestException도 OSError, 배치와 같은 기준으로 한 캐릭터만 실패 처리
+                    entry.error = f"{type(e).__name__}: {e}"
+
+    summary.entries = sorted(
+        entries.values(), key=lambda e: (e.score is None, -(e.score or 0))
+    )
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="원정대 전투력 계산")
+    parser.add_argument("charname", help="원정대에 속한 캐릭터 이름")
+    parser.add_argument("--api-base", default=API_BASE)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--jwt", default="jwt.txt", help="JWT가 저장된 파일")
+    args = parser.parse_args()
+
+    try:
+        with open(args.jwt, "r") as fp:
+            jwt = fp.read().strip()
+    except FileNotFoundError:
+        jwt = None
+
+    score_roster(
+        args.charname, jwt=jwt, api_base=args.api_base, concurrency=args.concurrency
+    ).print()
@@ -0,0 +1,228 @@
+"""
+calc 결과 메모이제이션
+
+변화 없는 주기적 조회, 여러 사용자가 같은 캐릭터를 요청하는 경우, main.py 재실행처럼
+같은 armory 상태를 반복해서 계산하는 일이 많습니다.
+calc가 실제로 읽는 값만으로 만든 키(+ 계수 버전)로 점수를 캐시합니다.
+ArmoryProfile의 전투력 문자열, 장비 이름/툴팁 같은 값은 키에 들어가지 않으므로
+점수에 영향이 없는 변화는 캐시 적중으로 처리됩니다.
+전투 특성(battle_stat)은 calc가 읽으므로 키에 들어가고, 만찬 버프로 특성 값만 바뀌어도 다시 계산합니다.
+
+$ python score_cache.py "character*.json" --persist .score_cache.db
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Literal
+
+from battlepoint.calculator import BattlePointCalculator
+from battlepoint.character import CharacterInformation, EquipmentType
+from battlepoint.snapshot import content_hash, load_raw
+
+DEFAULT_MAXSIZE = 100_000
+
+
+def coefficient_version(calculator: BattlePointCalculator) -> str:
+    """계수 내용의 해시, 계수가 바뀌면 캐시 키도 바뀜"""
+    h = hashlib.blake2b(digest_size=8)
+    for d in (calculator.dict_battle_point, calculator.dict_arkpassive_point):
+        h.update(json.dumps(d, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def canonical_inputs(char: CharacterInformation) -> tuple:
+    """
+    calc가 읽는 값만 모은 tuple
+    calc는 계수를 적용할 때마다 내림하므로 장비, 각인, 보석 등의 순서도 그대로 유지합니다.
+    """
+    equipments = tuple(
+        (
+            str(e.equipment_type),
+            e.quality if e.equipment_type == EquipmentType.무기 else None,
+            tuple(e.elixir_effects),
+            e.elixir_set if e.equipment_type == EquipmentType.투구 else None,
+            tuple(e.grinding_effects),
+            tuple(e.bracelet_effects),
+            e.transcendence_level,
+            e.transcendence_grade,
+        )
+        for e in char.equipments
+    )
+    return (
+        char.base_attack_point,
+        char.base_health_point,
+        char.character_level,
+        char.character_class_name,
+        tuple(sorted(char.battle_stat.items())),
+        equipments,
+        tuple((e.name, e.total_level) for e in char.engravings),
+        tuple(char.card_sets),
+        tuple((g.tier, g.level) for g in char.gems),
+        tuple(
+            (group, tuple((n.name, n.level, n.tier) for n in nodes))
+            for group, nodes in sorted(char.arkpassive_nodes.items())
+        ),
+        tuple(sorted(char.karma.items())),
+        tuple(sorted(char.arkpassive_available_points.items())),
+    )
+
+
+class ScoreCache:
+    """
+    cache = ScoreCache(calculator, path=".score_cache.db")
+    cache.calc(char, "attack")      # CharacterInformation으로
+    cache.calc_raw(raw, "attack")   # OPENAPI 응답 바이트로, 같은 응답이면 파싱도 생략
+
+    메모리 LRU에 없으면 persistent(sqlite)에서 찾고, 그래도 없으면 calc로 계산합니다.
+    """
+
+    def __init__(
+        self,
+        calculator: BattlePointCalculator,
+        *,
+        maxsize: int = DEFAULT_MAXSIZE,
+        path: str | None = None,
+        version: str | None = None,
+    ):
+        self.calculator = calculator
+        self.version = version or coefficient_version(calculator)
+        self.maxsize = maxsize
+        self._scores: OrderedDict[str, int] = OrderedDict()
+        # 응답 바이트 해시 -> 정규화된 키, 같은 응답이면 파싱 없이 키를 찾음
+        self._raw_keys: OrderedDict[str, str] = OrderedDict()
+
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if path is not None:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score INTEGER)"
+            )
+
+    def key(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"],
+    ) -> str:
+        # tuple 안에는 str, int, None, tuple만 있으므로 repr이 항상 같은 문자열을 만듦
+        body = repr((self.version, score_type, canonical_inputs(char)))
+        return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _remember(self, lru: OrderedDict, key: str, value):
+        lru[key] = value
+        if len(lru) > self.maxsize:
+            lru.popitem(last=False)
+
+    def _lookup(self, key: str) -> int | None:
+        score = self._scores.get(key)
+        if score is not None:
+            self._scores.move_to_end(key)
+            self.hits += 1
+            return score
+
+        if self.conn is not None:
+            row = self.conn.execute(
+                "SELECT score FROM scores WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.persistent_hits += 1
+                self._remember(self._scores, key, row[0])
+                return row[0]
+        return None
+
+    def _store(self, key: str, score: int):
+        self.misses += 1
+        self._remember(self._scores, key, score)
+        if self.conn is not None:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO scores VALUES (?, ?)", (key, score)
+                )
+
+    def calc(
+        self,
+        char: CharacterInformation,
+        score_type: Literal["attack", "defense"] = "attack",
+    ) -> int:
+        key = self.key(char, score_type)
+        score = self._lookup(key)
+        if score is None:
+            score = self.calculator.calc(char, score_type)
+            self._store(key, score)
+        return score
+
+    def calc_raw(
+        self,
+        raw: bytes,
+        score_type: Literal["attack", "defense"] = "attack",
+    ) -> int:
+        raw_key = f"{content_hash(raw)}:{score_type}"
+        key = self._raw_keys.get(raw_key)
+        if key is not None:
+            self._raw_keys.move_to_end(raw_key)
+            score = self._lookup(key)
+            if score is not None:
+                return score
+
+        char = load_raw(raw)
+        key = self.key(char, score_type)
+        self._remember(self._raw_keys, raw_key, key)
+        score = self._lookup(key)
+        if score is None:
+            score = self.calculator.calc(char, score_type)
+            self._store(key, score)
+        return score
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.persistent_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (
+            (self.hits + self.persistent_hits) / self.requests if self.requests else 0.0
+        )
+
+    def stats(self) -> str:
+        return (
+            f"요청 {self.requests}, 메모리 적중 {self.hits}, "
+            f"저장소 적중 {self.persistent_hits}, 계산 {self.misses} "
+            f"(적중률 {self.hit_rate:.1%})"
+        )
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calc 결과 캐시")
+    parser.add_argument("pattern", nargs="?", default="character*.json")
+    parser.add_argument("--persist", help="sqlite 파일, 없으면 메모리에만 캐시")
+    parser.add_argument("--repeat", type=int, default=2, help="반복 횟수")
+    args = parser.parse_args()
+
+    cache = ScoreCache(BattlePointCalculator(), path=args.persist)
+    fnames = glob.glob(args.pattern)
+    raws = []
+    for fname in fnames:
+        with open(fname, "rb") as fp:
+            raws.append(fp.read())
+
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        for raw in raws:
+            cache.calc_raw(raw)
+        elapsed = time.perf_counter() - start
+        per_item = elapsed / len(raws) * 1e6 if raws else 0.0
+        print(f"{i + 1}회차 {len(raws)}개 {elapsed:.3f}초 ({per_item:,.1f}us/개)")
+    print(cache.stats())
+    cache.close()
@@ -0,0 +1,204 @@
+"""
+직업별 전투력 분포를 고정된 메모리로 추정하는 스트리밍 분위수 스케치
+
+"바드 상위 X%"를 구하기 위해 모든 캐릭터의 점수를 정렬하지 않고,
+점수를 계산할 때마다 KLL 스케치에 넣어둡니다.
+스케치는 프로세스끼리 합칠(merge) 수 있고 json으로 저장할 수 있습니다.
+"""
+
+import json
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Literal
+
+# 스케치 정확도, 클수록 정확하고 메모리를 많이 사용
+# k=200이면 순위 오차가 대략 1.5% 이내
+DEFAULT_K = 200
+KLL_C = 2 / 3
+
+
+class KLLSketch:
+    """
+    KLL 분위수 스케치 (Karnin, Lang, Liberty 2016)
+
+    level h에 있는 값은 2^h개의 원본 값을 대표합니다.
+    level이 가득 차면 정렬 후 절반만 다음 level로 올려서 크기를 유지합니다.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: int | None = None):
+        self.k = k
+        self.n = 0  # 지금까지 넣은 값의 개수
+        self.compactors: list[list[int]] = [[]]
+        self._rng = random.Random(seed)
+        self._cdf: tuple[list[int], list[int]] | None = None  # 질의용 캐시
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return math.ceil(self.k * KLL_C**depth) + 1
+
+    def _size(self) -> int:
+        return sum(map(len, self.compactors))
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value: int):
+        self.compactors[0].append(value)
+        self.n += 1
+        self._cdf = None
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for h, compactor in enumerate(self.compactors):
+                if len(compactor) < self._capacity(h):
+                    continue
+
+                if h + 1 == len(self.compactors):
+                    self.compactors.append([])
+
+                compactor.sort()
+                # 홀수 개면 하나는 그대로 남겨서 전체 가중치를 보존
+                keep = [compactor.pop()] if len(compactor) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.compactors[h + 1].extend(compactor[offset::2])
+                compactor[:] = keep
+                break
+
+    def merge(self, other: "KLLSketch"):
+        """다른 스케치의 값을 모두 합칩니다. k는 두 스케치 중 큰 값을 따릅니다."""
+        self.k = max(self.k, other.k)
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for h, compactor in enumerate(other.compactors):
+            self.compactors[h].extend(compactor)
+        self.n += other.n
+        self._cdf = None
+        self._compress()
+
+    def _build_cdf(self) -> tuple[list[int], list[int]]:
+        if self._cdf is None:
+            items = sorted(
+                (value, 1 << h)
+                for h, compactor in enumerate(self.compactors)
+                for value in compactor
+            )
+            values = [v for v, _ in items]
+            cum_weights = list(accumulate(w for _, w in items))
+            self._cdf = values, cum_weights
+        return self._cdf
+
+    def rank(self, value: int) -> float:
+        """value 이하인 값의 비율 (0~1)"""
+        values, cum_weights = self._build_cdf()
+        if not values:
+            return 0.0
+        idx = bisect_right(values, value)
+        if idx == 0:
+            return 0.0
+        return cum_weights[idx - 1] / cum_weights[-1]
+
+    def quantile(self, q: float) -> int | None:
+        """하위 q(0~1) 지점의 값"""
+        values, cum_weights = self._build_cdf()
+        if not values:
+            return None
+        target = q * cum_weights[-1]
+        idx = bisect_right(cum_weights, target)
+        return values[min(idx, len(values) - 1)]
+
+    def to_dict(self) -> dict:
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "KLLSketch":
+        sketch = cls(k=d["k"])
+        sketch.n = d["n"]
+        sketch.compactors = [list(c) for c in d["compactors"]] or [[]]
+        return sketch
+
+
+class ScoreDistribution:
+    """
+    (직업, 점수 종류)별 KLL 스케치 모음
+
+    dist = ScoreDistribution()
+    dist.add(char.character_class_name, "attack", calculator.calc(char, "attack"))
+    dist.top_percent("바드", "defense", 250000)  # 상위 몇 %인지
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.sketches: dict[tuple[str, str], KLLSketch] = {}
+
+    def add(
+        self,
+        class_name: str,
+        score_type: Literal["attack", "defense"],
+        score: int,
+    ):
+        key = (class_name, score_type)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = KLLSketch(self.k)
+        sketch.update(score)
+
+    def count(self, class_name: str, score_type: Literal["attack", "defense"]) -> int:
+        sketch = self.sketches.get((class_name, score_type))
+        return sketch.n if sketch else 0
+
+    def top_percent(
+        self,
+        class_name: str,
+        score_type: Literal["attack", "defense"],
+        score: int,
+    ) -> float | None:
+        """score보다 높은 점수를 가진 캐릭터의 비율 (%), 표본이 없으면 None"""
+        sketch = self.sketches.get((class_name, score_type))
+        if sketch is None or sketch.n == 0:
+            return None
+        return (1 - sketch.rank(score)) * 100
+
+    def percentile(
+        self,
+        class_name: str,
+        score_type: Literal["attack", "defense"],
+        top: float,
+    ) -> int | None:
+        """상위 top% 커트라인 점수"""
+        sketch = self.sketches.get((class_name, score_type))
+        if sketch is None:
+            return None
+        return sketch.quantile(1 - top / 100)
+
+    def merge(self, other: "ScoreDistribution"):
+        """다른 프로세스에서 만든 분포를 합칩니다."""
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = KLLSketch.from_dict(sketch.to_dict())
+
+    def save(self, fname: str):
+        data = {
+            "k": self.k,
+            "sketches": [
+                {"class_name": c, "score_type": t, **sketch.to_dict()}
+                for (c, t), sketch in self.sketches.items()
+            ],
+        }
+        with open(fname, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, fname: str) -> "ScoreDistribution":
+        with open(fname, "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+
+        dist = cls(k=data["k"])
+        for d in data["sketches"]:
+            dist.sketches[(d["class_name"], d["score_type"])] = KLLSketch.from_dict(d)
+        return dist
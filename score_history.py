@@ -0,0 +1,439 @@
+"""
+캐릭터별 전투력 기록
+
+매일 조회한 armory를 통째로 저장하지 않고, 캐릭터마다
+(시각, 공격 점수, 서폿 점수, BattlePointType 단계별 증가율)만 시계열로 저장합니다.
+
+- 점수와 단계별 증가율은 앞 기록과의 차이를 zigzag varint로 인코딩
+  단계별 증가율은 바뀐 단계만 비트마스크로 표시해서 저장하므로 변화가 없는 날은 몇 바이트
+- BLOCK_SIZE개씩 블록으로 묶어서 sqlite에 저장, 블록의 첫 기록은 0과의 차이(키프레임)
+  구간 조회는 시각 범위가 겹치는 블록만 디코딩
+- 추가만 가능, 캐릭터마다 시각 순서대로 추가해야 함
+
+$ python score_history.py record "character*.json" --at 2026-10-19
+$ python score_history.py show 이름 --since 2026-10-01
+$ python score_history.py gains --days 7 --score-type attack
+"""
+
+import argparse
+import glob
+import heapq
+import sqlite3
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Literal, Self
+
+from battlepoint.calculator import (
+    CARE_BATTLE_POINT_TYPES,
+    BattlePointCalculator,
+    BattlePointType,
+)
+from battlepoint.character import CharacterInformation
+from battlepoint.snapshot import load_character
+
+SCORE_HISTORY_PATH = ".score_history.db"
+BLOCK_SIZE = 64
+
+# 단계별 증가율을 정수로 저장하는 단위, (증가율 - 1) * FACTOR_SCALE
+FACTOR_SCALE = 1_000_000
+STAGES = tuple(BattlePointType)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,   -- 지금 추가 중인 블록 번호
+    count INTEGER NOT NULL, -- 전체 기록 수
+    last BLOB NOT NULL      -- 마지막 기록 (키프레임 인코딩)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    name TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (name, seq)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryPoint:
+    ts: int  # unix time (초)
+    attack: int
+    defense: int
+    factors: tuple[int, ...]  # STAGES 순서, (증가율 - 1) * FACTOR_SCALE
+
+    def score(self, score_type: Literal["attack", "defense"]) -> int:
+        return self.attack if score_type == "attack" else self.defense
+
+    def gain(self, battle_point_type: BattlePointType) -> float:
+        return 1 + self.factors[STAGES.index(battle_point_type)] / FACTOR_SCALE
+
+
+ZERO = HistoryPoint(0, 0, 0, (0,) * len(STAGES))
+
+
+def make_point(
+    char: CharacterInformation, calculator: BattlePointCalculator, ts: int
+) -> HistoryPoint:
+    """두 점수와 단계별 증가율, 케어 점수 단계는 서폿 점수 기준"""
+    attack = calculator.calc_factors(char, "attack")
+    defense = calculator.calc_factors(char, "defense")
+    attack_gains, defense_gains = attack.stage_gains(), defense.stage_gains()
+    factors = tuple(
+        round(
+            ((defense_gains if t in CARE_BATTLE_POINT_TYPES else attack_gains)[t] - 1)
+            * FACTOR_SCALE
+        )
+        for t in STAGES
+    )
+    return HistoryPoint(ts, attack.score(), defense.score(), factors)
+
+
+def _write_uvarint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_uvarint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def encode_point(out: bytearray, point: HistoryPoint, prev: HistoryPoint):
+    """
+    시각 차이(uvarint), 공격/서폿 점수 차이(zigzag), 바뀐 단계 비트마스크(uvarint),
+    바뀐 단계마다 차이(zigzag)
+    """
+    _write_uvarint(out, point.ts - prev.ts)
+    _write_uvarint(out, _zigzag(point.attack - prev.attack))
+    _write_uvarint(out, _zigzag(point.defense - prev.defense))
+    mask, deltas = 0, []
+    for i, (value, before) in enumerate(zip(point.factors, prev.factors)):
+        if value != before:
+            mask |= 1 << i
+            deltas.append(value - before)
+    _write_uvarint(out, mask)
+    for delta in deltas:
+        _write_uvarint(out, _zigzag(delta))
+
+
+def decode_points(data: bytes, prev: HistoryPoint = ZERO) -> list[HistoryPoint]:
+    points = []
+    pos = 0
+    while pos < len(data):
+        ts_delta, pos = _read_uvarint(data, pos)
+        attack, pos = _read_uvarint(data, pos)
+        defense, pos = _read_uvarint(data, pos)
+        mask, pos = _read_uvarint(data, pos)
+        factors = prev.factors
+        if mask:
+            factors = list(factors)
+            i = 0
+            while mask:
+                if mask & 1:
+                    delta, pos = _read_uvarint(data, pos)
+                    factors[i] += _unzigzag(delta)
+                mask >>= 1
+                i += 1
+            factors = tuple(factors)
+        prev = HistoryPoint(
+            prev.ts + ts_delta,
+            prev.attack + _unzigzag(attack),
+            prev.defense + _unzigzag(defense),
+            factors,
+        )
+        points.append(prev)
+    return points
+
+
+def _keyframe(point: HistoryPoint) -> bytes:
+    out = bytearray()
+    encode_point(out, point, ZERO)
+    return bytes(out)
+
+
+@dataclass
+class Gain:
+    name: str
+    start: HistoryPoint
+    end: HistoryPoint
+    score_type: Literal["attack", "defense"]
+
+    @property
+    def delta(self) -> int:
+        return self.end.score(self.score_type) - self.start.score(self.score_type)
+
+    def changed_stages(self) -> list[tuple[BattlePointType, float, float]]:
+        """증가율이 바뀐 단계들의 (단계, 처음 증가율, 마지막 증가율)"""
+        return [
+            (t, self.start.gain(t), self.end.gain(t))
+            for t, before, after in zip(STAGES, self.start.factors, self.end.factors)
+            if before != after
+        ]
+
+
+class ScoreHistory:
+    def __init__(
+        self, path: str | Path = SCORE_HISTORY_PATH, block_size: int = BLOCK_SIZE
+    ):
+        self.block_size = block_size
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _append(self, name: str, point: HistoryPoint):
+        row = self.conn.execute(
+            "SELECT seq, count, last FROM series WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            seq, count, prev = 0, 0, None
+        else:
+            seq, count, last = row
+            (prev,) = decode_points(last)
+            if point.ts < prev.ts:
+                raise ValueError(
+                    f"{name}: 마지막 기록({prev.ts})보다 이전 시각({point.ts})입니다."
+                )
+
+        block = None
+        if prev is not None:
+            block = self.conn.execute(
+                "SELECT data, count FROM blocks WHERE name = ? AND seq = ?",
+                (name, seq),
+            ).fetchone()
+
+        if block is None or block[1] >= self.block_size:
+            # 새 블록은 키프레임부터
+            seq += block is not None
+            self.conn.execute(
+                "INSERT INTO blocks (name, seq, start_ts, end_ts, count, data) "
+                "VALUES (?, ?, ?, ?, 1, ?)",
+                (name, seq, point.ts, point.ts, _keyframe(point)),
+            )
+        else:
+            data = bytearray(block[0])
+            encode_point(data, point, prev)
+            self.conn.execute(
+                "UPDATE blocks SET end_ts = ?, count = count + 1, data = ? "
+                "WHERE name = ? AND seq = ?",
+                (point.ts, bytes(data), name, seq),
+            )
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO series (name, seq, count, last) VALUES (?, ?, ?, ?)",
+            (name, seq, count + 1, _keyframe(point)),
+        )
+
+    def append(self, name: str, point: HistoryPoint):
+        with self.conn:
+            self._append(name, point)
+
+    def append_many(self, items: Iterable[tuple[str, HistoryPoint]]) -> int:
+        """한 트랜잭션으로 추가, 추가한 개수를 반환"""
+        count = 0
+        with self.conn:
+            for name, point in items:
+                self._append(name, point)
+                count += 1
+        return count
+
+    def names(self) -> list[str]:
+        return [
+            row[0] for row in self.conn.execute("SELECT name FROM series ORDER BY name")
+        ]
+
+    def latest(self, name: str) -> HistoryPoint | None:
+        row = self.conn.execute(
+            "SELECT last FROM series WHERE name = ?", (name,)
+        ).fetchone()
+        return decode_points(row[0])[0] if row else None
+
+    def range(
+        self, name: str, start: int | None = None, end: int | None = None
+    ) -> list[HistoryPoint]:
+        """start <= ts <= end인 기록, 시각 범위가 겹치는 블록만 읽음"""
+        start = -(1 << 62) if start is None else start
+        end = 1 << 62 if end is None else end
+        rows = self.conn.execute(
+            "SELECT data FROM blocks WHERE name = ? AND end_ts >= ? AND start_ts <= ? "
+            "ORDER BY seq",
+            (name, start, end),
+        )
+        return [
+            p for (data,) in rows for p in decode_points(data) if start <= p.ts <= end
+        ]
+
+    def _points_at(self, ts: int) -> dict[str, HistoryPoint]:
+        """
+        캐릭터마다 ts 이전의 마지막 기록
+        ts 이전 기록이 없으면 첫 기록 (중간에 추가된 캐릭터는 처음 기록부터 비교)
+        """
+        rows = self.conn.execute(
+            "SELECT b.name, b.data FROM blocks b JOIN ("
+            "  SELECT name, COALESCE(MAX(CASE WHEN start_ts <= ? THEN seq END), 0) seq"
+            "  FROM blocks GROUP BY name"
+            ") s ON b.name = s.name AND b.seq = s.seq",
+            (ts,),
+        )
+        result = {}
+        for name, data in rows:
+            points = decode_points(data)
+            chosen = points[0]
+            for p in points:
+                if p.ts > ts:
+                    break
+                chosen = p
+            result[name] = chosen
+        return result
+
+    def largest_gains(
+        self,
+        since: int,
+        until: int | None = None,
+        score_type: Literal["attack", "defense"] = "attack",
+        limit: int = 20,
+    ) -> list[Gain]:
+        """since 시점부터 until 시점(없으면 마지막 기록)까지 점수가 가장 많이 오른 캐릭터들"""
+        starts = self._points_at(since)
+        if until is None:
+            ends = {
+                name: decode_points(last)[0]
+                for name, last in self.conn.execute("SELECT name, last FROM series")
+            }
+        else:
+            ends = self._points_at(until)
+
+        gains = (
+            Gain(name, start, ends[name], score_type)
+            for name, start in starts.items()
+            if ends[name].ts > start.ts
+        )
+        return heapq.nlargest(limit, gains, key=lambda g: g.delta)
+
+    def stats(self) -> tuple[int, int, int]:
+        """(캐릭터 수, 기록 수, 블록 바이트 합)"""
+        characters, points = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(count), 0) FROM series"
+        ).fetchone()
+        (size,) = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blocks"
+        ).fetchone()
+        return characters, points, size
+
+
+def _parse_time(value: str | None) -> int | None:
+    """2026-10-19, 2026-10-19T09:00 또는 unix time"""
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _format_time(ts: int) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="캐릭터별 전투력 기록")
+    parser.add_argument("--db", default=SCORE_HISTORY_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="character_*.json을 계산해서 기록 추가")
+    p.add_argument("pattern", nargs="?", default="character*.json")
+    p.add_argument("--at", help="기록 시각 (2026-10-19 또는 unix time), 없으면 지금")
+
+    p = sub.add_parser("show", help="캐릭터 하나의 기록")
+    p.add_argument("name")
+    p.add_argument("--since")
+    p.add_argument("--until")
+
+    p = sub.add_parser("gains", help="기간 동안 가장 많이 오른 캐릭터")
+    p.add_argument("--days", type=float, default=7)
+    p.add_argument("--until", help="없으면 마지막 기록까지")
+    p.add_argument("--score-type", choices=["attack", "defense"], default="attack")
+    p.add_argument("--limit", type=int, default=20)
+
+    sub.add_parser("stats", help="기록 수와 크기")
+    args = parser.parse_args()
+
+    with ScoreHistory(args.db) as history:
+        if args.command == "record":
+            ts = _parse_time(args.at) or int(time.time())
+            calculator = BattlePointCalculator()
+            points, failed = [], 0
+            for fname in sorted(glob.glob(args.pattern)):
+                name = Path(fname).stem.removeprefix("character_")
+                try:
+                    char = load_character(fname)
+                    points.append((name, make_point(char, calculator, ts)))
+                except (OSError, RuntimeError, ValueError, KeyError, TypeError) as e:
+                    failed += 1
+                    print(f"{name} 실패: {type(e).__name__}: {e}")
+            try:
+                added = history.append_many(points)
+            except ValueError as e:
+                # 하나라도 실패하면 트랜잭션 전체가 취소됨
+                raise SystemExit(f"기록하지 않음: {e}") from e
+            print(f"{added}개 기록, {failed}개 실패 ({_format_time(ts)})")
+
+        elif args.command == "show":
+            since, until = _parse_time(args.since), _parse_time(args.until)
+            for point in history.range(args.name, since, until):
+                print(
+                    f"{_format_time(point.ts)} "
+                    f"공격 {point.attack / 100:>10,.2f} 서폿 {point.defense / 100:>10,.2f}"
+                )
+
+        elif args.command == "gains":
+            until = _parse_time(args.until)
+            since = (until or int(time.time())) - int(args.days * 86400)
+            for gain in history.largest_gains(
+                since, until, args.score_type, args.limit
+            ):
+                stages = ", ".join(
+                    f"{t.value} {(after / before - 1) * 100:+.2f}%"
+                    for t, before, after in gain.changed_stages()
+                )
+                print(
+                    f"{gain.name:<12} {gain.start.score(args.score_type) / 100:>10,.2f} -> "
+                    f"{gain.end.score(args.score_type) / 100:>10,.2f} "
+                    f"({gain.delta / 100:+,.2f}) {stages}"
+                )
+
+        else:
+            characters, points, size = history.stats()
+            per_point = size / points if points else 0
+            print(
+                f"캐릭터 {characters}개, 기록 {points}개, {size / 1024:,.1f}KB "
+                f"(기록당 {per_point:.1f}바이트)"
+            )
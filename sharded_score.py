@@ -0,0 +1,701 @@
+"""
+여러 머신에 나눠서 계산하는 코디네이터/작업자
+
+서버 전체 재계산이나 기록 채우기는 한 대로는 오래 걸리므로
+코디네이터가 캐릭터 목록(폴더, ndjson, pack)을 shard로 나누고, 작업자가 TCP로 shard를 받아서
+계산한 결과를 돌려줍니다. 작업자는 계수를 한 번만 읽은 calculator로 계속 계산합니다.
+
+- 작업자가 요청할 때 shard를 빌려줌 (pull), 원본 응답도 같이 보내므로 파일 공유가 필요 없음
+- 연결이 끊기거나 --lease-timeout 안에 결과가 오지 않은 shard는 다시 빌려줌 (--max-attempts번까지)
+- 결과는 캐릭터 키 기준으로 한 번만 기록, 늦게 온 중복 결과는 버림
+  --resume이면 이미 sink에 있는 캐릭터는 다시 계산하지 않음
+- 계수 버전이 다른 작업자는 연결할 때 거절
+
+메시지: >II (헤더 길이, 본문 길이) + 헤더 json + 본문
+    작업자 -> {"type": "hello", "worker": ..., "coefficient_version": ..., "token": ...}
+    작업자 -> {"type": "get"}
+    코디네이터 -> {"type": "shard", "shard": 0, "keys": [...], "sizes": [...]} + 원본 응답들
+                {"type": "wait", "seconds": 1.0} 남은 shard가 모두 다른 작업자에게 있음
+                {"type": "done"}
+    작업자 -> {"type": "result", "shard": 0, "records": [...], "errors": [...]}
+
+$ python sharded_score.py coordinator ./characters --sink scores.ndjson --port 7100
+$ python sharded_score.py worker 10.0.0.1:7100 --processes 8
+한 대에서 시험할 때
+$ python sharded_score.py coordinator ./characters --sink scores.ndjson --local-workers 4
+"""
+
+import argparse
+import glob
+import hmac
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from battlepoint.calculator import (
+    ARKPASSIVE_PATH,
+    BATTLE_POINT_PATH,
+    BattlePointCalculator,
+)
+from battlepoint.pack import PACK_SUFFIX, expand, read_input, source_name
+from battlepoint.quarantine import ErrorCounters, ErrorRecord, Quarantine
+from pipeline import _init_worker, _parse_and_score, open_sink
+from score_cache import coefficient_version
+
+DEFAULT_PORT = 7100
+DEFAULT_SHARD_SIZE = 64
+LEASE_TIMEOUT = 300.0
+MAX_ATTEMPTS = 3
+WAIT_SECONDS = 1.0
+CONNECT_TIMEOUT = 30.0
+DRAIN_TIMEOUT = 5.0
+
+_FRAME = struct.Struct(">II")
+
+
+# ---------------------------------------------------------------------------
+# 메시지
+
+
+def send_message(fp, header: dict, body: bytes = b""):
+    data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    fp.write(_FRAME.pack(len(data), len(body)) + data + body)
+    fp.flush()
+
+
+def recv_message(fp) -> tuple[dict, bytes] | None:
+    """연결이 끊겼으면 None"""
+    frame = fp.read(_FRAME.size)
+    if len(frame) < _FRAME.size:
+        return None
+    header_size, body_size = _FRAME.unpack(frame)
+    header = fp.read(header_size)
+    body = fp.read(body_size)
+    if len(header) < header_size or len(body) < body_size:
+        return None
+    return json.loads(header), body
+
+
+# ---------------------------------------------------------------------------
+# 입력
+
+
+@dataclass(frozen=True)
+class Item:
+    """캐릭터 하나의 원본 응답 위치, length가 -1이면 파일 전체 (또는 pack#이름)"""
+
+    key: str
+    path: str
+    offset: int = 0
+    length: int = -1
+
+    def read(self) -> bytes:
+        if self.length < 0:
+            return read_input(self.path)
+        with open(self.path, "rb") as fp:
+            fp.seek(self.offset)
+            return fp.read(self.length)
+
+
+def iter_directory(pattern: str) -> Iterator[Item]:
+    """character_{이름}.json 파일들, 키는 이름"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "character_*.json")
+    for fname in sorted(glob.glob(pattern)):
+        yield Item(Path(fname).stem.removeprefix("character_"), fname)
+
+
+def iter_ndjson(fname: str) -> Iterator[Item]:
+    """한 줄에 armory 응답 하나인 파일, 키는 파일이름:줄번호"""
+    name = Path(fname).name
+    offset = 0
+    with open(fname, "rb") as fp:
+        for lineno, line in enumerate(fp, 1):
+            if line.strip():
+                yield Item(f"{name}:{lineno}", fname, offset, len(line))
+            offset += len(line)
+
+
+def iter_pack(fname: str) -> Iterator[Item]:
+    """pack 파일의 캐릭터별 가장 최근 응답, 키는 이름"""
+    for source in expand(fname):
+        yield Item(source_name(source), source)
+
+
+def iter_corpus(source: str) -> Iterator[Item]:
+    if source.endswith((".ndjson", ".jsonl")):
+        return iter_ndjson(source)
+    if source.endswith(PACK_SUFFIX):
+        return iter_pack(source)
+    return iter_directory(source)
+
+
+def done_keys(target: str | None) -> set[str]:
+    """sink에 이미 기록된 캐릭터 키 (--resume)"""
+    if not target or target == "-" or not os.path.exists(target):
+        return set()
+    if target.endswith((".db", ".sqlite", ".sqlite3")):
+        conn = sqlite3.connect(target)
+        try:
+            return {name for (name,) in conn.execute("SELECT name FROM scores")}
+        finally:
+            conn.close()
+    keys = set()
+    with open(target, "r", encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                keys.add(json.loads(line)["name"])
+            except (ValueError, KeyError):
+                # 중단될 때 반쯤 쓰인 마지막 줄
+                continue
+    return keys
+
+
+# ---------------------------------------------------------------------------
+# 코디네이터
+
+
+@dataclass
+class Shard:
+    id: int
+    items: list[Item]
+    attempts: int = 0
+    worker: str | None = None
+    deadline: float = 0.0
+    done: bool = False
+    failed: bool = False
+
+
+@dataclass
+class WorkerStats:
+    name: str
+    shards: int = 0
+    records: int = 0
+    parse_time: float = 0.0
+    score_time: float = 0.0
+    first_lease: float | None = None
+    last_result: float | None = None
+    connected: bool = True
+
+    def line(self) -> str:
+        elapsed = (
+            self.last_result - self.first_lease
+            if self.first_lease is not None and self.last_result is not None
+            else 0.0
+        )
+        rate = self.records / elapsed if elapsed else 0.0
+        busy = (
+            (self.parse_time + self.score_time) / self.records * 1000
+            if self.records
+            else 0.0
+        )
+        return (
+            f"{self.name:<24} shard {self.shards:>5} 캐릭터 {self.records:>8,} "
+            f"{rate:>8.1f}/s 평균 {busy:>6.2f}ms"
+        )
+
+
+class Coordinator:
+    """shard 대여/반납과 결과 기록, 핸들러 스레드들이 lock으로 나눠 씀"""
+
+    def __init__(
+        self,
+        items: list[Item],
+        sink,
+        *,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        lease_timeout: float = LEASE_TIMEOUT,
+        max_attempts: int = MAX_ATTEMPTS,
+        quarantine: Quarantine | None = None,
+        coefficient_version: str | None = None,
+        token: str | None = None,
+    ):
+        self.shards = [
+            Shard(i, items[start : start + shard_size])
+            for i, start in enumerate(range(0, len(items), shard_size))
+        ]
+        self.pending = list(reversed(self.shards))  # pop()으로 앞 shard부터
+        self.sink = sink
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.quarantine = quarantine
+        self.coefficient_version = coefficient_version
+        self.token = token
+
+        self.lock = threading.Condition()
+        self.written: set[str] = set()
+        self.counters = ErrorCounters()
+        self.workers: dict[str, WorkerStats] = {}
+        self.retries = 0
+        self.duplicates = 0
+        self.started = time.perf_counter()
+
+    @property
+    def finished(self) -> bool:
+        return all(shard.done or shard.failed for shard in self.shards)
+
+    def hello(self, header: dict) -> str | None:
+        """작업자 등록, 거절하면 이유"""
+        if self.token is not None and not hmac.compare_digest(
+            str(header.get("token") or ""), self.token
+        ):
+            return "토큰이 맞지 않습니다."
+        version = header.get("coefficient_version")
+        if self.coefficient_version is not None and version != self.coefficient_version:
+            return f"계수 버전이 다릅니다. ({version} != {self.coefficient_version})"
+        with self.lock:
+            # 같은 이름으로 두 연결을 받으면 통계가 덮어써지고, 한쪽이 끊길 때 다른 쪽이 빌린 shard까지
+            # 돌려주게 되므로 거절 (끊긴 뒤 다시 접속한 작업자는 기존 통계에 이어서 기록)
+            stats = self.workers.get(header["worker"])
+            if stats is not None and stats.connected:
+                return (
+                    f"같은 이름의 작업자가 이미 접속해 있습니다. ({header['worker']})"
+                )
+            if stats is None:
+                self.workers[header["worker"]] = WorkerStats(header["worker"])
+            else:
+                stats.connected = True
+        return None
+
+    def _expire(self, now: float):
+        for shard in self.shards:
+            if shard.worker is not None and not shard.done and shard.deadline < now:
+                self._release(shard)
+
+    def _release(self, shard: Shard):
+        """빌려준 shard를 되돌림, 시도 횟수를 넘었으면 실패 처리"""
+        shard.worker = None
+        if shard.attempts >= self.max_attempts:
+            shard.failed = True
+            self.lock.notify_all()
+            return
+        self.retries += 1
+        self.pending.append(shard)
+
+    def lease(self, worker: str) -> Shard | None | float:
+        """빌려줄 shard, 없으면 기다릴 시간(초), 모두 끝났으면 None"""
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+            while self.pending:
+                shard = self.pending.pop()
+                if shard.done or shard.failed:
+                    continue
+                shard.attempts += 1
+                shard.worker = worker
+                shard.deadline = now + self.lease_timeout
+                stats = self.workers[worker]
+                if stats.first_lease is None:
+                    stats.first_lease = time.perf_counter()
+                return shard
+            if self.finished:
+                return None
+            return WAIT_SECONDS
+
+    def give_up(self, worker: str, shard_id: int | None = None, *, retry: bool = True):
+        """작업자 연결이 끊겼거나 shard 계산에 실패함, retry=False면 다시 빌려주지 않음"""
+        with self.lock:
+            for shard in self.shards:
+                if shard.worker != worker or shard.done:
+                    continue
+                if shard_id is None or shard.id == shard_id:
+                    if not retry:
+                        shard.attempts = self.max_attempts
+                    self._release(shard)
+            if shard_id is None:
+                self.workers[worker].connected = False
+                self.lock.notify_all()
+
+    def complete(
+        self, worker: str, shard_id: int, records: list[dict], errors: list[dict]
+    ):
+        """shard 결과 기록, 이미 기록한 캐릭터는 건너뜀"""
+        with self.lock:
+            shard = self.shards[shard_id]
+            stats = self.workers[worker]
+            stats.last_result = time.perf_counter()
+            if shard.done:
+                # 시간이 지나서 다른 작업자에게 다시 빌려준 shard
+                self.duplicates += 1
+                return
+            shard.done = True
+            if shard.worker == worker:
+                shard.worker = None
+            stats.shards += 1
+            stats.records += len(records) + len(errors)
+
+            items = {item.key: item for item in shard.items}
+            for record in records:
+                if record["name"] in self.written:
+                    continue
+                stats.parse_time += record.pop("parse_time", 0.0)
+                stats.score_time += record.pop("score_time", 0.0)
+                record["scored_at"] = time.time()
+                self.sink.write(record)
+                self.written.add(record["name"])
+                self.counters.ok()
+            for error in errors:
+                record = ErrorRecord(**error)
+                if record.name in self.written:
+                    continue
+                if self.quarantine is not None:
+                    self.quarantine.put(record, items[record.name].read())
+                line = record.to_dict()
+                line["scored_at"] = record.failed_at
+                self.sink.write(line)
+                self.written.add(record.name)
+                self.counters.fail(record.category)
+            self.lock.notify_all()
+
+    def progress(self) -> str:
+        with self.lock:
+            done = sum(shard.done for shard in self.shards)
+            leased = sum(shard.worker is not None for shard in self.shards)
+            elapsed = time.perf_counter() - self.started
+            total = self.counters.total
+            connected = sum(w.connected for w in self.workers.values())
+            return (
+                f"shard {done}/{len(self.shards)} (계산 중 {leased}) "
+                f"캐릭터 {total:,}개 {total / elapsed if elapsed else 0:,.1f}/s "
+                f"재시도 {self.retries} 작업자 {connected}"
+            )
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [
+            (
+                f"{len(self.shards)}개 shard, {elapsed:.2f}초, "
+                f"재시도 {self.retries}, 버린 중복 결과 {self.duplicates}"
+            )
+        ]
+        lines += [stats.line() for stats in self.workers.values()]
+        failed = [shard for shard in self.shards if shard.failed]
+        if failed:
+            keys = sum(len(shard.items) for shard in failed)
+            lines.append(
+                f"{len(failed)}개 shard({keys}캐릭터)가 {self.max_attempts}번 모두 실패, "
+                "--resume으로 다시 실행하면 이 캐릭터들만 계산합니다."
+            )
+        lines.append(self.counters.report())
+        return "\n".join(lines)
+
+
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    server: "CoordinatorServer"
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        message = recv_message(self.rfile)
+        if message is None or message[0].get("type") != "hello":
+            return
+        worker = f"{message[0].get('worker')}@{self.client_address[0]}"
+        message[0]["worker"] = worker
+        reason = coordinator.hello(message[0])
+        if reason is not None:
+            send_message(self.wfile, {"type": "rejected", "reason": reason})
+            print(f"{worker} 거절: {reason}", file=sys.stderr)
+            return
+
+        try:
+            self._serve(coordinator, worker)
+        except (OSError, ValueError) as e:
+            print(f"{worker} 연결 끊김: {e}", file=sys.stderr)
+        finally:
+            coordinator.give_up(worker)
+
+    def _serve(self, coordinator: Coordinator, worker: str):
+        while (message := recv_message(self.rfile)) is not None:
+            header, _ = message
+            match header["type"]:
+                case "get":
+                    shard = coordinator.lease(worker)
+                    if shard is None:
+                        send_message(self.wfile, {"type": "done"})
+                        return
+                    if isinstance(shard, float):
+                        send_message(self.wfile, {"type": "wait", "seconds": shard})
+                        continue
+                    try:
+                        raws = [item.read() for item in shard.items]
+                    except OSError as e:
+                        # 코디네이터 쪽 파일 문제는 다시 시도해도 같으므로 바로 실패 처리
+                        print(f"shard {shard.id} 읽기 실패: {e}", file=sys.stderr)
+                        coordinator.give_up(worker, shard.id, retry=False)
+                        send_message(self.wfile, {"type": "wait", "seconds": 0.0})
+                        continue
+                    send_message(
+                        self.wfile,
+                        {
+                            "type": "shard",
+                            "shard": shard.id,
+                            "keys": [item.key for item in shard.items],
+                            "sizes": [len(raw) for raw in raws],
+                        },
+                        b"".join(raws),
+                    )
+                case "result":
+                    coordinator.complete(
+                        worker, header["shard"], header["records"], header["errors"]
+                    )
+                case "failed":
+                    print(
+                        f"{worker} shard {header['shard']} 실패: {header['error']}",
+                        file=sys.stderr,
+                    )
+                    coordinator.give_up(worker, header["shard"])
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, coordinator: Coordinator):
+        super().__init__(address, CoordinatorHandler)
+        self.coordinator = coordinator
+
+
+def run_coordinator(
+    server: CoordinatorServer, report_interval: float = 10.0
+) -> Coordinator:
+    """모든 shard가 끝나거나 실패할 때까지 진행 상황을 출력하면서 기다림"""
+    coordinator = server.coordinator
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    next_report = time.monotonic() + report_interval
+    with coordinator.lock:
+        while not coordinator.finished:
+            # 작업자가 모두 죽었을 때도 빌려준 shard의 기한을 확인함
+            coordinator.lock.wait(min(report_interval, 1.0))
+            coordinator._expire(time.monotonic())
+            if time.monotonic() >= next_report:
+                print(coordinator.progress(), file=sys.stderr)
+                next_report = time.monotonic() + report_interval
+        # 기다리던 작업자들이 done을 받고 끊을 때까지
+        coordinator.lock.wait_for(
+            lambda: not any(w.connected for w in coordinator.workers.values()),
+            DRAIN_TIMEOUT,
+        )
+    server.shutdown()
+    server.server_close()
+    return coordinator
+
+
+# ---------------------------------------------------------------------------
+# 작업자
+
+
+def _connect(host: str, port: int, timeout: float) -> socket.socket:
+    """코디네이터가 아직 안 떴을 수 있으므로 timeout까지 다시 시도"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection((host, port))
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def score_shard(keys: list[str], sizes: list[int], body: bytes) -> dict:
+    records, errors = [], []
+    offset = 0
+    for key, size in zip(keys, sizes):
+        record = _parse_and_score(key, body[offset : offset + size])
+        offset += size
+        if isinstance(record, ErrorRecord):
+            errors.append(asdict(record))
+        else:
+            records.append(record)
+    return {"records": records, "errors": errors}
+
+
+def run_worker(
+    host: str,
+    port: int,
+    *,
+    name: str | None = None,
+    token: str | None = None,
+    battle_point_path: str | Path = BATTLE_POINT_PATH,
+    arkpassive_path: str | Path = ARKPASSIVE_PATH,
+    connect_timeout: float = CONNECT_TIMEOUT,
+) -> int:
+    """코디네이터가 done을 보낼 때까지 shard를 받아서 계산, 계산한 캐릭터 수를 반환"""
+    _init_worker(battle_point_path, arkpassive_path)
+    version = coefficient_version(
+        BattlePointCalculator(battle_point_path, arkpassive_path)
+    )
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+
+    scored = 0
+    with _connect(host, port, connect_timeout) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        rfile = sock.makefile("rb")
+        wfile = sock.makefile("wb")
+        send_message(
+            wfile,
+            {
+                "type": "hello",
+                "worker": name,
+                "coefficient_version": version,
+                "token": token,
+            },
+        )
+        while True:
+            send_message(wfile, {"type": "get"})
+            message = recv_message(rfile)
+            if message is None:
+                raise ConnectionError("코디네이터 연결이 끊겼습니다.")
+            header, body = message
+            match header["type"]:
+                case "done":
+                    return scored
+                case "rejected":
+                    raise ConnectionError(header["reason"])
+                case "wait":
+                    time.sleep(header["seconds"])
+                case "shard":
+                    try:
+                        result = score_shard(header["keys"], header["sizes"], body)
+                    except Exception as e:  # noqa: BLE001
+                        # 캐릭터 하나의 실패는 _parse_and_score가 처리하므로 여기는 예상 못한 실패
+                        send_message(
+                            wfile,
+                            {
+                                "type": "failed",
+                                "shard": header["shard"],
+                                "error": f"{type(e).__name__}: {e}",
+                            },
+                        )
+                        continue
+                    send_message(
+                        wfile, {"type": "result", "shard": header["shard"], **result}
+                    )
+                    scored += len(header["keys"])
+
+
+def _worker_process(host: str, port: int, token: str | None):
+    # 한 머신에서 worker를 여러 번 실행해도 겹치지 않도록 순번 대신 pid
+    name = f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        scored = run_worker(host, port, name=name, token=token)
+    except ConnectionError as e:
+        print(f"{name}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{name}: {scored}캐릭터 계산", file=sys.stderr)
+
+
+def start_workers(
+    host: str, port: int, processes: int, token: str | None = None
+) -> list[multiprocessing.Process]:
+    workers = [
+        multiprocessing.Process(
+            target=_worker_process, args=(host, port, token), daemon=True
+        )
+        for _ in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    return workers
+
+
+# ---------------------------------------------------------------------------
+
+
+def _address(value: str) -> tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main_coordinator(args: argparse.Namespace) -> int:
+    items = [item for source in args.sources for item in iter_corpus(source)]
+    if args.resume:
+        skip = done_keys(args.sink)
+        items = [item for item in items if item.key not in skip]
+        print(f"이미 계산한 {len(skip):,}캐릭터 제외", file=sys.stderr)
+    if not items:
+        print("계산할 캐릭터가 없습니다.", file=sys.stderr)
+        return 0
+
+    sink = open_sink(args.sink)
+    quarantine = Quarantine(args.quarantine) if args.quarantine else None
+    coordinator = Coordinator(
+        items,
+        sink,
+        shard_size=args.shard_size,
+        lease_timeout=args.lease_timeout,
+        max_attempts=args.max_attempts,
+        quarantine=quarantine,
+        coefficient_version=coefficient_version(BattlePointCalculator()),
+        token=args.token,
+    )
+    server = CoordinatorServer((args.host, args.port), coordinator)
+    host, port = server.server_address[:2]
+    print(
+        f"{len(items):,}캐릭터, {len(coordinator.shards)}개 shard, {host}:{port}",
+        file=sys.stderr,
+    )
+
+    local = start_workers(host, port, args.local_workers, args.token)
+    try:
+        run_coordinator(server, args.report_interval)
+    finally:
+        sink.close()
+        if quarantine is not None:
+            quarantine.close()
+        for p in local:
+            p.join(timeout=5)
+
+    print(coordinator.report(), file=sys.stderr)
+    failed = any(shard.failed for shard in coordinator.shards)
+    return 1 if failed or coordinator.counters.failed else 0
+
+
+def main_worker(args: argparse.Namespace) -> int:
+    host, port = _address(args.coordinator)
+    workers = start_workers(host, port, args.processes, args.token)
+    for p in workers:
+        p.join()
+    return 1 if any(p.exitcode for p in workers) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="여러 작업자로 나눠서 전투력 계산")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("coordinator", help="shard를 나눠주고 결과를 모음")
+    p.add_argument(
+        "sources",
+        nargs="+",
+        help="character_*.json 폴더/패턴, .ndjson 또는 .pack 파일",
+    )
+    p.add_argument("--sink", help="결과 저장 위치 (.ndjson, .db), 없으면 stdout")
+    p.add_argument("--host", default="127.0.0.1", help="다른 머신에서 접속하면 0.0.0.0")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help="0이면 아무 포트")
+    p.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    p.add_argument("--lease-timeout", type=float, default=LEASE_TIMEOUT, help="초")
+    p.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    p.add_argument("--resume", action="store_true", help="sink에 이미 있는 캐릭터 제외")
+    p.add_argument("--quarantine", help="파싱/계산에 실패한 응답을 저장할 폴더")
+    p.add_argument("--token", help="작업자가 같은 값을 보내야 접속 허용")
+    p.add_argument("--local-workers", type=int, default=0, help="같이 띄울 작업자 수")
+    p.add_argument("--report-interval", type=float, default=10.0, help="초")
+    p.set_defaults(func=main_coordinator)
+
+    p = sub.add_parser("worker", help="코디네이터에서 shard를 받아서 계산")
+    p.add_argument("coordinator", help="host:port")
+    p.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--token")
+    p.set_defaults(func=main_worker)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import stat
+
+import pytest
+
+from dump import GameMsg
+
+MESSAGES = [
+    ("tip.name.Ability_1", "<FONT COLOR='#FFFFFF'>원한</FONT>"),
+    ("tip.name.Ability_2", "예리한\n둔기"),
+    ("tip.name.Ability_3", "\t돌격대장"),
+]
+
+
+@pytest.fixture
+def game_msg_db(tmp_path):
+    path = tmp_path / "EFTable_GameMsg.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE GameMsg (KEY, MSG)")
+        conn.executemany("INSERT INTO GameMsg VALUES (?, ?)", MESSAGES)
+    conn.close()
+    return path
+
+
+def _schema(path):
+    with sqlite3.connect(path) as conn:
+        result = conn.execute("SELECT type, name FROM sqlite_master").fetchall()
+    conn.close()
+    return result
+
+
+def test_find(game_msg_db):
+    game_msg = GameMsg(game_msg_db)
+    try:
+        assert game_msg.find("tip.name.Ability_1") == "원한"
+        assert game_msg.find("TIP.NAME.ABILITY_2") == "예리한 둔기"
+        assert game_msg.find("tip.name.ability_3") == "돌격대장"
+        with pytest.raises(KeyError):
+            game_msg.find("tip.name.Ability_4")
+    finally:
+        game_msg.close()
+
+
+def test_does_not_modify_db(game_msg_db):
+    before = game_msg_db.read_bytes()
+    schema = _schema(game_msg_db)
+
+    game_msg = GameMsg(game_msg_db)
+    try:
+        assert game_msg.find("tip.name.Ability_1") == "원한"
+    finally:
+        game_msg.close()
+
+    assert game_msg_db.read_bytes() == before
+    assert _schema(game_msg_db) == schema
+    assert sorted(p.name for p in game_msg_db.parent.iterdir()) == [game_msg_db.name]
+
+
+def test_read_only_file(game_msg_db):
+    os.chmod(game_msg_db, stat.S_IREAD)
+    game_msg = GameMsg(game_msg_db)
+    try:
+        assert game_msg.find("tip.name.Ability_2") == "예리한 둔기"
+    finally:
+        game_msg.close()
+
+
+def test_uses_existing_index(game_msg_db):
+    with sqlite3.connect(game_msg_db) as conn:
+        conn.execute("CREATE INDEX GameMsg_KEY ON GameMsg (KEY COLLATE NOCASE)")
+    conn.close()
+
+    game_msg = GameMsg(game_msg_db)
+    try:
+        assert game_msg.conn.execute("PRAGMA database_list").fetchone()[2] != ""
+        assert game_msg.find("tip.name.Ability_1") == "원한"
+    finally:
+        game_msg.close()
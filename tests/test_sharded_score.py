@@ -0,0 +1,171 @@
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from sharded_score import (
+    Coordinator,
+    CoordinatorServer,
+    Item,
+    recv_message,
+    run_worker,
+    score_shard,
+    send_message,
+)
+
+CHARACTERS = 6
+SHARD_SIZE = 2
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record: dict):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def items(tmp_path):
+    # 계산까지 가지 않아도 캐릭터마다 결과(실패 기록) 한 줄이 나오면 충분함
+    result = []
+    for i in range(CHARACTERS):
+        path = tmp_path / f"character_char{i}.json"
+        path.write_bytes(b"null")
+        result.append(Item(f"char{i}", str(path)))
+    return result
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(coordinator: Coordinator) -> int:
+        server = CoordinatorServer(("127.0.0.1", 0), coordinator)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class RawWorker:
+    """shard를 받은 뒤 결과를 보내지 않는 작업자"""
+
+    def __init__(self, port: int, name: str):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.rfile = self.sock.makefile("rb")
+        self.wfile = self.sock.makefile("wb")
+        send_message(self.wfile, {"type": "hello", "worker": name})
+
+    def lease(self) -> tuple[dict, bytes]:
+        send_message(self.wfile, {"type": "get"})
+        header, body = recv_message(self.rfile)
+        assert header["type"] == "shard"
+        return header, body
+
+    def close(self):
+        self.rfile.close()
+        self.wfile.close()
+        self.sock.close()
+
+
+def _run_workers(port: int, count: int) -> list[threading.Thread]:
+    threads = [
+        threading.Thread(
+            target=run_worker, args=("127.0.0.1", port), kwargs={"name": f"w{i}"}
+        )
+        for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _wait_finished(coordinator: Coordinator, timeout: float = 30.0):
+    with coordinator.lock:
+        assert coordinator.lock.wait_for(lambda: coordinator.finished, timeout)
+
+
+def _check_records(sink: ListSink, items: list[Item]):
+    names = [record["name"] for record in sink.records]
+    assert sorted(names) == sorted(item.key for item in items)
+
+
+def test_dropped_connection(items, serve):
+    sink = ListSink()
+    coordinator = Coordinator(items, sink, shard_size=SHARD_SIZE)
+    port = serve(coordinator)
+
+    dropped = RawWorker(port, "dropped")
+    header, _ = dropped.lease()
+    dropped.close()
+
+    for thread in _run_workers(port, 2):
+        thread.join(30)
+    _wait_finished(coordinator)
+
+    _check_records(sink, items)
+    assert coordinator.retries >= 1
+    assert coordinator.shards[header["shard"]].done
+    assert not coordinator.workers["dropped@127.0.0.1"].connected
+
+
+def test_expired_lease(items, serve):
+    sink = ListSink()
+    coordinator = Coordinator(items, sink, shard_size=SHARD_SIZE, lease_timeout=0.2)
+    port = serve(coordinator)
+
+    stalled = RawWorker(port, "stalled")
+    header, body = stalled.lease()
+    time.sleep(0.3)
+
+    for thread in _run_workers(port, 2):
+        thread.join(30)
+    _wait_finished(coordinator)
+
+    # 기한이 지난 뒤에 온 결과는 버림
+    result = score_shard(header["keys"], header["sizes"], body)
+    send_message(stalled.wfile, {"type": "result", "shard": header["shard"], **result})
+    # 핸들러는 메시지를 순서대로 처리하므로 done을 받으면 결과도 처리된 것
+    send_message(stalled.wfile, {"type": "get"})
+    assert recv_message(stalled.rfile)[0]["type"] == "done"
+    stalled.close()
+    assert coordinator.duplicates == 1
+
+    _check_records(sink, items)
+    assert coordinator.retries >= 1
+
+
+def test_duplicate_worker_name(items):
+    coordinator = Coordinator(items, ListSink(), shard_size=SHARD_SIZE)
+    assert coordinator.hello({"worker": "host-1"}) is None
+    assert coordinator.hello({"worker": "host-1"}) is not None
+
+    # 끊긴 뒤 다시 접속하면 허용
+    coordinator.give_up("host-1")
+    assert coordinator.hello({"worker": "host-1"}) is None
+
+
+def test_unreadable_shard(items, serve):
+    missing = Item("missing", str(Path(items[0].path).with_name("missing.json")))
+    sink = ListSink()
+    coordinator = Coordinator([*items, missing], sink, shard_size=SHARD_SIZE)
+    port = serve(coordinator)
+
+    for thread in _run_workers(port, 2):
+        thread.join(30)
+    _wait_finished(coordinator)
+
+    # 읽지 못한 shard는 다시 빌려주지 않고 실패, 나머지는 한 번씩 기록
+    failed = [shard for shard in coordinator.shards if shard.failed]
+    assert [item.key for shard in failed for item in shard.items] == ["missing"]
+    _check_records(sink, items)
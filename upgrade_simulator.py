@@ -0,0 +1,597 @@
+"""
+확률형 강화 기대 전투력 시뮬레이션
+
+엘릭서 효과 레벨, 초월 등급(transcendence_additional 구간 포함), 장신구 연마 효과 재설정처럼
+결과가 확률로 정해지는 강화는 하나의 증가량이 아니라 분포로 봐야 합니다.
+결과 확률표를 받아서 캐릭터의 FactorChain에서 해당 단계만 결과별 계수로 바꾸고,
+numpy 배열로 한 번에 다시 계산해서 기대 증가량, 분산, 분위수를 구합니다.
+
+- 해당 단계 이전 계수는 한 번만 적용, 이후 계수는 시행 전체에 대해 매 단계 내림까지 calc와 같게 적용
+- 결과 조합 수가 적으면 조합마다 한 번씩만 계산하고, 시행 횟수는 다항분포로 뽑음
+  (시행을 하나씩 뽑아서 세는 것과 같은 분포, --per-trial이면 시행마다 계산)
+- 엘릭서 세트는 툴팁에 나온 값을 그대로 사용 (레벨이 바뀌어도 세트 단계는 바뀌지 않음)
+
+결과 확률표 (json)
+[
+    {"kind": "elixir", "equipment": "투구", "line": 0,
+     "outcomes": {"+1": 0.5, "+2": 0.2}},
+    {"kind": "transcendence", "equipment": "하의",
+     "outcomes": {"+1": 0.4, "+2": 0.2, "20": 0.05}},
+    {"kind": "grinding", "equipment": "귀걸이", "index": 1, "line": 2,
+     "outcomes": {"공격력 +1.55%": 0.1, "공격력 +0.95%": 0.3}}
+]
+- elixir, transcendence: "+N", "-N"은 현재 레벨/등급에서 더하고 빼기, "N"은 그 값으로 바뀜
+- grinding: 바뀐 뒤의 연마 효과 문자열
+- index: 같은 종류 장비 중 몇 번째인지 (귀걸이, 반지), line: 몇 번째 효과인지 (0부터)
+- 확률 합이 1보다 작으면 나머지는 현재 상태 그대로
+
+$ python upgrade_simulator.py character_이름.json --table upgrades.json --trials 1000000
+"""
+
+import argparse
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+
+from battlepoint.calculator import (
+    BATTLE_POINT_TYPE_ORDER,
+    CARE_BATTLE_POINT_TYPES,
+    EQUIPMENT_TYPE_ACCESSORY,
+    EQUIPMENT_TYPE_ARMOR,
+    BattlePointCalculator,
+    BattlePointType,
+)
+from battlepoint.character import CharacterInformation, Equipment, EquipmentType
+from battlepoint.snapshot import load_character
+
+UpgradeKind = Literal["elixir", "transcendence", "grinding"]
+
+MAX_ELIXIR_LEVEL = 5
+MAX_TRANSCENDENCE_GRADE = 21
+
+# 결과 조합 수가 이보다 많으면 시행마다 계산
+MAX_ENUMERATED = 1 << 20
+DEFAULT_CHUNK_SIZE = 1 << 18
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+REGEX_ELIXIR_LEVEL = re.compile(r"^(.*) Lv\.(\d+)$")
+
+# 강화 종류별로 다시 만드는 calc 단계
+STAGES: dict[str, tuple[BattlePointType, ...]] = {
+    "elixir": (
+        BattlePointType.ELIXIR_GRADE_ATTACK,
+        BattlePointType.ELIXIR_GRADE_DEFENSE,
+    ),
+    "grinding": (
+        BattlePointType.ACCESSORY_GRINDING_ATTACK,
+        BattlePointType.ACCESSORY_GRINDING_DEFENSE,
+        BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK,
+    ),
+    "transcendence": (
+        BattlePointType.TRANSCENDENCE_ARMOR,
+        BattlePointType.TRANSCENDENCE_ADDITIONAL,
+    ),
+}
+
+
+@dataclass
+class Upgrade:
+    kind: UpgradeKind
+    equipment: EquipmentType
+    outcomes: dict[str, float]  # 결과 -> 확률
+    index: int = 0  # 같은 종류 장비 중 몇 번째인지
+    line: int = 0  # 몇 번째 효과인지 (엘릭서, 연마)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Upgrade":
+        if d["kind"] not in STAGES:
+            raise ValueError(f"알 수 없는 강화 종류입니다: {d['kind']}")
+        return cls(
+            kind=d["kind"],
+            equipment=EquipmentType(d["equipment"]),
+            outcomes={str(k): float(v) for k, v in d["outcomes"].items()},
+            index=int(d.get("index", 0)),
+            line=int(d.get("line", 0)),
+        )
+
+    @property
+    def label(self) -> str:
+        label = f"{self.kind} {self.equipment}"
+        if self.index:
+            label += f"#{self.index}"
+        if self.kind != "transcendence":
+            label += f" {self.line}번째 효과"
+        return label
+
+
+def load_upgrades(fname: str) -> list[Upgrade]:
+    with open(fname, "r", encoding="utf-8") as fp:
+        return [Upgrade.from_dict(d) for d in json.load(fp)]
+
+
+@dataclass
+class GainEstimate:
+    current: int  # 현재 전투력
+    trials: int
+    mean: float  # 기대 증가량
+    variance: float
+    quantiles: dict[float, int]
+    p_gain: float  # 전투력이 오를 확률
+    elapsed: float  # 초
+    combinations: int | None = None  # 조합을 모두 계산했으면 조합 수
+    exact_mean: float | None = None  # 조합을 모두 계산했으면 정확한 기댓값
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def stderr(self) -> float:
+        return self.std / math.sqrt(self.trials) if self.trials else 0.0
+
+    @property
+    def trials_per_second(self) -> float:
+        return self.trials / self.elapsed if self.elapsed else math.inf
+
+
+@dataclass
+class _Step:
+    """
+    calc의 apply 한 번, 계수 = const + sum(table[결과 번호] for 강화 번호, table in terms)
+    terms가 비어 있으면 결과와 관계없는 계수
+    """
+
+    care: bool
+    base: int
+    const: int
+    terms: list[tuple[int, np.ndarray]] = field(default_factory=list)
+
+
+def _apply_outcome(current: int, key: str, low: int, high: int) -> int:
+    value = current + int(key) if key[0] in "+-" else int(key)
+    return min(max(value, low), high)
+
+
+def _outcome_states(
+    upgrade: Upgrade, equipment: Equipment
+) -> tuple[list[str | int], np.ndarray]:
+    """결과별 상태와 확률, 마지막은 항상 현재 상태 (확률은 1 - 나머지 합)"""
+    match upgrade.kind:
+        case "elixir":
+            current = equipment.elixir_effects[upgrade.line]
+            matches = REGEX_ELIXIR_LEVEL.match(current)
+            if matches is None:
+                raise ValueError(f"엘릭서 효과 레벨을 찾을 수 없습니다: {current}")
+            name, level = matches.group(1), int(matches.group(2))
+            states = [
+                f"{name} Lv.{_apply_outcome(level, k, 1, MAX_ELIXIR_LEVEL)}"
+                for k in upgrade.outcomes
+            ]
+        case "transcendence":
+            # 초월하지 않은 장비는 0등급에서 시작
+            current = equipment.transcendence_grade or 0
+            states = [
+                _apply_outcome(current, k, 0, MAX_TRANSCENDENCE_GRADE)
+                for k in upgrade.outcomes
+            ]
+        case "grinding":
+            current = equipment.grinding_effects[upgrade.line]
+            states = list(upgrade.outcomes)
+
+    probs = list(upgrade.outcomes.values())
+    if any(p < 0 for p in probs):
+        raise ValueError(f"확률이 음수입니다: {upgrade.label}")
+    rest = 1.0 - sum(probs)
+    if rest < -1e-9:
+        raise ValueError(f"확률 합이 1보다 큽니다: {upgrade.label}")
+    states.append(current)
+    probs.append(max(rest, 0.0) if rest > 1e-12 else 0.0)
+
+    probs = np.array(probs, dtype=np.float64)
+    return states, probs / probs.sum()
+
+
+def _transcendence_additional(table: dict, equipment_type: str, grade: int) -> int:
+    """calc의 transcendence_additional과 같은 방식, 넘은 구간 중 가장 큰 계수"""
+    coeff = 0
+    for target_grade, target_coeff in table.get(equipment_type, {}).items():
+        if grade >= int(target_grade) and target_coeff > coeff:
+            coeff = target_coeff
+    return coeff
+
+
+def _round_score(total: np.ndarray) -> np.ndarray:
+    """round(total / Decimal(10000))와 같음 (0.5는 짝수 쪽으로)"""
+    q, rem = np.divmod(total, 10000)
+    return q + ((rem > 5000) | ((rem == 5000) & (q % 2 == 1)))
+
+
+def _summarize(values: np.ndarray, counts: np.ndarray) -> tuple:
+    """(값, 나온 횟수)로 (평균, 분산, 분위수, 0보다 클 확률)"""
+    order = np.argsort(values, kind="stable")
+    values, counts = values[order], counts[order]
+    n = counts.sum()
+    v = values.astype(np.float64)
+    mean = float((v * counts).sum() / n)
+    variance = float((np.square(v - mean) * counts).sum() / n)
+
+    cumulative = np.cumsum(counts)
+    quantiles = {}
+    for q in QUANTILES:
+        i = int(np.searchsorted(cumulative, math.ceil(q * n)))
+        quantiles[q] = int(values[min(i, len(values) - 1)])
+    p_gain = float(counts[values > 0].sum() / n)
+    return mean, variance, quantiles, p_gain
+
+
+class UpgradeSimulator:
+    def __init__(
+        self,
+        calculator: BattlePointCalculator,
+        char: CharacterInformation,
+        upgrades: list[Upgrade],
+        score_type: Literal["attack", "defense"] = "attack",
+    ):
+        self.score_type = score_type
+        self.upgrades = upgrades
+        chain = calculator.calc_factors(char, score_type)
+        self.current = chain.score()
+
+        # (장비, 종류, 효과 번호) -> 강화 번호
+        slots: dict[tuple[int, str, int], int] = {}
+        self.states: list[list[str | int]] = []
+        self.probs: list[np.ndarray] = []
+        for u, upgrade in enumerate(upgrades):
+            equipment = self._find_equipment(char, upgrade)
+            key = (id(equipment), upgrade.kind, upgrade.line)
+            if key in slots:
+                raise ValueError(f"같은 효과에 강화가 두 번 있습니다: {upgrade.label}")
+            slots[key] = u
+            try:
+                states, probs = _outcome_states(upgrade, equipment)
+            except IndexError as e:
+                raise ValueError(f"효과가 없습니다: {upgrade.label}") from e
+            self.states.append(states)
+            self.probs.append(probs)
+
+        rebuilt = {t for upgrade in upgrades for t in STAGES[upgrade.kind]}
+        self._tables = calculator.dict_battle_point[score_type]
+
+        # 다시 만드는 단계는 계산 순서에 맞는 위치에 넣음
+        steps: list[_Step] = []
+        factors = iter(chain.factors)
+        pending = next(factors, None)
+        for battle_point_type in sorted(rebuilt, key=BATTLE_POINT_TYPE_ORDER.get):
+            order = BATTLE_POINT_TYPE_ORDER[battle_point_type]
+            while (
+                pending is not None
+                and BATTLE_POINT_TYPE_ORDER[pending.battle_point_type] <= order
+            ):
+                if pending.battle_point_type not in rebuilt:
+                    steps.append(self._fixed_step(pending))
+                pending = next(factors, None)
+            steps.extend(self._stage_steps(calculator, char, slots, battle_point_type))
+        while pending is not None:
+            if pending.battle_point_type not in rebuilt:
+                steps.append(self._fixed_step(pending))
+            pending = next(factors, None)
+
+        if score_type == "attack":
+            steps = [s for s in steps if not s.care]
+
+        # 결과와 관계없는 앞부분은 한 번만 계산
+        result, result2 = chain.base_attack_point, chain.base_health_point
+        first = next((i for i, s in enumerate(steps) if s.terms), len(steps))
+        for s in steps[:first]:
+            if s.care:
+                result2 += result2 * s.const // pow(10, s.base)
+            else:
+                result += result * s.const // pow(10, s.base)
+        self._start = result, result2
+        self._steps = steps[first:]
+        self._dtype = self._choose_dtype()
+        self._cumulative = [np.cumsum(probs) / probs.sum() for probs in self.probs]
+
+        # 모두 현재 상태일 때 calc와 같아야 함
+        unchanged = np.array([[len(s) - 1 for s in self.states]], dtype=np.intp)
+        if int(self.scores(unchanged)[0]) != self.current:
+            raise RuntimeError("다시 만든 계수로 계산한 전투력이 calc와 다릅니다.")
+
+    @staticmethod
+    def _find_equipment(char: CharacterInformation, upgrade: Upgrade) -> Equipment:
+        allowed = {
+            "elixir": EQUIPMENT_TYPE_ARMOR,
+            "grinding": EQUIPMENT_TYPE_ACCESSORY,
+        }.get(upgrade.kind)
+        if allowed is not None and upgrade.equipment not in allowed:
+            raise ValueError(
+                f"{upgrade.kind} 강화를 할 수 없는 장비입니다: {upgrade.label}"
+            )
+        same_type = [
+            e for e in char.equipments if e.equipment_type == upgrade.equipment
+        ]
+        if upgrade.index >= len(same_type):
+            raise ValueError(f"장비가 없습니다: {upgrade.label}")
+        return same_type[upgrade.index]
+
+    def _stage_steps(self, calculator, char, slots, battle_point_type) -> list[_Step]:
+        match battle_point_type:
+            case (
+                BattlePointType.ELIXIR_GRADE_ATTACK
+                | BattlePointType.ELIXIR_GRADE_DEFENSE
+            ):
+                return self._effect_steps(
+                    char, slots, "elixir", battle_point_type, calculator.find_by_str, 4
+                )
+            case (
+                BattlePointType.ACCESSORY_GRINDING_ATTACK
+                | BattlePointType.ACCESSORY_GRINDING_DEFENSE
+            ):
+                return self._effect_steps(
+                    char,
+                    slots,
+                    "grinding",
+                    battle_point_type,
+                    calculator.find_by_regex,
+                    8,
+                )
+            case BattlePointType.ACCESSORY_GRINDING_ADDONTYPE_ATTACK:
+                return self._effect_steps(
+                    char,
+                    slots,
+                    "grinding",
+                    battle_point_type,
+                    calculator.find_by_str,
+                    4,
+                )
+            case BattlePointType.TRANSCENDENCE_ARMOR:
+                return self._transcendence_armor(char, slots)
+            case BattlePointType.TRANSCENDENCE_ADDITIONAL:
+                return self._transcendence_additional(char, slots)
+        raise ValueError(f"다시 만들 수 없는 단계입니다: {battle_point_type}")
+
+    @staticmethod
+    def _fixed_step(factor) -> _Step:
+        return _Step(
+            care=factor.battle_point_type in CARE_BATTLE_POINT_TYPES,
+            base=factor.base,
+            const=factor.coeff,
+        )
+
+    def _effect_steps(self, char, slots, kind, battle_point_type, find, base):
+        """calc의 엘릭서/연마 효과 부분과 같은 순서로 효과마다 계수 하나"""
+        table = self._tables.get(battle_point_type, {})
+        care = battle_point_type in CARE_BATTLE_POINT_TYPES
+        targets = EQUIPMENT_TYPE_ARMOR if kind == "elixir" else EQUIPMENT_TYPE_ACCESSORY
+
+        steps = []
+        for equipment in char.equipments:
+            if equipment.equipment_type not in targets:
+                continue
+            effects = (
+                equipment.elixir_effects
+                if kind == "elixir"
+                else equipment.grinding_effects
+            )
+            for line, effect in enumerate(effects):
+                u = slots.get((id(equipment), kind, line))
+                if u is None:
+                    coeff = int(find(effect, table))
+                    if coeff:
+                        steps.append(_Step(care, base, coeff))
+                    continue
+                coeffs = np.array(
+                    [int(find(s, table)) for s in self.states[u]], dtype=np.int64
+                )
+                if coeffs.any():
+                    steps.append(_Step(care, base, 0, [(u, coeffs)]))
+        return steps
+
+    def _transcendence_armor(self, char, slots):
+        """총 초월 등급에 비례하는 계수 하나"""
+        per_grade = self._tables[BattlePointType.TRANSCENDENCE_ARMOR]
+        total, terms = 0, []
+        for equipment in char.equipments:
+            u = slots.get((id(equipment), "transcendence", 0))
+            if u is not None:
+                grades = np.array(self.states[u], dtype=np.int64)
+                terms.append((u, per_grade * grades))
+            elif equipment.transcendence_level:
+                total += equipment.transcendence_grade
+        return [_Step(False, 4, per_grade * total, terms)]
+
+    def _transcendence_additional(self, char, slots):
+        """장비마다 넘은 등급 구간의 계수"""
+        table = self._tables[BattlePointType.TRANSCENDENCE_ADDITIONAL]
+        steps = []
+        for equipment in char.equipments:
+            et = equipment.equipment_type
+            u = slots.get((id(equipment), "transcendence", 0))
+            if u is None:
+                if equipment.transcendence_grade is None:
+                    continue
+                coeff = _transcendence_additional(
+                    table, et, equipment.transcendence_grade
+                )
+                if coeff:
+                    steps.append(_Step(False, 4, coeff))
+                continue
+            coeffs = np.array(
+                [_transcendence_additional(table, et, g) for g in self.states[u]],
+                dtype=np.int64,
+            )
+            if coeffs.any():
+                steps.append(_Step(False, 4, 0, [(u, coeffs)]))
+        return steps
+
+    def _choose_dtype(self):
+        """계산 중 값이 int64를 넘을 수 있으면 파이썬 int (object)로 계산"""
+        limit = 2**62
+        result, result2 = (float(v) for v in self._start)
+        for s in self._steps:
+            coeff = s.const + sum(int(table.max()) for _, table in s.terms)
+            coeff = max(coeff, 0)
+            value = result2 if s.care else result
+            if value * coeff >= limit:
+                return object
+            value += value * coeff / pow(10, s.base)
+            if s.care:
+                result2 = value
+            else:
+                result = value
+        if result + 100 * result2 >= limit:
+            return object
+        return np.int64
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """강화별 결과 수"""
+        return tuple(len(s) for s in self.states)
+
+    def scores(self, outcomes: np.ndarray) -> np.ndarray:
+        """outcomes[i, u] = i번째 시행에서 u번째 강화의 결과 번호, 시행별 최종 전투력"""
+        n = len(outcomes)
+        result = np.full(n, self._start[0], dtype=self._dtype)
+        result2 = np.full(n, self._start[1], dtype=self._dtype)
+        for s in self._steps:
+            coeff = s.const
+            for u, table in s.terms:
+                coeff = coeff + table[outcomes[:, u]]
+            if self._dtype is object and not isinstance(coeff, int):
+                coeff = coeff.astype(object)
+            if s.care:
+                result2 += result2 * coeff // pow(10, s.base)
+            else:
+                result += result * coeff // pow(10, s.base)
+
+        if self.score_type == "attack":
+            return _round_score(result)
+        return _round_score(result + 100 * result2)
+
+    def _sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        outcomes = np.empty((n, len(self.states)), dtype=np.intp)
+        for u, cumulative in enumerate(self._cumulative):
+            outcomes[:, u] = np.searchsorted(cumulative, rng.random(n), side="right")
+        np.minimum(outcomes, np.array(self.shape) - 1, out=outcomes)
+        return outcomes
+
+    def run(
+        self,
+        trials: int,
+        rng: np.random.Generator | None = None,
+        *,
+        per_trial: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> GainEstimate:
+        """
+        trials번 시행한 전투력 증가량의 분포
+        per_trial: 결과 조합 수와 관계없이 시행마다 다시 계산
+        """
+        rng = rng or np.random.default_rng()
+        started = time.perf_counter()
+        combinations = math.prod(self.shape)
+
+        if not per_trial and combinations <= MAX_ENUMERATED:
+            outcomes = np.stack(
+                np.unravel_index(np.arange(combinations), self.shape), axis=1
+            )
+            gains = self.scores(outcomes).astype(np.int64) - self.current
+            joint = np.ones(combinations)
+            for u, probs in enumerate(self.probs):
+                joint *= probs[outcomes[:, u]]
+            joint /= joint.sum()
+            counts = rng.multinomial(trials, joint)
+            exact_mean = float((gains * joint).sum())
+            values = gains
+        else:
+            chunks = []
+            for start in range(0, trials, chunk_size):
+                n = min(chunk_size, trials - start)
+                scores = self.scores(self._sample(rng, n))
+                chunks.append(scores.astype(np.int64) - self.current)
+            values, counts = np.unique(
+                np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64),
+                return_counts=True,
+            )
+            combinations, exact_mean = None, None
+
+        if trials:
+            mean, variance, quantiles, p_gain = _summarize(values, counts)
+        else:
+            mean, variance, quantiles, p_gain = 0.0, 0.0, {}, 0.0
+
+        return GainEstimate(
+            current=self.current,
+            trials=trials,
+            mean=mean,
+            variance=variance,
+            quantiles=quantiles,
+            p_gain=p_gain,
+            elapsed=time.perf_counter() - started,
+            combinations=combinations,
+            exact_mean=exact_mean,
+        )
+
+
+def _print_estimate(estimate: GainEstimate):
+    how = (
+        f"조합 {estimate.combinations:,}가지를 모두 계산"
+        if estimate.combinations is not None
+        else "시행마다 계산"
+    )
+    print(
+        f"  시행 {estimate.trials:,}번 ({how}, {estimate.elapsed:.3f}초, "
+        f"{estimate.trials_per_second:,.0f}번/초)"
+    )
+    line = (
+        f"  기대 증가 {estimate.mean / 100:+,.2f} "
+        f"(표준편차 {estimate.std / 100:,.2f}, 표준오차 {estimate.stderr / 100:,.4f})"
+    )
+    if estimate.exact_mean is not None:
+        line += f", 정확한 기댓값 {estimate.exact_mean / 100:+,.2f}"
+    print(line)
+    print(f"  오를 확률 {estimate.p_gain:.2%}")
+    print(
+        "  분위수 "
+        + ", ".join(f"{q:.0%} {v / 100:+,.2f}" for q, v in estimate.quantiles.items())
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="확률형 강화 기대 전투력 시뮬레이션")
+    parser.add_argument("character", help="OPENAPI 응답 json 파일")
+    parser.add_argument("--table", required=True, help="결과 확률표 json 파일")
+    parser.add_argument("--score-type", choices=["attack", "defense"])
+    parser.add_argument("--trials", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--per-trial",
+        action="store_true",
+        help="결과 조합을 모아서 계산하지 않고 시행마다 계산",
+    )
+    parser.add_argument(
+        "--each", action="store_true", help="강화 하나씩만 했을 때도 출력"
+    )
+    args = parser.parse_args()
+
+    calculator = BattlePointCalculator()
+    char = load_character(args.character)
+    score_type = args.score_type or ("defense" if char.is_supporter else "attack")
+    upgrades = load_upgrades(args.table)
+    rng = np.random.default_rng(args.seed)
+
+    simulator = UpgradeSimulator(calculator, char, upgrades, score_type)
+    print(f"현재 전투력: {simulator.current / 100:,.2f}")
+    print(f"강화 {len(upgrades)}개 모두")
+    _print_estimate(simulator.run(args.trials, rng, per_trial=args.per_trial))
+
+    if args.each and len(upgrades) > 1:
+        for upgrade in upgrades:
+            print(upgrade.label)
+            single = UpgradeSimulator(calculator, char, [upgrade], score_type)
+            _print_estimate(single.run(args.trials, rng, per_trial=args.per_trial))